@@ -0,0 +1,110 @@
+"""
+Line-by-line vs vectorised BankParser benchmark, with a golden-corpus check.
+
+    python -m benchmarks.csv_vectorised --transactions 60000 --repeat 3
+
+First parses a golden corpus (generated statements at several sizes, every
+line-ending convention, and hand-written edge cases: quoted commas, trailing
+blank fields, Unicode digits and spaces, dates out of place, text before the
+first transaction) with both engines and fails unless every DataFrame is
+identical, including with batches small enough that blocks straddle them.
+Then times both engines on one large statement (about 1.75 lines
+per transaction) and reports the speedup.
+"""
+import argparse
+import io
+import time
+
+from benchmarks.generators import make_csv_statement
+from kakos_audit import BankParser
+
+EDGE_LINES = [
+    'preamble 1 Jan 2024,x,1,2,3',
+    '  3 feb 24,"a, ""quoted"" b",1 000.00,,5,,, ',
+    'cont line,,with,,commas',
+    'abcde1 Jan 2024 not a start',
+    'x5 Jan 2024 no word boundary,1,2,3',
+    ' 12-Mar-2024,desc 12-Mar-2024 twice,1,2,3',
+    '1 Jan 2024',
+    '1\xa0Jan\xa02024,a\xa0,,,\xa0 ,',
+    '07\xa0Apr  24,nbsp\xa0\xa0sep ,1,2,\xa03\xa0',
+    ' 9 Feb 24,　lead  thin,4,5,6',
+    '1 1 Jan 24,odd,1,2,3',
+    '9 DEC 99999,bad year,1,2,3',
+    '2 Jan 2024,"unterminated quote,1,2',
+    '3 Jan 2024,next,4,5,6',
+    '\t\t4 Jan 2024,tabs\tand\x1fseparators,7,8,9',
+    '5 Jan 2024,' + 'long ' * 80 + ',1,2,3',
+    '٣ Jan 2024,arabic-indic digit,1,2,3',
+    '1 ſep 24,long s,1,2,3',
+    '\xe9 2 Jan 24,accented prefix,1,2,3',
+    '1\x1fJan\x1f24,unit separators,1,2,3',
+    '12 JaN 2024' + '9' * 20 + ',digits run on,1,2,3',
+    '6 Jan 2024,"(1,234.50)",GH₵ 20.00,"7,000"',
+    '',
+    '   ',
+    '8 Jan 2024,​zero width,1,2,3',
+]
+
+
+def golden_corpus():
+    """Yield (name, bytes) pairs covering the generator and the edge cases."""
+    for n, seed in ((0, 0), (1, 1), (10, 2), (1000, 3), (5000, 7)):
+        yield f'generated/{n}', make_csv_statement(n, seed)
+    text = make_csv_statement(200, 5).decode()
+    for name, eol in (('lf', '\n'), ('cr', '\r'), ('vt', '\x0b'), ('ls', '\u2028')):
+        yield f'line-endings/{name}', text.replace('\r\n', eol).encode()
+    yield 'no-final-newline', text.rstrip().encode()
+    yield 'edge-cases', '\r\n'.join(EDGE_LINES).encode() + b'\xff\xfe undecodable,1,2,3\n10 Jan 24,ok,1,2,3'
+    yield 'no-transactions', b'header only\nno dates here\n'
+    yield 'empty', b''
+
+
+def _parser(vectorised, batch_lines=None):
+    parser = BankParser()
+    parser.VECTORISED = vectorised
+    if batch_lines:
+        parser.BATCH_LINES = batch_lines
+    return parser
+
+
+def _time_parse(parser, data, repeat):
+    best, df = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = parser.parse(io.BytesIO(data))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, df
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--transactions', type=int, default=60000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    for name, data in golden_corpus():
+        lines_df = _parser(False).parse(io.BytesIO(data))
+        for batch_lines in (None, 7, 500):
+            vector_df = _parser(True, batch_lines).parse(io.BytesIO(data))
+            if not vector_df.equals(lines_df) or not vector_df.dtypes.equals(lines_df.dtypes):
+                raise SystemExit(f'golden corpus: vectorised output differs on {name} '
+                                 f'(batches of {batch_lines or BankParser.BATCH_LINES} lines)')
+    print('golden corpus:     identical')
+
+    data = make_csv_statement(args.transactions)
+    lines = data.count(b'\n')
+    print(f'statement: {args.transactions} transactions, {lines} lines, {len(data) / 1024:.0f} KiB')
+    lines_s, lines_df = _time_parse(_parser(False), data, args.repeat)
+    vector_s, vector_df = _time_parse(_parser(True), data, args.repeat)
+    print(f'line by line:      {lines_s:8.2f}s  ({len(lines_df) / lines_s:,.0f} rows/s)')
+    print(f'vectorised:        {vector_s:8.2f}s  ({len(vector_df) / vector_s:,.0f} rows/s)')
+    print(f'speedup:           {lines_s / vector_s:8.2f}x')
+    if not vector_df.equals(lines_df):
+        raise SystemExit('vectorised output differs from line-by-line output')
+    print(f'output identical:  {len(vector_df)} rows')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Deterministic synthetic bank statements for benchmarking the parser engines.
+
+Every generator takes a transaction count and a seed and returns the raw file
+bytes, so the same arguments always produce identical statements. Each format
+carries the features the engines have to cope with: an opening "Balance at
+Period Start" row, multi-line continuation rows, and (for DOCX) merged cells.
+"""
+import io
+import random
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+
+from docx import Document
+
+MONTHS = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+NARRATIONS = (
+    'CASH DEPOSIT', 'TRANSFER IN FROM KAKOS FEED LTD', 'SWIFT INWARD REMITTANCE',
+    'CHEQUE PAYMENT', 'POS PURCHASE ACCRA MALL', 'SALARY PAYMENT', 'ATM WITHDRAWAL',
+    'MOMO TRANSFER OUT', 'ELECTRICITY COMPANY OF GHANA', 'FERTILISER SUPPLIES',
+)
+NOTES = ('PAYMENT FOR MAIZE', 'INV 2231 POULTRY FEED', 'VET SERVICES', 'TRACTOR HIRE',
+         'TRANSPORT TO KUMASI', 'WAGES WEEK 3')
+OPENING_BALANCE = 250_000.00
+
+
+def _transactions(n, seed):
+    """Yield ((day, MON, yy), reference, description, notes, debit, credit, balance) tuples."""
+    rng = random.Random(seed)
+    balance = OPENING_BALANCE
+    day = 0
+    for i in range(n):
+        day += rng.random() < 0.3
+        month = (day // 28) % 12
+        year = 24 + day // (28 * 12)
+        date = (1 + day % 28, MONTHS[month], year % 100)
+        desc = rng.choice(NARRATIONS)
+        amount = round(rng.uniform(5, 5_000), 2)
+        if 'DEPOSIT' in desc or 'TRANSFER IN' in desc or 'SWIFT' in desc:
+            debit, credit = 0.0, amount
+        else:
+            debit, credit = amount, 0.0
+        balance = round(balance + credit - debit, 2)
+        notes = [rng.choice(NOTES) for _ in range(rng.choice((0, 0, 1, 2)))]
+        yield date, f'FT{seed:02d}{i:08d}', desc, notes, debit, credit, balance
+
+
+def _money(val):
+    return f'{val:,.2f}' if val else ''
+
+
+# ------------------------------------------
+# PDF (Universal Merchant Bank layout)
+# ------------------------------------------
+PDF_COLUMNS = (('Booking Date', 46), ('Reference', 74), ('Account No', 56), ('Account Name', 62),
+               ('Description', 150), ('Value Date', 46), ('Debit', 50), ('Credit', 50), ('Balance', 54))
+PDF_ROW_HEIGHT = 12
+PDF_PAGE_W, PDF_PAGE_H = 612, 792
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _pdf_table(ops, top, rows):
+    """Draw one ruled table (one rectangle per cell) and return the next free y position."""
+    for cells in rows:
+        x = 14
+        y = top - PDF_ROW_HEIGHT
+        for (_, width), text in zip(PDF_COLUMNS, cells):
+            ops.append(f'{x} {y} {width} {PDF_ROW_HEIGHT} re S')
+            if text:
+                ops.append(f'BT /F1 6 Tf {x + 2} {y + 3} Td ({_pdf_escape(text)}) Tj ET')
+            x += width
+        top = y
+    return top - 4
+
+
+def make_pdf_statement(n_transactions, seed=0):
+    """Build a multi-page PDF statement where every transaction is its own table.
+
+    Tables are split across pages wherever they run out of room, so continuation
+    rows regularly land at the top of the following page.
+    """
+    header = [name for name, _ in PDF_COLUMNS]
+    blocks = [[['', 'Balance at Period Start', '', '', '', '', '', '', _money(OPENING_BALANCE)]]]
+    for (d, mon, yy), ref, desc, notes, debit, credit, bal in _transactions(n_transactions, seed):
+        date = f'{d:02d} {mon} {yy:02d}'
+        main = [date, ref, '0012345678', 'KAKOS FARMS', desc, date, _money(debit), _money(credit), _money(bal)]
+        blocks.append([main] + [['', '', '', '', note, '', '', '', ''] for note in notes])
+    blocks.append([['Total Debits', '', '', '', '', '', '', '', ''],
+                   ['Closing Balance', '', '', '', '', '', '', '', '']])
+
+    pages, ops, top = [], None, 0
+    for block in blocks:
+        rows = list(block)
+        while rows:
+            if ops is None or top - PDF_ROW_HEIGHT < 40:
+                ops = ['0.5 w']
+                pages.append(ops)
+                top = _pdf_table(ops, PDF_PAGE_H - 30, [header])
+            fit = max(1, int((top - 40) // PDF_ROW_HEIGHT))
+            top = _pdf_table(ops, top, rows[:fit])
+            rows = rows[fit:]
+
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for page_ops in pages:
+        stream = zlib.compress('\n'.join(page_ops).encode('latin-1'))
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        content_id = len(objects)
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>'
+                       % (PDF_PAGE_W, PDF_PAGE_H, content_id))
+        kids.append(len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % k for k in kids), len(kids))
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % i + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % off for off in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+# ------------------------------------------
+# CSV (core-banking export)
+# ------------------------------------------
+def make_csv_statement(n_transactions, seed=0):
+    """Build a core-banking CSV dump: date-led rows with quoted amounts and wrapped narration lines."""
+    lines = [
+        'KAKOS FARMS LTD - ACCOUNT STATEMENT,,,,,',
+        'Account No: 0012345678,,,,,',
+        'Trans Date,Reference,Narration,Debit,Credit,Balance',
+        f',,Balance at Period Start,,,"{_money(OPENING_BALANCE)}"',
+    ]
+    for (d, mon, yy), ref, desc, notes, debit, credit, bal in _transactions(n_transactions, seed):
+        date = f'{d}-{mon.title()}-20{yy:02d}'
+        lines.append(f'{date},{ref},"{desc}","{_money(debit)}","{_money(credit)}","{_money(bal)}"')
+        lines.extend(f',,{note},,,' for note in notes)
+    lines.append('Total,,,,,')
+    return ('\r\n'.join(lines) + '\r\n').encode('utf-8')
+
+
+# ------------------------------------------
+# DOCX (Word export with merged cells)
+# ------------------------------------------
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+DOCX_LAYOUTS = {
+    9: ('Booking Date', 'Reference', 'Account No', 'Account Name', 'Description',
+        'Value Date', 'Debit', 'Credit', 'Balance'),
+    7: ('Booking Date', 'Reference', 'Description', 'Value Date', 'Debit', 'Credit', 'Balance'),
+    6: ('Booking Date', 'Reference', 'Description', 'Value Date', 'Amount', 'Balance'),
+}
+
+
+def _docx_cell(text, span=1, vmerge=None):
+    props = ''
+    if span > 1:
+        props += f'<w:gridSpan w:val="{span}"/>'
+    if vmerge == 'restart':
+        props += '<w:vMerge w:val="restart"/>'
+    elif vmerge == 'continue':
+        props += '<w:vMerge/>'
+    run = f'<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r>' if text else ''
+    return f'<w:tc><w:tcPr>{props}</w:tcPr><w:p>{run}</w:p></w:tc>'
+
+
+def _docx_row(cells):
+    """``cells`` is a list of (text, span, vmerge) tuples covering the whole grid."""
+    return '<w:tr>' + ''.join(_docx_cell(*c) for c in cells) + '</w:tr>'
+
+
+def make_docx_statement(n_transactions, seed=0, columns=9):
+    """
+    Build a Word statement with one table in the 9-, 7- or 6-column layout.
+
+    The currency banner spans the whole row, the opening balance label spans
+    the middle columns, every continuation row merges its note cell with its
+    neighbour (gridSpan), and in the 9-column layout the account name is
+    vertically merged (vMerge) over each transaction's continuation rows.
+    The XML is written directly: python-docx's table API is quadratic in rows.
+    """
+    header = DOCX_LAYOUTS[columns]
+    desc_col = 4 if columns == 9 else 2
+    rows = [
+        _docx_row([('CURRENCY : GHS', columns, None)]),
+        _docx_row([(name, 1, None) for name in header]),
+        _docx_row([('', 1, None), ('Balance at Period Start', columns - 2, None),
+                   (_money(OPENING_BALANCE), 1, None)]),
+    ]
+    for (d, mon, yy), ref, desc, notes, debit, credit, bal in _transactions(n_transactions, seed):
+        date = f'{d:02d} {mon} {yy:02d}'
+        if columns == 9:
+            values = (date, ref, '0012345678', 'KAKOS FARMS', desc, date, _money(debit), _money(credit), _money(bal))
+        elif columns == 7:
+            values = (date, ref, desc, date, _money(debit), _money(credit), _money(bal))
+        else:
+            values = (date, ref, desc, date, _money(debit or credit), _money(bal))
+        cells = [(v, 1, None) for v in values]
+        if columns == 9 and notes:
+            cells[3] = (values[3], 1, 'restart')
+        rows.append(_docx_row(cells))
+        for note in notes:
+            cont = [('', 1, None)] * desc_col + [(note, 2, None)] + [('', 1, None)] * (columns - desc_col - 2)
+            if columns == 9:
+                cont[3] = ('', 1, 'continue')
+            rows.append(_docx_row(cont))
+
+    grid = ''.join('<w:gridCol w:w="1000"/>' for _ in range(columns))
+    body = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<w:document xmlns:w="{W_NS}"><w:body>'
+            f'<w:tbl><w:tblPr><w:tblW w:w="0" w:type="auto"/></w:tblPr><w:tblGrid>{grid}</w:tblGrid>'
+            + ''.join(rows) +
+            '</w:tbl><w:sectPr/></w:body></w:document>')
+
+    # Reuse python-docx's default package for every part except the document body
+    skeleton = io.BytesIO()
+    Document().save(skeleton)
+    out = io.BytesIO()
+    with zipfile.ZipFile(skeleton) as src, zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = body.encode('utf-8') if item.filename == 'word/document.xml' else src.read(item)
+            dst.writestr(item, data)
+    return out.getvalue()
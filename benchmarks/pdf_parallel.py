@@ -0,0 +1,54 @@
+"""
+Serial vs parallel PdfBankParser benchmark.
+
+    python -m benchmarks.pdf_parallel --transactions 3000 --workers 4
+
+Builds a synthetic multi-page statement, parses it on the serial path and on
+the process-pool path, checks that both produce identical DataFrames and
+reports the speedup.
+"""
+import argparse
+import io
+import os
+import time
+
+from benchmarks.generators import make_pdf_statement
+from kakos_audit import PdfBankParser
+
+
+def _time_parse(parser, data, repeat):
+    best, df = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = parser.parse(io.BytesIO(data))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, df
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--transactions', type=int, default=3000)
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    ap.add_argument('--repeat', type=int, default=1)
+    args = ap.parse_args()
+
+    data = make_pdf_statement(args.transactions)
+    print(f'statement: {args.transactions} transactions, {len(data) / 1024:.0f} KiB')
+
+    # Warm the pool so process start-up is not billed to the first parse.
+    PdfBankParser(workers=args.workers).parse(io.BytesIO(make_pdf_statement(50)))
+
+    serial_s, serial_df = _time_parse(PdfBankParser(), data, args.repeat)
+    parallel_s, parallel_df = _time_parse(PdfBankParser(workers=args.workers), data, args.repeat)
+
+    print(f'serial:            {serial_s:8.2f}s  ({len(serial_df) / serial_s:,.0f} rows/s)')
+    print(f'parallel ({args.workers:>2} wk): {parallel_s:8.2f}s  ({len(parallel_df) / parallel_s:,.0f} rows/s)')
+    print(f'speedup:           {serial_s / parallel_s:8.2f}x')
+    if not serial_df.equals(parallel_df):
+        raise SystemExit('parallel output differs from serial output')
+    print(f'output identical:  {len(serial_df)} rows')
+
+
+if __name__ == '__main__':
+    main()
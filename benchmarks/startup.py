@@ -0,0 +1,78 @@
+"""
+Worker start-up benchmark: cold import and time to first request.
+
+    python -m benchmarks.startup --repeat 5
+
+Each measurement runs in a fresh interpreter, as a newly forked or restarted
+worker would. For every scenario it reports the time to ``import kakos_audit``
+and the latency of the first request that worker serves, both with lazy engine
+loading (the default) and with KAKOS_PRELOAD=all.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SCENARIOS = ('landing', 'csv', 'docx', 'pdf')
+
+# Runs in the child interpreter; the statement is generated before the clock starts.
+CHILD = r'''
+import io, json, sys, time
+scenario = sys.argv[1]
+data = None
+if scenario != 'landing':
+    from benchmarks import generators
+    data = getattr(generators, f'make_{scenario}_statement')(50)
+    for name in [m for m in sys.modules if m.split('.')[0] in ('docx', 'lxml')]:
+        del sys.modules[name]   # the DOCX generator's imports must not count as warm
+start = time.perf_counter()
+import kakos_audit
+imported = time.perf_counter()
+client = kakos_audit.app.test_client()
+if data is None:
+    resp = client.get('/')
+else:
+    resp = client.post('/', data={'file': (io.BytesIO(data), f'statement.{scenario}')})
+assert resp.status_code in (200, 302), resp.status_code
+done = time.perf_counter()
+print(json.dumps({'import_s': imported - start, 'first_request_s': done - imported}))
+'''
+
+
+def measure(scenario, preload, repeat):
+    env = dict(os.environ)
+    env.pop('KAKOS_PRELOAD', None)
+    if preload:
+        env['KAKOS_PRELOAD'] = 'all'
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix='kakos_startup_') as tmp:
+            env['KAKOS_CACHE_DIR'] = os.path.join(tmp, 'cache')
+            env['KAKOS_DATASET_DIR'] = os.path.join(tmp, 'datasets')
+            env['KAKOS_SPOOL_DIR'] = os.path.join(tmp, 'spool')
+            out = subprocess.run([sys.executable, '-c', CHILD, scenario], env=env, check=True,
+                                 capture_output=True, text=True, cwd=os.getcwd())
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--repeat', type=int, default=3, help='fresh interpreters per scenario (median reported)')
+    ap.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset of ' + ','.join(SCENARIOS))
+    args = ap.parse_args()
+
+    print(f"{'first request':<14} {'loading':<8} {'import ms':>10} {'request ms':>11} {'total ms':>9}")
+    for scenario in args.scenarios.split(','):
+        for preload in (False, True):
+            r = measure(scenario, preload, args.repeat)
+            total = r['import_s'] + r['first_request_s']
+            print(f"{scenario:<14} {'preload' if preload else 'lazy':<8} {r['import_s'] * 1000:>10.0f} "
+                  f"{r['first_request_s'] * 1000:>11.0f} {total * 1000:>9.0f}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Parser and route benchmark suite for all three engines.
+
+    python -m benchmarks.suite --sizes 100,1000,10000 --save baseline.json
+    python -m benchmarks.suite --sizes 100,1000,10000 --compare baseline.json
+
+For every engine and statement size it builds a deterministic synthetic
+statement (see benchmarks.generators) and measures:
+
+* parse throughput (rows/s) and peak Python heap of ``parse_statement``;
+* end-to-end latency of the upload (cold parse cache), filter and export
+  routes through the Flask test client.
+
+Results can be saved as a JSON baseline; ``--compare`` reports every metric
+that regressed by more than ``--tolerance`` and exits non-zero if any did.
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# The app reads its storage locations at import time: keep benchmark runs out of the real ones.
+_WORKDIR = tempfile.mkdtemp(prefix='kakos_bench_')
+os.environ['KAKOS_CACHE_DIR'] = os.path.join(_WORKDIR, 'cache')
+os.environ['KAKOS_DATASET_DIR'] = os.path.join(_WORKDIR, 'datasets')
+os.environ['KAKOS_SPOOL_DIR'] = os.path.join(_WORKDIR, 'spool')
+os.environ.setdefault('KAKOS_MAX_UPLOAD_MB', '1024')
+
+from benchmarks.generators import make_csv_statement, make_docx_statement, make_pdf_statement  # noqa: E402
+import kakos_audit  # noqa: E402
+
+GENERATORS = {
+    'csv': (make_csv_statement, 'statement.csv'),
+    'docx': (make_docx_statement, 'statement.docx'),
+    'pdf': (make_pdf_statement, 'statement.pdf'),
+}
+# Metrics where a larger value is better; every other metric is a duration or a size.
+HIGHER_IS_BETTER = {'rows_per_s'}
+FILTER_QUERY = {'start_date': '2024-03-01', 'end_date': '2024-09-30', 'search': 'TRANSFER'}
+
+
+def _best_of(repeat, fn):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _clear_parse_cache():
+    shutil.rmtree(kakos_audit.app.config['CACHE_DIR'], ignore_errors=True)
+    os.makedirs(kakos_audit.app.config['CACHE_DIR'], exist_ok=True)
+
+
+def bench_parse(engine, data, repeat):
+    """Best-of-``repeat`` parse time, then one traced run for the peak Python heap."""
+    seconds, df = _best_of(repeat, lambda: kakos_audit.parse_statement(engine, io.BytesIO(data)))
+    tracemalloc.start()
+    kakos_audit.parse_statement(engine, io.BytesIO(data))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'rows': len(df),
+        'parse_s': seconds,
+        'rows_per_s': len(df) / seconds if seconds else 0.0,
+        'peak_mib': peak / (1024 * 1024),
+    }
+
+
+def bench_routes(engine, data, filename, repeat):
+    """Latency of upload (cache cleared first), filtered dashboard and xlsx export for one client."""
+    client = kakos_audit.app.test_client()
+
+    def upload():
+        _clear_parse_cache()
+        resp = client.post('/', data={'file': (io.BytesIO(data), filename)},
+                           content_type='multipart/form-data')
+        if resp.status_code != 302:
+            raise RuntimeError(f'{engine} upload failed with HTTP {resp.status_code}')
+        return resp
+
+    def fetch(path, **query):
+        resp = client.get(path, query_string=query)
+        if resp.status_code != 200:
+            raise RuntimeError(f'{engine} GET {path} failed with HTTP {resp.status_code}')
+        resp.get_data()
+        return resp
+
+    upload_s, _ = _best_of(repeat, upload)
+    filter_s, _ = _best_of(repeat, lambda: fetch('/', **FILTER_QUERY))
+    export_s, _ = _best_of(repeat, lambda: fetch('/export', format='xlsx'))
+    client.get('/', query_string={'reset': '1'})
+    return {'upload_s': upload_s, 'filter_s': filter_s, 'export_s': export_s}
+
+
+def run(engines, sizes, repeat, seed):
+    results = {}
+    for engine in engines:
+        make, filename = GENERATORS[engine]
+        for size in sizes:
+            data = make(size, seed)
+            row = {'bytes': len(data)}
+            row.update(bench_parse(engine, data, repeat))
+            row.update(bench_routes(engine, data, filename, repeat))
+            results[f'{engine}/{size}'] = row
+            print(_format_row(f'{engine}/{size}', row), flush=True)
+    return results
+
+
+HEADER = (f"{'case':<12} {'rows':>8} {'parse s':>9} {'rows/s':>10} {'peak MiB':>9} "
+          f"{'upload s':>9} {'filter s':>9} {'export s':>9}")
+
+
+def _format_row(case, r):
+    return (f"{case:<12} {r['rows']:>8} {r['parse_s']:>9.3f} {r['rows_per_s']:>10,.0f} {r['peak_mib']:>9.1f} "
+            f"{r['upload_s']:>9.3f} {r['filter_s']:>9.3f} {r['export_s']:>9.3f}")
+
+
+def compare(results, baseline, tolerance):
+    """Return human-readable lines for every metric that regressed beyond ``tolerance``."""
+    regressions = []
+    for case, row in results.items():
+        base = baseline.get(case)
+        if base is None:
+            continue
+        for metric, value in row.items():
+            old = base.get(metric)
+            if metric in ('rows', 'bytes') or not old:
+                continue
+            change = (old - value) / old if metric in HIGHER_IS_BETTER else (value - old) / old
+            if change > tolerance:
+                regressions.append(f'{case:<12} {metric:<10} {old:>12.4g} -> {value:<12.4g} ({change:+.0%} worse)')
+        if base.get('rows') != row['rows']:
+            regressions.append(f"{case:<12} rows changed: {base.get('rows')} -> {row['rows']}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--engines', default='csv,docx,pdf', help='comma-separated subset of csv,docx,pdf')
+    ap.add_argument('--sizes', default='100,1000', help='comma-separated transaction counts (100 to 100000)')
+    ap.add_argument('--repeat', type=int, default=3, help='timings report the best of this many runs')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--save', metavar='PATH', help='write results as a JSON baseline')
+    ap.add_argument('--compare', metavar='PATH', help='JSON baseline to check for regressions')
+    ap.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown (0.2 = 20%%)')
+    args = ap.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(',') if e.strip()]
+    unknown = set(engines) - set(GENERATORS)
+    if unknown:
+        ap.error(f"unknown engine(s): {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    print(HEADER)
+    try:
+        results = run(engines, sizes, args.repeat, args.seed)
+    finally:
+        shutil.rmtree(_WORKDIR, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, 'w') as fh:
+            json.dump({'python': sys.version.split()[0], 'results': results}, fh, indent=2)
+        print(f'baseline written to {args.save}')
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:')
+            print('\n'.join(regressions))
+            raise SystemExit(1)
+        print(f'\nno regressions beyond {args.tolerance:.0%} against {args.compare}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,62 @@
 import re
 import io
+import os
+import sys
 import csv
+import sqlite3
+import json
+import time
+import shutil
+import argparse
+import secrets
+import codecs
+import ctypes
+import bisect
+import gzip
+import hashlib
 import logging
-import pandas as pd
-import pdfplumber
-from docx import Document
-from flask import Flask, request, render_template_string, send_file, redirect, url_for
+import functools
+import itertools
+import tempfile
+import zipfile
+import threading
+import cProfile
+import pstats
+import importlib.util
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from flask import (Flask, Request, Response, request, session, render_template, send_file,
+                   redirect, url_for, jsonify, stream_with_context, g, has_request_context)
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
 
+def _lazy_import(name):
+    """
+    Bind module ``name`` without executing it; the real import runs on first
+    attribute access. Keeps worker start-up free of the heavy engine
+    dependencies until a request (or ``preload``) needs them.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+np = _lazy_import('numpy')
+pd = _lazy_import('pandas')
+pa = _lazy_import('pyarrow')
+pdfplumber = _lazy_import('pdfplumber')   # also pulls in pdfminer and pypdfium2
+pdfium = _lazy_import('pypdfium2')
+docx = _lazy_import('docx')
+etree = _lazy_import('lxml.etree')
+xlsxwriter = _lazy_import('xlsxwriter')
+
 # ==========================================
 # 1. UI TEMPLATE (HTML + TAILWIND CSS)
 # ==========================================
@@ -20,6 +67,7 @@ HTML_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>KAKOS Audit Tool</title>
+    {% if progress and progress.done < progress.total %}<meta http-equiv="refresh" content="3">{% endif %}
     <script src="https://cdn.tailwindcss.com"></script>
     <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap" rel="stylesheet">
     <style>
@@ -41,8 +89,13 @@ HTML_TEMPLATE = """
             </a>
             {% if filename %}
             <div class="flex items-center gap-4">
-                <span class="text-sm text-slate-500 hidden md:block">Active File: <span class="font-mono text-slate-700">{{ filename }}</span></span>
+                <span class="text-sm text-slate-500 hidden md:block">{{ 'Viewing' if ledger_args else 'Active File' }}: <span class="font-mono text-slate-700">{{ filename }}</span></span>
+                {% if ledger_args %}
+                <a href="{{ url_for('index') }}" class="text-sm font-bold text-slate-600 hover:text-slate-800 px-3 py-1 bg-slate-100 rounded-lg transition-colors">Close Ledger</a>
+                {% else %}
+                {% if ledger_enabled %}<a href="{{ url_for('index', ledger='1') }}" class="text-sm font-bold text-indigo-600 hover:text-indigo-700 px-3 py-1 bg-indigo-50 rounded-lg transition-colors">Ledger History</a>{% endif %}
                 <a href="/?reset=1" class="text-sm font-bold text-rose-600 hover:text-rose-700 px-3 py-1 bg-rose-50 rounded-lg transition-colors">Reset / Upload New</a>
+                {% endif %}
             </div>
             {% endif %}
         </div>
@@ -64,17 +117,70 @@ HTML_TEMPLATE = """
                 </div>
                 {% endif %}
 
-                <form action="/" method="post" enctype="multipart/form-data" class="relative">
-                    <input type="file" name="file" id="file" class="hidden" accept=".csv, .docx, .pdf" onchange="this.form.submit()">
+                <form action="/" method="post" enctype="multipart/form-data" class="relative" id="upload-form">
+                    <input type="file" name="file" id="file" class="hidden" accept=".csv, .docx, .pdf" onchange="submitUpload(this.form)">
                     <label for="file" class="block w-full py-4 bg-slate-900 text-white font-bold rounded-xl cursor-pointer hover:bg-slate-800 transition-all shadow-lg hover:shadow-xl">
                         Select CSV, DOCX, or PDF
                     </label>
                 </form>
+                <div id="upload-status" class="hidden mt-4">
+                    <div class="w-full bg-slate-100 rounded-full h-2 overflow-hidden"><div id="upload-bar" class="bg-emerald-500 h-2 transition-all" style="width: 5%"></div></div>
+                    <p id="upload-text" class="mt-2 text-sm text-slate-500">Uploading…</p>
+                </div>
+                <script>
+                // Background mode: the upload returns a job id at once and the page polls its progress.
+                async function submitUpload(form) {
+                    if (!window.fetch) return form.submit();
+                    const status = document.getElementById('upload-status');
+                    const bar = document.getElementById('upload-bar');
+                    const text = document.getElementById('upload-text');
+                    const fail = (msg) => { text.textContent = '⚠️ ' + msg; text.className = 'mt-2 text-sm text-rose-600 font-medium'; };
+                    status.classList.remove('hidden');
+                    const data = new FormData(form);
+                    data.append('background', '1');
+                    let job = await (await fetch('/', {method: 'POST', body: data})).json();
+                    while (!job.error && (job.state === 'queued' || job.state === 'running')) {
+                        const p = job.progress;
+                        if (p && p.total) {
+                            bar.style.width = Math.max(5, Math.round(100 * p.done / p.total)) + '%';
+                            text.textContent = `Parsing… ${p.done} of ${p.total} ${p.unit}`;
+                        } else {
+                            text.textContent = p ? `Parsing… ${p.done.toLocaleString()} ${p.unit}` : 'Waiting for a parser…';
+                        }
+                        await new Promise((r) => setTimeout(r, 1000));
+                        job = await (await fetch(job.status_url || `/jobs/${job.job_id}`)).json();
+                    }
+                    if (job.state === 'done') { bar.style.width = '100%'; window.location = job.redirect; }
+                    else fail(job.error || 'Parsing failed.');
+                }
+                </script>
                 <p class="mt-4 text-xs text-slate-400">Supported formats: .csv · .docx · .pdf</p>
+
+                <form action="/bulk" method="post" enctype="multipart/form-data" class="mt-6 pt-6 border-t border-slate-100">
+                    <input type="file" name="files" id="bulk-files" class="hidden" multiple accept=".csv, .docx, .pdf, .zip" onchange="this.form.submit()">
+                    <label for="bulk-files" class="block w-full py-3 bg-slate-100 text-slate-700 font-bold rounded-xl cursor-pointer hover:bg-slate-200 transition-all">
+                        Bulk upload: several statements or a .zip
+                    </label>
+                    <p class="mt-2 text-xs text-slate-400">Files are parsed in parallel and merged into one consolidated ledger.</p>
+                </form>
+                {% if ledger_enabled %}
+                <a href="{{ url_for('index', ledger='1') }}" class="block mt-4 text-sm font-bold text-indigo-600 hover:text-indigo-700">Search committed history without re-uploading →</a>
+                {% endif %}
             </div>
         </div>
         {% else %}
         <div class="space-y-6">
+            {% if progress %}
+            <div class="glass-panel p-4 text-sm {{ 'border-l-4 border-indigo-500' if progress.done < progress.total else '' }}">
+                {% if progress.done < progress.total %}
+                <p class="font-bold text-slate-700">Parsing statements: {{ progress.done }} of {{ progress.total }} done. Showing the ledger so far; this page refreshes automatically.</p>
+                {% else %}
+                <p class="font-bold text-slate-700">Consolidated {{ progress.total - progress.failed|length }} of {{ progress.total }} statements.</p>
+                {% endif %}
+                {% if progress.failed %}<p class="text-rose-600 mt-1">No transactions extracted from: {{ progress.failed|join(', ') }}</p>{% endif %}
+                {% if progress.skipped %}<p class="text-slate-400 mt-1">Skipped unsupported files: {{ progress.skipped|join(', ') }}</p>{% endif %}
+            </div>
+            {% endif %}
             <div class="glass-panel p-4 flex flex-col md:flex-row justify-between items-center gap-4">
                 <form action="/" method="get" class="flex flex-wrap items-center gap-3 w-full md:w-auto">
                     <div class="flex items-center gap-2 bg-slate-50 border border-slate-200 rounded-lg px-3 py-2">
@@ -89,13 +195,54 @@ HTML_TEMPLATE = """
                         <svg xmlns="http://www.w3.org/2000/svg" width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2.5" class="text-slate-400"><circle cx="11" cy="11" r="8"/><line x1="21" y1="21" x2="16.65" y2="16.65"/></svg>
                         <input type="text" name="search" value="{{ filters.search }}" placeholder="Search description..." class="bg-transparent text-sm font-semibold focus:outline-none text-slate-700 w-full placeholder-slate-300">
                     </div>
+                    {% if ledger_args %}
+                    <input type="hidden" name="ledger" value="1">
+                    <select name="account" class="bg-slate-50 border border-slate-200 rounded-lg px-3 py-2 text-sm font-semibold text-slate-700">
+                        <option value="">All accounts</option>
+                        {% for a in accounts %}<option value="{{ a.account }}" {{ 'selected' if a.account == filters.account }}>{{ a.account }} ({{ a.first_date or '-' }} to {{ a.last_date or '-' }})</option>{% endfor %}
+                    </select>
+                    <div class="flex items-center gap-2 bg-slate-50 border border-slate-200 rounded-lg px-3 py-2">
+                        <span class="text-xs font-bold text-slate-400 uppercase">GH₵</span>
+                        <input type="number" name="min_amount" value="{{ filters.min_amount }}" min="0" step="0.01" placeholder="min" class="bg-transparent text-sm font-semibold focus:outline-none text-slate-700 w-20">
+                        <span class="text-slate-300">–</span>
+                        <input type="number" name="max_amount" value="{{ filters.max_amount }}" min="0" step="0.01" placeholder="max" class="bg-transparent text-sm font-semibold focus:outline-none text-slate-700 w-20">
+                    </div>
+                    {% endif %}
+                    <input type="hidden" name="dedupe" value="{{ filters.dedupe }}">
                     <button type="submit" class="bg-indigo-600 text-white px-4 py-2 rounded-lg text-sm font-bold hover:bg-indigo-700">Filter</button>
                 </form>
 
-                <a href="/export?start_date={{ filters.start }}&end_date={{ filters.end }}&search={{ filters.search }}" class="flex items-center gap-2 bg-emerald-600 text-white px-5 py-2.5 rounded-lg text-sm font-bold hover:bg-emerald-700 shadow-md transition-all">
-                    Export Excel
-                </a>
+                <div class="flex items-center gap-2">
+                    <a href="{{ url_for('export', start_date=filters.start, end_date=filters.end, search=filters.search, dedupe=filters.dedupe, **ledger_args) }}" class="flex items-center gap-2 bg-emerald-600 text-white px-5 py-2.5 rounded-lg text-sm font-bold hover:bg-emerald-700 shadow-md transition-all">
+                        Export Excel
+                    </a>
+                    <a href="{{ url_for('export', start_date=filters.start, end_date=filters.end, search=filters.search, dedupe=filters.dedupe, format='csv', **ledger_args) }}" class="px-3 py-2.5 bg-slate-100 text-slate-700 rounded-lg text-sm font-bold hover:bg-slate-200">CSV</a>
+                    <a href="{{ url_for('export', start_date=filters.start, end_date=filters.end, search=filters.search, dedupe=filters.dedupe, format='parquet', **ledger_args) }}" class="px-3 py-2.5 bg-slate-100 text-slate-700 rounded-lg text-sm font-bold hover:bg-slate-200">Parquet</a>
+                    {% if not ledger_args %}
+                    <form action="/bulk" method="post" enctype="multipart/form-data">
+                        <input type="hidden" name="append" value="1">
+                        <input type="file" name="files" id="append-files" class="hidden" multiple accept=".csv, .docx, .pdf, .zip" onchange="this.form.submit()">
+                        <label for="append-files" class="block px-3 py-2.5 bg-slate-100 text-slate-700 rounded-lg text-sm font-bold hover:bg-slate-200 cursor-pointer" title="Add overlapping statements; repeated transactions are flagged">+ Add statements</label>
+                    </form>
+                    {% endif %}
+                    {% if ledger_enabled and not ledger_args %}
+                    <form action="{{ url_for('ledger_commit') }}" method="post" class="flex items-center gap-1" title="Keep these statements in the ledger history; committing one again is a no-op">
+                        <input type="text" name="account" placeholder="Account" class="w-28 px-2 py-2 bg-slate-50 border border-slate-200 rounded-lg text-sm font-semibold text-slate-700 focus:outline-none">
+                        <button type="submit" class="px-3 py-2.5 bg-indigo-50 text-indigo-700 rounded-lg text-sm font-bold hover:bg-indigo-100">Commit to ledger</button>
+                    </form>
+                    {% endif %}
+                </div>
+            </div>
+
+            {% if duplicates and (duplicates.exact or duplicates.near) %}
+            <div class="glass-panel p-4 text-sm border-l-4 border-sky-500 flex flex-col md:flex-row justify-between md:items-center gap-3">
+                <div>
+                    <p class="font-bold text-slate-700">{{ "{:,}".format(duplicates.exact + duplicates.near) }} row(s) repeat transactions already loaded from another statement ({{ "{:,}".format(duplicates.exact) }} exact, {{ "{:,}".format(duplicates.near) }} near).</p>
+                    <p class="text-slate-500 mt-1">Counted twice they add GH₵ {{ "{:,.2f}".format(duplicates.inflow) }} inflow and GH₵ {{ "{:,.2f}".format(duplicates.outflow) }} outflow. {{ 'They are excluded from the figures and table below.' if filters.dedupe else 'They are included in the figures below.' }}</p>
+                </div>
+                <a href="{{ url_for('index', start_date=filters.start, end_date=filters.end, search=filters.search, dedupe='' if filters.dedupe else '1', **ledger_args) }}" class="px-3 py-2 bg-sky-600 text-white rounded-lg font-bold hover:bg-sky-700 whitespace-nowrap">{{ 'Include duplicates' if filters.dedupe else 'Exclude duplicates' }}</a>
             </div>
+            {% endif %}
 
             <div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
                 <div class="glass-panel p-5 border-l-4 border-emerald-500">
@@ -116,24 +263,73 @@ HTML_TEMPLATE = """
                 </div>
             </div>
 
+            {% if reconciliation %}
+            {% if not reconciliation.breaks %}
+            <div class="glass-panel p-4 text-sm border-l-4 border-emerald-500">
+                <p class="font-bold text-slate-700">Running balance reconciles: every one of {{ "{:,}".format(reconciliation.checked) }} rows follows from the one before it{% if reconciliation.statements > 1 %} across {{ reconciliation.statements }} statements{% endif %}.</p>
+            </div>
+            {% else %}
+            <div class="glass-panel overflow-hidden border-l-4 border-amber-500">
+                <div class="p-4 text-sm">
+                    <p class="font-bold text-slate-700">Running balance breaks: {{ "{:,}".format(reconciliation.breaks) }} of {{ "{:,}".format(reconciliation.checked) }} rows do not follow from the previous balance.</p>
+                    <p class="text-slate-500 mt-1">
+                        {{ reconciliation.missing }} likely missing transaction(s) or page(s), netting to GH₵ {{ "{:,.2f}".format(reconciliation.unexplained) }}
+                        · {{ reconciliation.misread }} mis-read balance(s) · {{ reconciliation.swapped }} debit/credit swap(s).
+                        Checked over the whole statement; the Excel export lists every break.
+                    </p>
+                </div>
+                <div class="overflow-x-auto">
+                    <table class="w-full text-left border-collapse text-sm">
+                        <thead>
+                            <tr class="bg-slate-50 border-y border-slate-200 text-xs font-bold text-slate-500 uppercase tracking-wider">
+                                <th class="px-4 py-2">Row</th><th class="px-4 py-2">Date</th><th class="px-4 py-2">Description</th>
+                                <th class="px-4 py-2 text-right">Expected</th><th class="px-4 py-2 text-right">Balance</th>
+                                <th class="px-4 py-2 text-right">Difference</th><th class="px-4 py-2">Issue</th>
+                            </tr>
+                        </thead>
+                        <tbody class="divide-y divide-slate-100">
+                            {% for row in reconciliation.rows_shown %}
+                            <tr>
+                                <td class="px-4 py-2 font-mono text-slate-400">{{ row['Row'] }}</td>
+                                <td class="px-4 py-2 font-mono whitespace-nowrap">{{ row['Booking Date'] }}</td>
+                                <td class="px-4 py-2">{{ row['Description'] }}{% if row['Source File'] %} <span class="text-slate-400">({{ row['Source File'] }})</span>{% endif %}</td>
+                                <td class="px-4 py-2 text-right font-mono">{{ "{:,.2f}".format(row['Expected Balance']) }}</td>
+                                <td class="px-4 py-2 text-right font-mono">{{ "{:,.2f}".format(row['Balance']) }}</td>
+                                <td class="px-4 py-2 text-right font-mono font-bold text-amber-700">{{ "{:,.2f}".format(row['Difference']) }}</td>
+                                <td class="px-4 py-2 text-slate-600">{{ row['Label'] }}{% if row['Issue'] == 'missing' %} since {{ row['Since'] }}{% endif %}</td>
+                            </tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+            {% endif %}
+            {% endif %}
+
             <div class="glass-panel overflow-hidden">
                 <div class="overflow-x-auto">
                     <table class="w-full text-left border-collapse">
+                        {% macro sort_link(key, label) -%}
+                            {%- set next_order = 'desc' if window.sort == key and window.order == 'asc' else 'asc' -%}
+                            <a href="{{ url_for('index', start_date=filters.start, end_date=filters.end, search=filters.search, dedupe=filters.dedupe, sort=key, order=next_order, per_page=window.limit, **ledger_args) }}" class="hover:text-slate-800">{{ label }}{% if window.sort == key %} {{ '▲' if window.order == 'asc' else '▼' }}{% endif %}</a>
+                        {%- endmacro %}
                         <thead>
                             <tr class="bg-slate-50 border-b border-slate-200">
-                                <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider">Date</th>
-                                <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider">Description</th>
+                                <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider">{{ sort_link('date', 'Date') }}</th>
+                                <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider">{{ sort_link('description', 'Description') }}</th>
                                 <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider">Extracted Notes</th>
-                                <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider text-right">Debit (GHS)</th>
-                                <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider text-right">Credit (GHS)</th>
-                                <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider text-right">Balance (GHS)</th>
+                                <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider text-right">{{ sort_link('debit', 'Debit (GHS)') }}</th>
+                                <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider text-right">{{ sort_link('credit', 'Credit (GHS)') }}</th>
+                                <th class="px-6 py-4 text-xs font-bold text-slate-500 uppercase tracking-wider text-right">{{ sort_link('balance', 'Balance (GHS)') }}</th>
                             </tr>
                         </thead>
-                        <tbody class="divide-y divide-slate-100">
+                        <tbody id="tx-body" class="divide-y divide-slate-100"
+                               data-api="{{ url_for('api_transactions', start_date=filters.start, end_date=filters.end, search=filters.search, dedupe=filters.dedupe, sort=window.sort, order=window.order, **ledger_args) }}"
+                               data-next-offset="{{ window.offset + window.limit }}" data-limit="{{ window.limit }}" data-total="{{ window.total }}">
                             {% for row in transactions %}
                             <tr class="hover:bg-slate-50 transition-colors">
                                 <td class="px-6 py-3 text-sm font-mono text-slate-600 whitespace-nowrap">{{ row['Booking Date'] }}</td>
-                                <td class="px-6 py-3 text-sm text-slate-700 font-medium">{{ row['Description'] }}</td>
+                                <td class="px-6 py-3 text-sm text-slate-700 font-medium">{{ row['Description'] }}{% if row.get('Source File') %}<span class="block text-xs text-slate-400 font-normal">{% if row.get('Account') %}{{ row['Account'] }} · {% endif %}{{ row['Source File'] }}</span>{% endif %}{% if row.get('Duplicate') %}<span class="block text-xs text-sky-600 font-normal">{{ row['Duplicate'] }} duplicate of {{ row['Duplicate Of'] }}</span>{% endif %}</td>
                                 <td class="px-6 py-3 text-sm text-slate-500 italic">{{ row.get('Extracted Notes', '') }}</td>
                                 <td class="px-6 py-3 text-sm font-bold text-right {{ 'text-rose-600' if row['Debit'] != 0 else 'text-slate-200' }}">
                                     {{ "{:,.2f}".format(row['Debit']) if row['Debit'] != 0 else '-' }}
@@ -154,8 +350,77 @@ HTML_TEMPLATE = """
                         </tbody>
                     </table>
                 </div>
+                <div class="px-6 py-3 border-t border-slate-200 flex justify-between items-center text-sm text-slate-500">
+                    <span>Showing <span id="tx-first">{{ window.first_row }}</span>–<span id="tx-last">{{ window.last_row }}</span> of {{ window.total }}</span>
+                    {% if window.pages > 1 %}
+                    <div class="flex gap-2">
+                        {% if window.page > 1 %}
+                        <a href="{{ url_for('index', start_date=filters.start, end_date=filters.end, search=filters.search, dedupe=filters.dedupe, sort=window.sort, order=window.order, per_page=window.limit, page=window.page - 1, **ledger_args) }}" class="px-3 py-1 bg-slate-100 rounded-lg font-bold hover:bg-slate-200">Prev</a>
+                        {% endif %}
+                        <span class="px-2 py-1">Page {{ window.page }} / {{ window.pages }}</span>
+                        {% if window.page < window.pages %}
+                        <a href="{{ url_for('index', start_date=filters.start, end_date=filters.end, search=filters.search, dedupe=filters.dedupe, sort=window.sort, order=window.order, per_page=window.limit, page=window.page + 1, **ledger_args) }}" class="px-3 py-1 bg-slate-100 rounded-lg font-bold hover:bg-slate-200">Next</a>
+                        {% endif %}
+                    </div>
+                    {% endif %}
+                </div>
+                <div id="tx-sentinel" class="h-1"></div>
             </div>
         </div>
+        <script>
+        // Windowed table: append the next slice from /api/transactions as the sentinel scrolls into view.
+        (function () {
+            const body = document.getElementById('tx-body');
+            const sentinel = document.getElementById('tx-sentinel');
+            if (!body || !sentinel || !('IntersectionObserver' in window)) return;
+            const fmt = (v) => Number(v).toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+            const cell = (text, cls) => { const td = document.createElement('td'); td.className = cls; td.textContent = text; return td; };
+            const describe = (row) => {
+                const td = cell(row['Description'], 'px-6 py-3 text-sm text-slate-700 font-medium');
+                if (row['Source File']) {
+                    const src = document.createElement('span');
+                    src.className = 'block text-xs text-slate-400 font-normal';
+                    src.textContent = row['Source File'];
+                    td.appendChild(src);
+                }
+                if (row['Duplicate']) {
+                    const dup = document.createElement('span');
+                    dup.className = 'block text-xs text-sky-600 font-normal';
+                    dup.textContent = `${row['Duplicate']} duplicate of ${row['Duplicate Of']}`;
+                    td.appendChild(dup);
+                }
+                return td;
+            };
+            let loading = false;
+            const observer = new IntersectionObserver(async (entries) => {
+                const next = Number(body.dataset.nextOffset), total = Number(body.dataset.total);
+                if (!entries[0].isIntersecting || loading || next >= total) return;
+                loading = true;
+                try {
+                    const resp = await fetch(`${body.dataset.api}&offset=${next}&limit=${body.dataset.limit}`);
+                    const data = await resp.json();
+                    for (const row of data.rows) {
+                        const tr = document.createElement('tr');
+                        tr.className = 'hover:bg-slate-50 transition-colors';
+                        tr.append(
+                            cell(row['Booking Date'], 'px-6 py-3 text-sm font-mono text-slate-600 whitespace-nowrap'),
+                            describe(row),
+                            cell(row['Extracted Notes'], 'px-6 py-3 text-sm text-slate-500 italic'),
+                            cell(row['Debit'] ? fmt(row['Debit']) : '-', 'px-6 py-3 text-sm font-bold text-right ' + (row['Debit'] ? 'text-rose-600' : 'text-slate-200')),
+                            cell(row['Credit'] ? fmt(row['Credit']) : '-', 'px-6 py-3 text-sm font-bold text-right ' + (row['Credit'] ? 'text-emerald-600' : 'text-slate-200')),
+                            cell(fmt(row['Balance']), 'px-6 py-3 text-sm font-mono font-bold text-right text-slate-900'),
+                        );
+                        body.appendChild(tr);
+                    }
+                    body.dataset.nextOffset = next + data.rows.length;
+                    document.getElementById('tx-last').textContent = data.last_row;
+                } finally {
+                    loading = false;
+                }
+            });
+            observer.observe(sentinel);
+        })();
+        </script>
         {% endif %}
     </main>
 </body>
@@ -178,86 +443,388 @@ def clean_money(val):
         logger.warning("Could not parse monetary value: %r", val)
         return 0.0
 
+def clean_money_column(values, label='money'):
+    """
+    Vectorised ``clean_money`` for a whole column of raw strings.
+
+    Returns a float64 Series aligned with ``values``. Blank cells become 0.0;
+    values that still fail after the vectorised pass are retried with
+    ``float()`` and, if unparseable, become 0.0 with a single aggregated warning.
+    """
+    raw = pd.Series(values, dtype='str')
+    clean = (raw.str.replace('"', '', regex=False)
+                .str.replace(',', '', regex=False)
+                .str.replace('GH₵', '', regex=False)
+                .str.strip())
+    negative = clean.str.startswith('(') & clean.str.endswith(')')
+    if negative.any():
+        clean = clean.where(~negative, '-' + clean.str.slice(1, -1))
+    num = pd.to_numeric(clean, errors='coerce')
+
+    num = num.astype('float64')
+    blank = raw.isna() | (raw.str.strip() == '')
+    num[blank] = 0.0
+
+    failed = num.isna() & ~blank
+    if failed.any():
+        bad = []
+        for idx, text in clean[failed].items():
+            try:
+                num.at[idx] = float(text)
+            except ValueError:
+                num.at[idx] = 0.0
+                bad.append(raw.at[idx])
+        if bad:
+            logger.warning("Could not parse %d %s value(s), treated as 0.00 (e.g. %s)",
+                           len(bad), label, ', '.join(repr(v) for v in bad[:3]))
+    return num
+
+_POOLS = {}   # name -> (workers, ProcessPoolExecutor), one per worker process
+
+def get_process_pool(name, workers):
+    """Return the named process pool at the requested size, reusing it across requests."""
+    entry = _POOLS.get(name)
+    if entry is None or entry[0] != workers:
+        if entry is not None:
+            entry[1].shutdown(wait=False)
+        entry = _POOLS[name] = (workers, ProcessPoolExecutor(max_workers=workers))
+    return entry[1]
+
+class Metrics:
+    """
+    In-process histograms exposed in the Prometheus text format on ``/metrics``.
+
+    Every series is a fixed-bucket histogram keyed by metric name and labels.
+    State is per process: work done on a process pool is recorded there and
+    shipped back with the task result (see ``_metered``) and merged here.
+
+    Under several gunicorn workers a scrape reaches whichever worker accepts
+    it, and shows only that worker's counts. Every rendered series therefore
+    carries a ``worker`` label (the pid). Each worker is then a separate
+    counter that only resets on restart, not one total that jumps between
+    workers. Sum with ``sum without (worker)``. Series of workers that did not
+    answer a scrape are missing from it, so complete totals need one worker
+    per scrape target.
+    """
+
+    SECONDS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+    ROWS = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+    BYTES = tuple(1 << n for n in range(16, 32, 2))   # 64 KiB .. 1 GiB
+
+    HISTOGRAMS = {
+        'kakos_stage_seconds': ('Time spent in one hot-path stage, per engine and route.', SECONDS),
+        'kakos_request_seconds': ('End-to-end request latency per route.', SECONDS),
+        'kakos_rows_per_file': ('Transactions extracted from one statement.', ROWS),
+        'kakos_dataset_bytes': ('In-memory size of one parsed statement.', BYTES),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}   # (name, sorted label items) -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, name, value, **labels):
+        buckets = self.HISTOGRAMS[name][1]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(buckets) + 1) + [0.0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    @contextmanager
+    def stage(self, stage, **labels):
+        """Time the enclosed block as ``kakos_stage_seconds{stage=...}`` (route defaults to the current one)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(stage, time.perf_counter() - start, **labels)
+
+    def add_stage(self, stage, seconds, **labels):
+        """Record an already-measured stage duration."""
+        labels['route'] = labels.get('route') or current_route()
+        self.observe('kakos_stage_seconds', seconds, stage=stage, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def merge(self, snapshot):
+        """Add the counts of a snapshot taken in another process."""
+        with self._lock:
+            for key, counts in snapshot.items():
+                series = self._series.setdefault(key, [0] * (len(counts) - 1) + [0.0])
+                for i, n in enumerate(counts):
+                    series[i] += n
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        snapshot = self.snapshot()
+        worker = ('worker', str(os.getpid()))
+        lines = []
+        for name, (help_text, buckets) in self.HISTOGRAMS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (series_name, labels), counts in sorted(snapshot.items()):
+                if series_name != name:
+                    continue
+                base = ','.join(f'{k}="{v}"' for k, v in (worker, *labels))
+                for bound, n in zip(buckets, counts):
+                    lines.append(f'{name}_bucket{{{base},le="{bound}"}} {n}')
+                lines.append(f'{name}_bucket{{{base},le="+Inf"}} {counts[-2]}')
+                lines.append(f'{name}_sum{{{base}}} {counts[-1]:.6f}')
+                lines.append(f'{name}_count{{{base}}} {counts[-2]}')
+        return '\n'.join(lines) + '\n'
+
+METRICS = Metrics()
+_METRIC_CONTEXT = threading.local()   # .route overrides the label outside a request (pool tasks)
+
+def current_route():
+    """Route label for metrics: the Flask endpoint, or the pool task's declared route."""
+    route = getattr(_METRIC_CONTEXT, 'route', None)
+    if route is None and has_request_context():
+        route = request.endpoint
+    return route or 'background'
+
+def _metered(route, fn, *args):
+    """Process-pool wrapper: run ``fn`` with fresh metrics and return ``(result, metrics snapshot)``."""
+    METRICS.reset()
+    _METRIC_CONTEXT.route = route
+    try:
+        return fn(*args), METRICS.snapshot()
+    finally:
+        _METRIC_CONTEXT.route = None
+
+def parse_dates(values, formats=()):
+    """
+    Vectorised date parsing for a column that repeats a few distinct strings.
+
+    Only the unique values are converted: each is tried against the engine's
+    declared ``formats`` in order, and whatever none of them matches falls back
+    to pandas' mixed-format inference. Unparseable values become NaT.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype='str'))
+    parsed = pd.Series(pd.NaT, index=range(len(uniques)), dtype='datetime64[us]')
+    text = pd.Series(uniques, dtype='str')
+    for fmt in formats:
+        todo = parsed.isna()
+        if not todo.any():
+            break
+        parsed[todo] = pd.to_datetime(text[todo], format=fmt, errors='coerce')
+    todo = parsed.isna() & text.str.strip().ne('')
+    if todo.any():
+        parsed[todo] = pd.to_datetime(text[todo], format='mixed', errors='coerce')
+    out = parsed.to_numpy()[codes]
+    out[codes < 0] = np.datetime64('NaT')
+    return pd.Series(out, index=getattr(values, 'index', None), name=getattr(values, 'name', None))
+
+MONEY_COLUMNS = ('Debit', 'Credit', 'Balance')
 EMPTY_DF = lambda: pd.DataFrame(columns=['Booking Date', 'Description', 'Extracted Notes', 'Debit', 'Credit', 'Balance'])
 
 # ==========================================
 # 2A. DOCX PARSER ENGINE
 # ==========================================
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DOCX_MAIN_PART = 'word/document.xml'
+DOCX_RELS_PART = '_rels/.rels'
+OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+def _docx_main_part(archive):
+    """Name of the main document part, from the package relationships (normally word/document.xml)."""
+    try:
+        rels = etree.fromstring(archive.read(DOCX_RELS_PART))
+    except (KeyError, etree.XMLSyntaxError):
+        return DOCX_MAIN_PART
+    for rel in rels:
+        if rel.get('Type') == OFFICE_DOCUMENT_REL:
+            return rel.get('Target', DOCX_MAIN_PART).lstrip('/')
+    return DOCX_MAIN_PART
+
+def _docx_run_text(r):
+    """Text of a ``w:r`` element, mapping breaks, tabs and hyphens like python-docx's ``Run.text``."""
+    out = []
+    for e in r:
+        tag = e.tag
+        if tag == W_NS + 't':
+            out.append(e.text or '')
+        elif tag == W_NS + 'tab' or tag == W_NS + 'ptab':
+            out.append('\t')
+        elif tag == W_NS + 'br':
+            out.append('\n' if e.get(W_NS + 'type', 'textWrapping') == 'textWrapping' else '')
+        elif tag == W_NS + 'cr':
+            out.append('\n')
+        elif tag == W_NS + 'noBreakHyphen':
+            out.append('-')
+    return ''.join(out)
+
+def _docx_cell_text(tc):
+    """Text of a ``w:tc``: its direct paragraphs (runs and hyperlink runs) joined by newlines, as ``_Cell.text``."""
+    paragraphs = []
+    for p in tc.iterchildren(W_NS + 'p'):
+        parts = []
+        for e in p.iterchildren(W_NS + 'r', W_NS + 'hyperlink'):
+            if e.tag == W_NS + 'r':
+                parts.append(_docx_run_text(e))
+            else:
+                parts.extend(_docx_run_text(r) for r in e.iterchildren(W_NS + 'r'))
+        paragraphs.append(''.join(parts))
+    return '\n'.join(paragraphs)
+
+def _iter_docx_rows(file_stream):
+    """
+    Stream the body tables of a .docx and yield each row's cell texts exactly as
+    python-docx's ``[c.text for c in row.cells]`` would: a cell spanning
+    ``gridSpan`` columns repeats, and a ``vMerge`` continuation repeats the cell
+    above it. ``word/document.xml`` is read incrementally with iterparse and
+    every finished row (and body paragraph) is released, so memory stays flat
+    however many pages the statement has.
+    """
+    with zipfile.ZipFile(file_stream) as archive, archive.open(_docx_main_part(archive)) as part:
+        body_tag, tbl_tag, tr_tag = W_NS + 'body', W_NS + 'tbl', W_NS + 'tr'
+        table, above = None, {}
+        for _, el in etree.iterparse(part, events=('end',), tag=(tr_tag, tbl_tag, W_NS + 'p'),
+                                     huge_tree=True):
+            parent = el.getparent()
+            if el.tag != tr_tag:
+                if parent is not None and parent.tag == body_tag:
+                    # A finished top-level table or paragraph: drop it and anything before it
+                    el.clear()
+                    while el.getprevious() is not None:
+                        del parent[0]
+                continue
+            if parent.tag != tbl_tag or parent.getparent() is None or parent.getparent().tag != body_tag:
+                continue   # row of a table nested in a cell: not part of the statement grid
+            if parent is not table:
+                table, above = parent, {}
+
+            tr_pr = el.find(W_NS + 'trPr')
+            before = tr_pr.find(W_NS + 'gridBefore') if tr_pr is not None else None
+            offset = int(before.get(W_NS + 'val', 0)) if before is not None else 0
+            cells, starts = [], {}
+            for tc in el.iterchildren(W_NS + 'tc'):
+                tc_pr = tc.find(W_NS + 'tcPr')
+                span_el = tc_pr.find(W_NS + 'gridSpan') if tc_pr is not None else None
+                merge_el = tc_pr.find(W_NS + 'vMerge') if tc_pr is not None else None
+                span = int(span_el.get(W_NS + 'val', 1)) if span_el is not None else 1
+                if merge_el is not None and merge_el.get(W_NS + 'val', 'continue') == 'continue':
+                    # python-docx substitutes the cell starting at the same offset in the row above
+                    resolved = above.get(offset, ('', span))
+                else:
+                    resolved = (_docx_cell_text(tc), span)
+                starts[offset] = resolved
+                cells.extend([resolved[0]] * resolved[1])
+                offset += span
+            above = starts
+            yield cells
+
+            el.clear()
+            while el.getprevious() is not None:
+                del parent[0]
+
 class DocxBankParser:
+    """
+    Parses Word statements: every body-table row is one line of the statement
+    in a 9-, 7- or 6-column layout. With ``STREAMING`` (the default) rows come
+    from ``_iter_docx_rows``; otherwise the python-docx object model is used.
+    """
+
     def clean_money(self, val):
         return clean_money(val)
 
-    def parse(self, file_stream):
-        doc = Document(file_stream)
+    PROGRESS_EVERY = 500   # rows between progress callbacks
+    STREAMING = True
+    DATE_FORMATS = ('%d %b %y',)   # the DD MON YY rows matched in _parse_rows
+
+    def parse(self, file_stream, progress=None):
+        if self.STREAMING:
+            with METRICS.stage('normalise', engine='docx'):
+                return self._parse_rows(_iter_docx_rows(file_stream), None, progress)
+        with METRICS.stage('load_document', engine='docx'):
+            doc = docx.Document(file_stream)
+        with METRICS.stage('normalise', engine='docx'):
+            total_rows = sum(len(t.rows) for t in doc.tables) if progress else None
+            rows = ([c.text for c in row.cells] for table in doc.tables for row in table.rows)
+            return self._parse_rows(rows, total_rows, progress)
+
+    def _parse_rows(self, rows, total_rows=None, progress=None):
+        """Merge raw row cell texts into transactions (``total_rows`` is None when unknown)."""
         data = []
         current_row = None
         extra_desc = []
+        rows_done = 0
         
-        for table in doc.tables:
-            for row in table.rows:
-                cells = [c.text.strip().replace('\n', ' ') for c in row.cells]
-                if not cells or "CURRENCY :" in cells[0] or "Booking Date" in cells[0]:
-                    continue
-                    
-                booking_date = cells[0]
-                reference = cells[1] if len(cells) > 1 else ""
+        for raw_cells in rows:
+            rows_done += 1
+            if progress and rows_done % self.PROGRESS_EVERY == 0:
+                progress(rows_done, total_rows, 'rows')
+            cells = [c.strip().replace('\n', ' ') for c in raw_cells]
+            if not cells or "CURRENCY :" in cells[0] or "Booking Date" in cells[0]:
+                continue
                 
-                # Handle Starting Balance line
-                if "Balance at" in reference:
-                    closing_bal = self.clean_money(cells[-1])
-                    data.append({
-                        'Booking Date': None, 
-                        'Description': 'Balance at Period Start', 
-                        'Debit': 0.0, 
-                        'Credit': 0.0, 
-                        'Balance': closing_bal, 
-                        'Extracted Notes': ''
-                    })
-                    continue
-                    
-                # Is it a main transaction row?
-                if re.match(r"^\d{2}\s[A-Z]{3}\s\d{2}$", booking_date):
-                    if current_row:
-                        clean_extra = []
-                        for x in extra_desc:
-                            if x and x != current_row['Description'] and x not in clean_extra:
-                                clean_extra.append(x)
-                        current_row['Extracted Notes'] = " | ".join(clean_extra)
-                        data.append(current_row)
-                    
-                    # Parse dynamic columns based on merged layout
-                    if len(cells) == 9:
-                        r = {'Booking Date': cells[0], 'Description': cells[4], 
-                             'Debit': self.clean_money(cells[6]), 'Credit': self.clean_money(cells[7]), 
-                             'Balance': self.clean_money(cells[8]), 'Extracted Notes': ''}
-                    elif len(cells) == 7:
+            booking_date = cells[0]
+            reference = cells[1] if len(cells) > 1 else ""
+            
+            # Handle Starting Balance line
+            if "Balance at" in reference:
+                data.append({
+                    'Booking Date': None, 
+                    'Description': 'Balance at Period Start', 
+                    'Debit': '', 
+                    'Credit': '', 
+                    'Balance': cells[-1], 
+                    'Extracted Notes': ''
+                })
+                continue
+                
+            # Is it a main transaction row?
+            if re.match(r"^\d{2}\s[A-Z]{3}\s\d{2}$", booking_date):
+                if current_row:
+                    clean_extra = []
+                    for x in extra_desc:
+                        if x and x != current_row['Description'] and x not in clean_extra:
+                            clean_extra.append(x)
+                    current_row['Extracted Notes'] = " | ".join(clean_extra)
+                    data.append(current_row)
+                
+                # Parse dynamic columns based on merged layout (money kept raw, converted per column below)
+                if len(cells) == 9:
+                    r = {'Booking Date': cells[0], 'Description': cells[4], 
+                         'Debit': cells[6], 'Credit': cells[7], 
+                         'Balance': cells[8], 'Extracted Notes': ''}
+                elif len(cells) == 7:
+                    r = {'Booking Date': cells[0], 'Description': cells[2], 
+                         'Debit': cells[4], 'Credit': cells[5], 
+                         'Balance': cells[6], 'Extracted Notes': ''}
+                elif len(cells) == 6:
+                    desc = cells[2].lower()
+                    amt = cells[4]
+                    if "deposit" in desc or "transfer in" in desc or "swift" in desc:
                         r = {'Booking Date': cells[0], 'Description': cells[2], 
-                             'Debit': self.clean_money(cells[4]), 'Credit': self.clean_money(cells[5]), 
-                             'Balance': self.clean_money(cells[6]), 'Extracted Notes': ''}
-                    elif len(cells) == 6:
-                        desc = cells[2].lower()
-                        amt = self.clean_money(cells[4])
-                        if "deposit" in desc or "transfer in" in desc or "swift" in desc:
-                            r = {'Booking Date': cells[0], 'Description': cells[2], 
-                                 'Debit': 0.0, 'Credit': amt, 'Balance': self.clean_money(cells[5]), 'Extracted Notes': ''}
-                        else:
-                            r = {'Booking Date': cells[0], 'Description': cells[2], 
-                                 'Debit': amt, 'Credit': 0.0, 'Balance': self.clean_money(cells[5]), 'Extracted Notes': ''}
+                             'Debit': '', 'Credit': amt, 'Balance': cells[5], 'Extracted Notes': ''}
                     else:
-                        r = {'Booking Date': cells[0], 'Description': cells[2] if len(cells)>2 else "", 
-                             'Debit': 0.0, 'Credit': 0.0, 'Balance': self.clean_money(cells[-1]), 'Extracted Notes': ''}
-                        
-                    current_row = r
-                    extra_desc = []
-                    
-                # Fragmented rows that need to be grouped
-                elif current_row and not booking_date:
-                    desc = ""
-                    if len(cells) == 9: desc = cells[4]
-                    elif len(cells) >= 3: desc = cells[2]
+                        r = {'Booking Date': cells[0], 'Description': cells[2], 
+                             'Debit': amt, 'Credit': '', 'Balance': cells[5], 'Extracted Notes': ''}
+                else:
+                    r = {'Booking Date': cells[0], 'Description': cells[2] if len(cells)>2 else "", 
+                         'Debit': '', 'Credit': '', 'Balance': cells[-1], 'Extracted Notes': ''}
                     
-                    if desc and ": Chq No -" not in desc:
-                        extra_desc.append(desc)
+                current_row = r
+                extra_desc = []
+                
+            # Fragmented rows that need to be grouped
+            elif current_row and not booking_date:
+                desc = ""
+                if len(cells) == 9: desc = cells[4]
+                elif len(cells) >= 3: desc = cells[2]
+                
+                if desc and ": Chq No -" not in desc:
+                    extra_desc.append(desc)
 
         if current_row:
             clean_extra = []
@@ -271,43 +838,229 @@ class DocxBankParser:
             return pd.DataFrame(columns=['Booking Date', 'Description', 'Extracted Notes', 'Debit', 'Credit', 'Balance'])
             
         df = pd.DataFrame(data)
+        for col in MONEY_COLUMNS:
+            df[col] = clean_money_column(df[col], label=col)
         return df
 
 # ==========================================
 # 2B. CSV PARSER ENGINE (ORIGINAL)
 # ==========================================
+CSV_MONTHS = 'Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec'
+CSV_HEAD = 16   # a block-start date ends by character 15 (4 prefix + 11), plus one for the closing \b
+# BankParser.date_pattern anchored within the first five characters, in pyarrow's
+# RE2 syntax. On ASCII heads the two agree: space, tab and \x1f are the only
+# whitespace a line can hold, every other one being a str.splitlines() boundary.
+CSV_BLOCK_START = r'^(.{0,4}?)\b(\d{1,2}[\t \x1f-](?i:' + CSV_MONTHS + r')[\t \x1f-]\d{2,4})\b'
+# The same with Python's re, for heads with non-ASCII digits, spaces or case folds.
+CSV_BLOCK_START_RE = re.compile(r'(.{0,4}?)\b(\d{1,2}[\s-](?:' + CSV_MONTHS + r')[\s-]\d{2,4})\b', re.IGNORECASE)
+CSV_BLOCK_MARK = '\x1e'   # a str.splitlines() boundary, so it never occurs inside a line
+# What re's \s means inside a '\n'-joined block, for RE2: the str.isspace() characters
+# that are not line boundaries. Single spaces are left alone, which keeps matches few.
+CSV_SPACE = '\t\x1f\xa0\u1680\u2000-\u200a\u202f\u205f\u3000'
+CSV_SPACE_RUN = f'[\n {CSV_SPACE}]{{2,}}|[\n{CSV_SPACE}]'
+
 class BankParser:
+    """
+    Parses core-banking CSV dumps: a line whose first date sits within its
+    first five characters starts a transaction block, and the lines after it
+    are continuation narration. The first line's last three non-blank fields
+    are Debit, Credit and Balance.
+
+    The statement is always streamed through ``iter_chunks``. With
+    ``VECTORISED`` (the default) each batch of ``BATCH_LINES`` lines is parsed
+    by ``_parse_lines`` in a few column-wise pandas passes; with it off, line
+    by line. Both produce identical frames. Memory stays constant as the file
+    grows only for ``iter_chunks``; ``parse`` returns the whole statement.
+    """
+
     def __init__(self):
-        self.date_pattern = re.compile(r'\b\d{1,2}[\s-](?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[\s-]\d{2,4}\b', re.IGNORECASE)
+        self.date_pattern = re.compile(r'\b\d{1,2}[\s-](?:' + CSV_MONTHS + r')[\s-]\d{2,4}\b', re.IGNORECASE)
 
     def clean_money(self, val):
         return clean_money(val)
 
-    def parse(self, file_content):
-        content_str = file_content.decode('utf-8', errors='ignore')
-        lines = content_str.splitlines()
+    # date_pattern allows a space or dash separator and a 2- or 4-digit year
+    DATE_FORMATS = ('%d-%b-%Y', '%d %b %Y', '%d-%b-%y', '%d %b %y')
+    READ_SIZE = 1 << 20    # bytes decoded per read from the upload stream
+    CHUNK_ROWS = 10_000    # transactions per emitted DataFrame chunk
+    VECTORISED = True
+    BATCH_LINES = 30_000   # lines per vectorised batch: a few MiB of text, tens of MiB at peak
+
+    def parse(self, file_content, progress=None):
+        """
+        Parse a whole CSV statement (bytes or binary stream) into one DataFrame.
+
+        Only the reading is bounded: the chunks from ``iter_chunks`` are
+        concatenated, so the result and the peak while building it still grow
+        with the statement. Callers that can work chunk by chunk should use
+        ``iter_chunks`` directly.
+        """
+        chunks, rows_done = [], 0
+        with METRICS.stage('normalise', engine='csv'):
+            for chunk in self.iter_chunks(file_content):
+                chunks.append(chunk)
+                rows_done += len(chunk)
+                if progress:
+                    progress(rows_done, None, 'rows')
+        if not chunks:
+            df = pd.DataFrame(columns=['Booking Date', 'Description', 'Extracted Notes', 'Debit', 'Credit', 'Balance'])
+        elif len(chunks) == 1:
+            df = chunks[0]
+        else:
+            df = pd.concat(chunks, ignore_index=True)
+        return df
+
+    def iter_chunks(self, source, chunk_rows=None):
+        """
+        Stream a CSV statement and yield DataFrames of at most ``chunk_rows`` transactions.
+
+        ``source`` may be bytes or a binary file object; it is decoded
+        incrementally, so memory stays bounded by the read size and chunk size
+        rather than the file size.
+        """
+        chunk_rows = chunk_rows or self.CHUNK_ROWS
+        if self.VECTORISED:
+            for df in self._iter_batches(self._iter_lines(source), self.BATCH_LINES):
+                if len(df) <= chunk_rows:
+                    yield df
+                else:
+                    for i in range(0, len(df), chunk_rows):
+                        yield df.iloc[i:i + chunk_rows]
+            return
+
         transactions = []
         current_block = []
 
-        for line in lines:
+        for line in self._iter_lines(source):
             match = self.date_pattern.search(line)
             if match and match.start() < 5:
                 if current_block:
                     transactions.append(self._process_block(current_block))
+                    if len(transactions) >= chunk_rows:
+                        yield self._to_frame(transactions)
+                        transactions = []
                 current_block = [line]
             else:
                 if current_block:
                     current_block.append(line)
-        
+
         if current_block:
             transactions.append(self._process_block(current_block))
+        if transactions:
+            yield self._to_frame(transactions)
 
-        if not transactions:
-            df = pd.DataFrame(columns=['Booking Date', 'Description', 'Extracted Notes', 'Debit', 'Credit', 'Balance'])
-        else:
-            df = pd.DataFrame(transactions)
+    def _iter_batches(self, lines, batch_lines):
+        """
+        Parse ``lines`` ``batch_lines`` at a time with ``_parse_lines``, yielding each batch's frame.
+
+        A batch's last block may continue in the next batch, so its lines are
+        held back and parsed with the next batch's.
+        """
+        held = []
+        while True:
+            batch = list(itertools.islice(lines, batch_lines))
+            final = len(batch) < batch_lines
+            df, held = self._parse_lines(held + batch, final)
+            if len(df):
+                yield df
+            if final:
+                return
+
+    def _parse_lines(self, lines, final=True):
+        """
+        Vectorised equivalent of ``iter_chunks``'s line loop over a batch of lines.
+
+        Returns the batch's transactions and, unless ``final``, the lines of its
+        last block, which are left for the caller to parse with the next batch.
+
+        The lines become one pandas string Series. A date can only start a block
+        within a line's first ``CSV_HEAD`` characters, so one regex match over
+        those heads marks every block start (heads with non-ASCII characters are
+        re-checked with Python's ``re``), and the cumulative sum of the marks is
+        each line's block id. The date is cut from each block's first line, the
+        lines are joined and split back into one narration per block, and the
+        money fields come from the first lines, picked column-wise.
+        """
+        held = []
+        series = pd.Series(lines, dtype='str')
+        heads = series.str.slice(0, CSV_HEAD)
+        starts = heads.str.match(CSV_BLOCK_START).to_numpy(dtype=bool, copy=True)
+        unicode = {i: CSV_BLOCK_START_RE.match(heads.iat[i])
+                   for i in np.flatnonzero(~heads.str.isascii().to_numpy(dtype=bool))}
+        for i, m in unicode.items():
+            starts[i] = m is not None
+        if not final and starts.any():
+            last = np.flatnonzero(starts)[-1]
+            held = lines[last:]
+            series, heads, starts = series.iloc[:last], heads.iloc[:last], starts[:last]
+        if not starts.any():
+            return EMPTY_DF(), held   # lines before the first transaction are dropped
+        firsts = np.flatnonzero(starts)
+
+        dates = heads.iloc[firsts].str.replace(CSV_BLOCK_START + '.*', r'\2', n=1, regex=True).to_numpy()
+        cut = heads.iloc[firsts].str.replace(CSV_BLOCK_START, r'\1', n=1, regex=True).to_numpy()
+        for k in np.flatnonzero(np.isin(firsts, list(unicode))):
+            m = unicode[firsts[k]]
+            dates[k], cut[k] = m[2], m[1] + m.string[m.end(2):]
+
+        # Description: the block's lines joined without the date, comma runs and whitespace
+        # collapsed, stripped, cut to 200
+        narration = series.to_numpy()
+        narration[firsts] = CSV_BLOCK_MARK + cut + series.iloc[firsts].str.slice(CSV_HEAD).to_numpy()
+        narration = '\n'.join(narration[firsts[0]:]).replace(',', ' ').split(CSV_BLOCK_MARK)[1:]
+        desc = (pd.Series(narration, dtype='str')
+                  .str.replace(CSV_SPACE_RUN, ' ', regex=True).str.strip(' ').str.slice(0, 200))
+
+        money = self._trailing_fields(series.iloc[firsts].tolist())
+        df = pd.DataFrame({'Booking Date': pd.Series(dates, dtype='str'), 'Description': desc,
+                           'Extracted Notes': pd.Series([''] * len(firsts), dtype='str')})
+        for col, values in zip(('Debit', 'Credit', 'Balance'), money):
+            df[col] = clean_money_column(values, label=col)
+        return df, held
+
+    @staticmethod
+    def _trailing_fields(lines):
+        """Debit, Credit and Balance columns: the last three fields of each CSV line after trailing blanks."""
+        rows = list(csv.reader(lines))
+        if len(rows) != len(lines):
+            # An unterminated quote ran into the next line: read each line on its own
+            rows = [next(csv.reader([line])) for line in lines]
+        grid = pd.DataFrame(rows, dtype=object)   # None pads the shorter rows
+        cells = grid.to_numpy()
+        filled = np.column_stack([grid[c].astype('str').str.strip().fillna('').ne('').to_numpy(dtype=bool)
+                                  for c in grid.columns])
+        # Column of each row's last non-blank field (-1 for none), then the three ending there
+        last = np.where(filled.any(axis=1), filled.shape[1] - 1 - filled[:, ::-1].argmax(axis=1), -1)
+        picks, index = [], np.arange(len(rows))
+        for back in (2, 1, 0):
+            col = last - back
+            out = np.full(len(rows), '', dtype=object)
+            out[col >= 0] = cells[index[col >= 0], col[col >= 0]]
+            picks.append(pd.Series(out, dtype='str'))
+        return picks
+
+    @staticmethod
+    def _to_frame(transactions):
+        df = pd.DataFrame(transactions)
+        for col in MONEY_COLUMNS:
+            df[col] = clean_money_column(df[col], label=col)
         return df
 
+    def _iter_lines(self, source):
+        """Yield decoded lines with the same boundaries as ``str.splitlines()`` on the whole text."""
+        stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        pending = ''
+        while True:
+            raw = stream.read(self.READ_SIZE)
+            text = pending + decoder.decode(raw, final=not raw)
+            lines = text.splitlines(keepends=True)
+            # Hold back the last line: it may be incomplete, or a '\r' whose '\n' is in the next read.
+            pending = lines.pop() if lines and raw else ''
+            yield from ''.join(lines).splitlines()
+            if not raw:
+                break
+
     def _process_block(self, lines):
         first_line = lines[0]
         reader = csv.reader([first_line])
@@ -316,11 +1069,11 @@ class BankParser:
         while row and row[-1].strip() == '':
             row.pop()
 
-        balance = credit = debit = 0.0
+        balance = credit = debit = ''
         
-        if len(row) >= 1: balance = self.clean_money(row[-1])
-        if len(row) >= 2: credit = self.clean_money(row[-2])
-        if len(row) >= 3: debit = self.clean_money(row[-3])
+        if len(row) >= 1: balance = row[-1]
+        if len(row) >= 2: credit = row[-2]
+        if len(row) >= 3: debit = row[-3]
 
         full_text = " ".join(lines)
         date_match = self.date_pattern.search(first_line)
@@ -342,290 +1095,3112 @@ class BankParser:
 # ==========================================
 # 2C. PDF PARSER ENGINE
 # ==========================================
+# Fast path: instead of pdfplumber's table detection on every page, the column
+# x-boundaries are learnt once from the header row and each later page's
+# characters are dropped into cells straight from pypdfium2's text page.
+PDF_HEADER_LABELS = ('Booking Date', 'Debit', 'Credit', 'Balance')
+PDF_COLUMNS = 9
+PDF_LEARN_PAGES = 3   # pages searched for the header row before giving up on the fast path
+PDF_TOLERANCE = 3     # points; pdfplumber's default snap/join/intersection and text tolerances
+_PDFIUM_LOCK = threading.Lock()   # pdfium is not thread-safe
+
+def _pdfium_layout(page):
+    """
+    Characters ``(text, x0, x1, top, bottom)`` and ruling segments of a pypdfium2
+    page in pdfplumber's top-down coordinates: ``(vertical, horizontal)`` lists of
+    ``(x, top, bottom)`` and ``(y, x0, x1)``. Returns None for anything the fast
+    path does not model (rotation, offset boxes, form XObjects, curves).
+    """
+    raw = pdfium.raw
+    if page.get_rotation() or page.get_mediabox()[:2] != (0.0, 0.0) or page.get_cropbox() != page.get_mediabox():
+        return None
+    height = page.get_height()
+    vertical, horizontal = [], []
+    x, y = ctypes.c_float(), ctypes.c_float()
+    for obj in page.get_objects():
+        if obj.type == raw.FPDF_PAGEOBJ_FORM:
+            return None
+        if obj.type != raw.FPDF_PAGEOBJ_PATH:
+            continue
+        m = obj.get_matrix()
+        start = prev = None
+        for i in range(raw.FPDFPath_CountSegments(obj.raw)):
+            seg = raw.FPDFPath_GetPathSegment(obj.raw, i)
+            kind = raw.FPDFPathSegment_GetType(seg)
+            if kind == raw.FPDF_SEGMENT_BEZIERTO:
+                return None
+            raw.FPDFPathSegment_GetPoint(seg, x, y)
+            point = (m.a * x.value + m.c * y.value + m.e, height - (m.b * x.value + m.d * y.value + m.f))
+            if kind == raw.FPDF_SEGMENT_MOVETO:
+                start = point
+            elif prev is not None:
+                _add_ruling(prev, point, vertical, horizontal)
+            if raw.FPDFPathSegment_GetClose(seg) and start is not None:
+                _add_ruling(point, start, vertical, horizontal)
+            prev = point
+
+    textpage = page.get_textpage()
+    try:
+        count = textpage.count_chars()
+        text = textpage.get_text_range()
+        if len(text) != count:   # characters outside the BMP: fall back to one call per character
+            text = ''.join(chr(raw.FPDFText_GetUnicode(textpage.raw, i)) for i in range(count))
+        chars = []
+        for i in range(count):
+            if raw.FPDFText_IsGenerated(textpage.raw, i):
+                continue
+            left, bottom, right, top = textpage.get_charbox(i, loose=True)
+            chars.append((text[i], left, right, height - top, height - bottom))
+    finally:
+        textpage.close()
+    return chars, vertical, horizontal
+
+def _add_ruling(a, b, vertical, horizontal):
+    (x0, y0), (x1, y1) = a, b
+    if abs(x0 - x1) < 0.5:
+        vertical.append(((x0 + x1) / 2, min(y0, y1), max(y0, y1)))
+    elif abs(y0 - y1) < 0.5:
+        horizontal.append(((y0 + y1) / 2, min(x0, x1), max(x0, x1)))
+
+def _cluster(values, tolerance=PDF_TOLERANCE):
+    """Group numbers that chain within ``tolerance`` of each other; returns the group means."""
+    groups = []
+    for v in sorted(values):
+        if groups and v - groups[-1][-1] <= tolerance:
+            groups[-1].append(v)
+        else:
+            groups.append([v])
+    return [sum(g) / len(g) for g in groups]
+
+def _merge_spans(spans, tolerance=PDF_TOLERANCE):
+    merged = []
+    for lo, hi in sorted(spans):
+        if merged and lo - merged[-1][1] <= tolerance:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+def _covers(spans, lo, hi, tolerance=PDF_TOLERANCE):
+    return any(a <= lo + tolerance and b >= hi - tolerance for a, b in spans)
+
+def _text_lines(chars):
+    """
+    Group characters into ``(line_chars, text)`` lines the way pdfplumber's
+    ``extract_text`` does: lines by top within the tolerance, words split on
+    spaces or gaps wider than the tolerance, joined by single spaces.
+    """
+    lines, last_top = [], None
+    for ch in sorted(chars, key=lambda c: c[3]):
+        if last_top is None or ch[3] - last_top > PDF_TOLERANCE:
+            lines.append([])
+        lines[-1].append(ch)
+        last_top = ch[3]
+    out = []
+    for line in lines:
+        words, word, prev_x1 = [], '', None
+        for text, x0, x1, _, _ in sorted(line, key=lambda c: c[1]):
+            if text.isspace():
+                if word:
+                    words.append(word)
+                word = ''
+                continue
+            if word and x0 - prev_x1 > PDF_TOLERANCE:
+                words.append(word)
+                word = ''
+            word += text
+            prev_x1 = x1
+        if word:
+            words.append(word)
+        if words:
+            out.append((line, ' '.join(words)))
+    return out
+
+def _cell_text(chars):
+    return '\n'.join(text for _, text in _text_lines(chars))
+
+def _layout_rows(layout, columns):
+    """
+    Cut a page into table rows using the learnt column ``columns`` boundaries.
+    Returns rows shaped like ``extract_tables`` output, or None when the page's
+    rulings do not fit the learnt grid.
+    """
+    chars, vertical, horizontal = layout
+    lo, hi = columns[0], columns[-1]
+    covers = [[] for _ in columns]
+    for x, top, bottom in vertical:
+        if lo - PDF_TOLERANCE <= x <= hi + PDF_TOLERANCE:
+            k = min(range(len(columns)), key=lambda i: abs(columns[i] - x))
+            if abs(columns[k] - x) > PDF_TOLERANCE:
+                return None   # a ruling the learnt layout does not have
+            covers[k].append((top, bottom))
+    covers = [_merge_spans(c) for c in covers]
+
+    rules = {}
+    for y, x0, x1 in horizontal:
+        if x1 > lo + PDF_TOLERANCE and x0 < hi - PDF_TOLERANCE:
+            rules.setdefault(y, []).append((x0, x1))
+    ys = _cluster(rules)
+    full = {}
+    for y0 in ys:
+        spans = [s for y, ss in rules.items() if abs(y - y0) <= PDF_TOLERANCE for s in ss]
+        full[y0] = _covers(_merge_spans(spans), lo, hi)
+
+    bands = []
+    for top, bottom in zip(ys, ys[1:]):
+        left, right = _covers(covers[0], top, bottom), _covers(covers[-1], top, bottom)
+        if not left and not right:
+            continue   # gap between two tables
+        if not (left and right and full[top] and full[bottom]):
+            return None   # partial rulings (row spans, other tables): leave it to table detection
+        starts = [k for k in range(len(columns) - 1) if k == 0 or _covers(covers[k], top, bottom)]
+        bands.append((top, bottom, starts))
+    if not bands:
+        return [] if not vertical else None
+
+    tops = [b[0] for b in bands]
+    cells = [{} for _ in bands]
+    for ch in chars:
+        v_mid, h_mid = (ch[3] + ch[4]) / 2, (ch[1] + ch[2]) / 2
+        i = bisect.bisect_right(tops, v_mid) - 1
+        if i < 0 or v_mid >= bands[i][1] or not lo <= h_mid < hi:
+            continue
+        starts = bands[i][2]
+        col = starts[bisect.bisect_right(starts, bisect.bisect_right(columns, h_mid) - 1) - 1]
+        cells[i].setdefault(col, []).append(ch)
+    # Like pdfplumber, each table (a run of touching bands) only has the columns its
+    # cells start at; a cell spanning several of them leaves None in the others.
+    rows, table = [], []
+    for i, band in enumerate(bands):
+        table.append(i)
+        if i + 1 < len(bands) and bands[i + 1][0] == band[1]:
+            continue
+        table_columns = sorted({k for j in table for k in bands[j][2]})
+        for j in table:
+            starts = set(bands[j][2])
+            rows.append([_cell_text(cells[j].get(k, ())) if k in starts else None for k in table_columns])
+        table = []
+    return rows
+
+def _learn_pdf_columns(layout):
+    """Column boundaries from the page's header row, or None if it has no header matching the 9-column layout."""
+    chars, vertical, _ = layout
+    for line, text in _text_lines(chars):
+        if not all(label in text for label in PDF_HEADER_LABELS):
+            continue
+        # The vertical rulings crossing the header line are the column boundaries
+        y_mid = sum(c[3] + c[4] for c in line) / (2 * len(line))
+        columns = _cluster([x for x, top, bottom in vertical
+                            if top - PDF_TOLERANCE <= y_mid <= bottom + PDF_TOLERANCE])
+        if len(columns) != PDF_COLUMNS + 1:
+            return None
+        cells = [[] for _ in range(PDF_COLUMNS)]
+        for ch in line:
+            k = bisect.bisect_right(columns, (ch[1] + ch[2]) / 2) - 1
+            if 0 <= k < PDF_COLUMNS:
+                cells[k].append(ch)
+        names = [_cell_text(c) for c in cells]
+        if (PDF_HEADER_LABELS[0] in names[0]
+                and all(label in name for label, name in zip(PDF_HEADER_LABELS[1:], names[-3:]))):
+            return columns
+        return None
+    return None
+
+def _pdf_source(file_stream):
+    """
+    What the PDF readers open: the path of a file on disk, read in place and
+    cheap to hand to pool workers, else the document bytes.
+    """
+    name = getattr(file_stream, 'name', None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+    return file_stream.getvalue() if hasattr(file_stream, 'getvalue') else file_stream.read()
+
+def _open_pdfplumber(data):
+    return pdfplumber.open(data if isinstance(data, str) else io.BytesIO(data))
+
+def _iter_pdf_pages(data, page_numbers, columns=None):
+    """
+    Yield the raw table rows of each page in ``page_numbers``, in order.
+    ``data`` is the document's bytes or its path (see ``_pdf_source``).
+
+    With learnt ``columns`` pages go through the pypdfium2 fast path; a page
+    whose rulings do not fit the grid, and every page when no grid is known,
+    falls back to pdfplumber's ``extract_tables``.
+    """
+    doc = plumber = None
+    try:
+        if columns is not None:
+            with _PDFIUM_LOCK:
+                doc = pdfium.PdfDocument(data)
+        for n in page_numbers:
+            rows = None
+            if doc is not None:
+                with _PDFIUM_LOCK:
+                    page = doc[n]
+                    try:
+                        layout = _pdfium_layout(page)
+                    finally:
+                        page.close()
+                if layout is not None:
+                    rows = _layout_rows(layout, columns)
+            if rows is None:
+                if plumber is None:
+                    plumber = _open_pdfplumber(data)
+                page = plumber.pages[n]
+                rows = [row for table in page.extract_tables() for row in table]
+                page.close()
+            yield rows
+    finally:
+        if plumber is not None:
+            plumber.close()
+        if doc is not None:
+            with _PDFIUM_LOCK:
+                doc.close()
+
+def _find_pdf_columns(data, pages=PDF_LEARN_PAGES):
+    """``(page_count, columns)`` for a document; columns are learnt from the first header row found, or None."""
+    with _PDFIUM_LOCK:
+        doc = pdfium.PdfDocument(data)
+        try:
+            page_count = len(doc)
+            for n in range(min(pages, page_count)):
+                page = doc[n]
+                try:
+                    layout = _pdfium_layout(page)
+                finally:
+                    page.close()
+                columns = layout and _learn_pdf_columns(layout)
+                if columns:
+                    return page_count, columns
+        finally:
+            doc.close()
+    return page_count, None
+
+def _extract_pdf_pages(source, page_numbers, columns=None):
+    """Run row extraction for a contiguous run of pages (process pool entry point).
+
+    Returns one list of raw table rows per page, in page order.
+    """
+    return list(_iter_pdf_pages(source, page_numbers, columns))
+
 class PdfBankParser:
     """
     Parses bank statement PDFs exported from Universal Merchant Bank (and similar
     multi-table layouts). Each transaction is its own pdfplumber table with 9 columns:
       [Booking Date, Reference, Acct#, Acct Name, Description, Value Date, Debit, Credit, Balance]
     Continuation rows (notes/cheque info) have an empty first cell and text in col[4].
+
+    With ``FAST_PATH`` the column grid is learnt once from the header row and
+    pages are cut into cells from pypdfium2 text pages, falling back to
+    ``extract_tables`` per page when the rulings do not fit (see
+    ``_iter_pdf_pages``).
+
+    With ``workers > 1`` table extraction is spread across a process pool in
+    contiguous page chunks. Rows are still merged in page order by a single pass,
+    so a continuation row at the top of page N+1 attaches to the last
+    transaction of page N exactly as in the serial path. Pool workers are
+    handed the document's path and a page range; a document given as bytes is
+    written to SPOOL_DIR once for them.
     """
 
     DATE_RE = re.compile(r'^\d{2}\s[A-Z]{3}\s\d{2}$')
+    DATE_FORMATS = ('%d %b %y',)
     FOOTER_KEYS = ('Total Debits', 'Total Credits', 'Closing Balan',
                    'Available Bala', 'Uncleared', 'Booking Date')
+    PAGES_PER_CHUNK = 8
+    FAST_PATH = True
+    SPOOL_DIR = None   # where an in-memory document is written for pool workers; None = system temp
 
-    def parse(self, file_stream):
+    def __init__(self, workers=1):
+        self.workers = max(1, int(workers or 1))
+        self._extract_seconds = 0.0   # time spent extracting pages for the current parse
+
+    def parse(self, file_stream, progress=None):
         try:
-            records      = []
-            extra_notes  = []
-            current      = None
-
-            with pdfplumber.open(file_stream) as pdf:
-                for page in pdf.pages:
-                    for table in page.extract_tables():
-                        for row in table:
-                            if row is None:
-                                continue
-
-                            cells = [str(c).replace('\n', ' ').strip() if c else '' for c in row]
-                            if not any(cells):
-                                continue
-
-                            col0 = cells[0]
-
-                            # Skip header / footer rows
-                            if any(k in col0 for k in self.FOOTER_KEYS):
-                                continue
-
-                            # Balance at Period Start
-                            if 'Balance at' in ' '.join(cells):
-                                if current:
-                                    current['Extracted Notes'] = ' | '.join(x for x in extra_notes if x)
-                                    records.append(current)
-                                    current = None
-                                    extra_notes = []
-                                records.append({
-                                    'Booking Date': None,
-                                    'Reference': '',
-                                    'Description': 'Balance at Period Start',
-                                    'Extracted Notes': '',
-                                    'Debit': 0.0, 'Credit': 0.0,
-                                    'Balance': clean_money(cells[-1])
-                                })
-                                continue
-
-                            # Main transaction row — col0 matches date pattern
-                            if self.DATE_RE.match(col0):
-                                if current:
-                                    current['Extracted Notes'] = ' | '.join(x for x in extra_notes if x)
-                                    records.append(current)
-
-                                # Col layout: 0=date 1=ref 2=acct# 3=name 4=desc 5=valdate 6=debit 7=credit 8=balance
-                                debit  = clean_money(cells[6]) if len(cells) > 6 else 0.0
-                                credit = clean_money(cells[7]) if len(cells) > 7 else 0.0
-                                bal    = clean_money(cells[8]) if len(cells) > 8 else 0.0
-                                desc   = re.sub(r'\s+', ' ', cells[4]).strip() if len(cells) > 4 else ''
-                                ref    = re.sub(r'\s+', ' ', cells[1]).strip() if len(cells) > 1 else ''
-
-                                current = {
-                                    'Booking Date': col0,
-                                    'Reference': ref,
-                                    'Description': desc,
-                                    'Extracted Notes': '',
-                                    'Debit': debit,
-                                    'Credit': credit,
-                                    'Balance': bal
-                                }
-                                extra_notes = []
-
-                            # Continuation / notes row — empty col0, notes in col4
-                            elif col0 == '' and current and len(cells) > 4:
-                                note = re.sub(r'\s+', ' ', cells[4]).strip()
-                                skip = (
-                                    not note
-                                    or note == current['Description']
-                                    or ': Chq No' in note
-                                    or 'Debit Cheque' in note
-                                    or re.match(r'^[\d,]+\.\d{2}$', note)
-                                )
-                                if not skip:
-                                    extra_notes.append(note)
-
-            # Flush last transaction
-            if current:
-                current['Extracted Notes'] = ' | '.join(x for x in extra_notes if x)
-                records.append(current)
-
-            if not records:
-                return EMPTY_DF()
-
-            df = pd.DataFrame(records)
-            return df
+            # Extraction and row merging interleave, so extraction time is summed in _iter_rows
+            self._extract_seconds = 0.0
+            start = time.perf_counter()
+            records = self._build_records(self._iter_rows(file_stream, progress))
+            if records:
+                df = pd.DataFrame(records)
+                for col in MONEY_COLUMNS:
+                    df[col] = clean_money_column(df[col], label=col)
+            METRICS.add_stage('extract_tables', self._extract_seconds, engine='pdf')
+            METRICS.add_stage('normalise', time.perf_counter() - start - self._extract_seconds, engine='pdf')
+            return df if records else EMPTY_DF()
 
         except Exception as e:
             logger.error("PDF parsing failed: %s", e)
             return EMPTY_DF()
 
+    def _iter_rows(self, file_stream, progress=None):
+        """Yield every raw table row of the document in page order, reporting pages done to ``progress``."""
+        start = time.perf_counter()
+        data = _pdf_source(file_stream)
+        if self.FAST_PATH:
+            page_count, columns = _find_pdf_columns(data)
+        else:
+            with _open_pdfplumber(data) as pdf:
+                page_count, columns = len(pdf.pages), None
+        self._extract_seconds += time.perf_counter() - start
+
+        spooled = None
+        if self.workers > 1 and page_count > 1:
+            if not isinstance(data, str):
+                # Pickling the document into every chunk's task would copy it once per chunk
+                fd, spooled = tempfile.mkstemp(dir=self.SPOOL_DIR, prefix='pdf-', suffix='.pdf')
+                with os.fdopen(fd, 'wb') as out:
+                    out.write(data)
+                data = spooled
+            chunk = max(1, min(self.PAGES_PER_CHUNK, -(-page_count // self.workers)))
+            chunks = [range(i, min(i + chunk, page_count)) for i in range(0, page_count, chunk)]
+            pool = get_process_pool('pdf', self.workers)
+            results = pool.map(_extract_pdf_pages, [data] * len(chunks), chunks, [columns] * len(chunks))
+        else:
+            results = ([rows] for rows in _iter_pdf_pages(data, range(page_count), columns))
+
+        pages_done = 0
+        try:
+            while True:
+                # Time spent waiting on extraction (or on the pool) is this parse's extraction time
+                start = time.perf_counter()
+                pages = next(results, None)
+                self._extract_seconds += time.perf_counter() - start
+                if pages is None:
+                    break
+                for rows in pages:
+                    yield from rows
+                pages_done += len(pages)
+                if progress:
+                    progress(pages_done, page_count, 'pages')
+        finally:
+            if spooled:
+                remove_spooled([spooled])
+
+    def _build_records(self, rows):
+        """Merge raw table rows into transaction records (header/footer/continuation aware)."""
+        records      = []
+        extra_notes  = []
+        current      = None
+
+        for row in rows:
+            if row is None:
+                continue
+
+            cells = [str(c).replace('\n', ' ').strip() if c else '' for c in row]
+            if not any(cells):
+                continue
+
+            col0 = cells[0]
+
+            # Skip header / footer rows
+            if any(k in col0 for k in self.FOOTER_KEYS):
+                continue
+
+            # Balance at Period Start
+            if 'Balance at' in ' '.join(cells):
+                if current:
+                    current['Extracted Notes'] = ' | '.join(x for x in extra_notes if x)
+                    records.append(current)
+                    current = None
+                    extra_notes = []
+                records.append({
+                    'Booking Date': None,
+                    'Reference': '',
+                    'Description': 'Balance at Period Start',
+                    'Extracted Notes': '',
+                    'Debit': '', 'Credit': '',
+                    'Balance': cells[-1]
+                })
+                continue
+
+            # Main transaction row — col0 matches date pattern
+            if self.DATE_RE.match(col0):
+                if current:
+                    current['Extracted Notes'] = ' | '.join(x for x in extra_notes if x)
+                    records.append(current)
+
+                # Col layout: 0=date 1=ref 2=acct# 3=name 4=desc 5=valdate 6=debit 7=credit 8=balance
+                debit  = cells[6] if len(cells) > 6 else ''
+                credit = cells[7] if len(cells) > 7 else ''
+                bal    = cells[8] if len(cells) > 8 else ''
+                desc   = re.sub(r'\s+', ' ', cells[4]).strip() if len(cells) > 4 else ''
+                ref    = re.sub(r'\s+', ' ', cells[1]).strip() if len(cells) > 1 else ''
+
+                current = {
+                    'Booking Date': col0,
+                    'Reference': ref,
+                    'Description': desc,
+                    'Extracted Notes': '',
+                    'Debit': debit,
+                    'Credit': credit,
+                    'Balance': bal
+                }
+                extra_notes = []
+
+            # Continuation / notes row — empty col0, notes in col4
+            elif col0 == '' and current and len(cells) > 4:
+                note = re.sub(r'\s+', ' ', cells[4]).strip()
+                skip = (
+                    not note
+                    or note == current['Description']
+                    or ': Chq No' in note
+                    or 'Debit Cheque' in note
+                    or re.match(r'^[\d,]+\.\d{2}$', note)
+                )
+                if not skip:
+                    extra_notes.append(note)
+
+        # Flush last transaction
+        if current:
+            current['Extracted Notes'] = ' | '.join(x for x in extra_notes if x)
+            records.append(current)
+
+        return records
+
 # ==========================================
-# 3. FLASK SERVER
+# 2D. ENGINE DISPATCH & PARSE CACHE
 # ==========================================
-import secrets
-app = Flask(__name__)
-app.secret_key = secrets.token_hex(32)
-app.config['MAX_CONTENT_LENGTH'] = 20 * 1024 * 1024  # 20 MB upload limit
-DB = {'df': None, 'filename': None}
+# Bump whenever a parser change alters its output so stale cache entries are ignored,
+# in the same change, and say why here:
+#   2  content-hash parse cache introduced
+#   3  booking dates parsed with each engine's formats (two-digit years use strptime's
+#      69-99 -> 19xx pivot, so 1969-1975 dates change)
+#   4  stable sort, so same-day rows keep statement order
+PARSER_VERSION = '4'
 
-@app.route('/', methods=['GET', 'POST'])
-def index():
-    # Handle the Reset functionality
-    if request.args.get('reset') == '1':
-        DB['df'] = None
-        DB['filename'] = None
-        return redirect(url_for('index'))
+ENGINE_EXTENSIONS = {'.docx': 'docx', '.pdf': 'pdf', '.csv': 'csv'}
 
-    if request.method == 'POST':
-        if 'file' not in request.files: return redirect(request.url)
-        file = request.files['file']
-        if file.filename == '': return redirect(request.url)
-        
-        if file:
-            filename_lower = file.filename.lower()
-            try:
-                # Use Docx Engine
-                if filename_lower.endswith('.docx'):
-                    file_stream = io.BytesIO(file.read())
-                    parser = DocxBankParser()
-                    df = parser.parse(file_stream)
-
-                # Use PDF Engine
-                elif filename_lower.endswith('.pdf'):
-                    file_stream = io.BytesIO(file.read())
-                    parser = PdfBankParser()
-                    df = parser.parse(file_stream)
-
-                # Use CSV Engine
-                elif filename_lower.endswith('.csv'):
-                    parser = BankParser()
-                    df = parser.parse(file.read())
+# Modules each part of the app needs; preload() imports them ahead of the first request.
+ENGINE_MODULES = {
+    'csv': (np, pd, pa),
+    'docx': (np, pd, pa, docx, etree),
+    'pdf': (np, pd, pa, pdfplumber, pdfium),
+    'dashboard': (np, pd, pa),
+    'export': (np, pd, pa, xlsxwriter),
+}
 
-                else:
-                    return render_template_string(
-                        HTML_TEMPLATE, filename=None,
-                        error="Unsupported file type. Please upload a .csv, .docx, or .pdf file."
-                    )
+def preload(*engines):
+    """
+    Import the dependencies of the named engines ('csv', 'docx', 'pdf',
+    'dashboard', 'export'; none or 'all' means everything) and return the
+    seconds it took. Call it from a gunicorn ``post_worker_init`` hook, or set
+    KAKOS_PRELOAD; under ``gunicorn --preload`` the imports then happen once in
+    the master and are shared with every forked worker.
+    """
+    names = ENGINE_MODULES if not engines or 'all' in engines else engines
+    start = time.perf_counter()
+    for name in names:
+        if name not in ENGINE_MODULES:
+            raise ValueError(f"Unknown engine to preload: {name!r}")
+        for module in ENGINE_MODULES[name]:
+            getattr(module, '__file__', None)   # any attribute access completes a lazy import
+    return time.perf_counter() - start
 
-                if df.empty:
-                    return render_template_string(
-                        HTML_TEMPLATE, filename=None,
-                        error="No transactions could be extracted from this file. "
-                              "Check that it is a valid bank statement."
-                    )
+def detect_engine(filename):
+    """Return the engine name for an upload ('docx', 'pdf', 'csv') or None if unsupported."""
+    return ENGINE_EXTENSIONS.get(os.path.splitext(filename.lower())[1])
 
-                # Ensure proper datetime conversions for all formats
-                df['Booking Date'] = pd.to_datetime(df['Booking Date'], format='mixed', errors='coerce')
-                df = df.sort_values('Booking Date', na_position='first')
+def parse_statement(engine, source, pdf_workers=1, progress=None):
+    """
+    Run the named engine over raw file bytes (or a binary stream) and normalise
+    dates and ordering. ``progress(done, total, unit)`` is called as pages or
+    rows are parsed; ``total`` is None when it is not known up front.
+    """
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    if engine == 'docx':
+        parser = DocxBankParser()
+    elif engine == 'pdf':
+        parser = PdfBankParser(workers=pdf_workers)
+    elif engine == 'csv':
+        parser = BankParser()
+    else:
+        raise ValueError(f"Unknown parser engine: {engine!r}")
+    df = parser.parse(stream, progress=progress)
 
-                DB['df'] = df
-                DB['filename'] = file.filename
-                return redirect(url_for('index'))
+    if not df.empty:
+        # Each engine's own date format first; mixed inference only for what it cannot read
+        with METRICS.stage('to_datetime', engine=engine):
+            df['Booking Date'] = parse_dates(df['Booking Date'], parser.DATE_FORMATS)
+        with METRICS.stage('sort_values', engine=engine):
+            # Stable, so same-day rows keep statement order and the running balance stays a chain
+            df = df.sort_values('Booking Date', kind='stable', na_position='first')
+    METRICS.observe('kakos_rows_per_file', len(df), engine=engine)
+    METRICS.observe('kakos_dataset_bytes', int(df.memory_usage(deep=True).sum()), engine=engine)
+    return df
 
-            except Exception as e:
-                logger.error("Upload processing error: %s", e)
-                return render_template_string(
-                    HTML_TEMPLATE, filename=None,
-                    error=f"Failed to parse file: {e}"
-                )
+class ParseCache:
+    """
+    Content-addressed on-disk cache of parsed statements.
 
-    if DB['df'] is not None:
-        df = DB['df'].copy()
-        
-        # Apply Filters
-        start = request.args.get('start_date')
-        end = request.args.get('end_date')
-        search = request.args.get('search', '').strip()
-        if start: df = df[df['Booking Date'] >= pd.to_datetime(start)]
-        if end: df = df[df['Booking Date'] <= pd.to_datetime(end)]
-        if search:
-            mask = (
-                df['Description'].str.contains(search, case=False, na=False) |
-                df['Extracted Notes'].str.contains(search, case=False, na=False)
-            )
-            df = df[mask]
-
-        # Calculate KPIs
-        kpis = {
-            'inflow': f"GH₵ {df['Credit'].sum():,.2f}",
-            'outflow': f"GH₵ {df['Debit'].sum():,.2f}",
-            'net': f"GH₵ {df['Credit'].sum() - df['Debit'].sum():,.2f}",
-            'net_raw': df['Credit'].sum() - df['Debit'].sum(),
-            'balance': f"GH₵ {df['Balance'].iloc[-1]:,.2f}" if not df.empty else "0.00"
-        }
-        
-        # Format date safely for HTML rendering, leave missing dates blank (e.g. for Starting Balances)
-        df['Booking Date'] = df['Booking Date'].dt.strftime('%d %b %Y').fillna('-')
-        
-        return render_template_string(
-            HTML_TEMPLATE, filename=DB['filename'],
-            transactions=df.to_dict('records'), kpis=kpis,
-            filters={'start': start or '', 'end': end or '', 'search': search},
-            error=None
-        )
-    
-    return render_template_string(HTML_TEMPLATE, filename=None, error=None)
+    Entries are Parquet files named by sha256(file bytes) + engine + PARSER_VERSION,
+    so re-uploading the same statement skips parsing entirely. The directory is
+    kept under ``max_bytes`` by evicting the least recently used entries (a hit
+    refreshes the file's mtime).
+    """
 
-@app.route('/export')
-def export():
-    if DB['df'] is None: return redirect(url_for('index'))
-    
-    df = DB['df'].copy()
-    start = request.args.get('start_date')
-    end = request.args.get('end_date')
-    search = request.args.get('search', '').strip()
-    if start: df = df[df['Booking Date'] >= pd.to_datetime(start)]
-    if end: df = df[df['Booking Date'] <= pd.to_datetime(end)]
-    if search:
-        mask = (
-            df['Description'].str.contains(search, case=False, na=False) |
-            df['Extracted Notes'].str.contains(search, case=False, na=False)
-        )
-        df = df[mask]
+    SUFFIX = '.parquet'
 
-    # Pre-format export string dates
-    df['Booking Date'] = df['Booking Date'].dt.strftime('%d %b %Y').fillna('-')
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
 
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        # --- Sheet 1: Transaction Data ---
-        df.to_excel(writer, index=False, sheet_name='Audit Data')
-        workbook = writer.book
-        worksheet = writer.sheets['Audit Data']
-        money_fmt = workbook.add_format({'num_format': '"GH₵" #,##0.00', 'align': 'right'})
-        header_fmt = workbook.add_format({'bold': True, 'bg_color': '#1e293b', 'font_color': '#ffffff', 'border': 1})
-        for col_num, col_name in enumerate(df.columns):
-            worksheet.write(0, col_num, col_name, header_fmt)
-        worksheet.set_column('D:F', 18, money_fmt)
-        worksheet.set_column('A:A', 15)
-        worksheet.set_column('B:C', 45)
-        worksheet.freeze_panes(1, 0)
-        worksheet.autofilter(0, 0, len(df), len(df.columns) - 1)
+    @staticmethod
+    def key(engine, source):
+        """Cache key for raw bytes or a seekable binary stream (rewound after hashing)."""
+        digest = hashlib.sha256()
+        if isinstance(source, (bytes, bytearray)):
+            digest.update(source)
+        else:
+            for block in iter(lambda: source.read(1 << 20), b''):
+                digest.update(block)
+            source.seek(0)
+        return f"{digest.hexdigest()}-{engine}-v{PARSER_VERSION}"
 
-        # --- Sheet 2: Summary ---
-        numeric_df = DB['df'].copy()
-        if start: numeric_df = numeric_df[numeric_df['Booking Date'] >= pd.to_datetime(start)]
-        if end: numeric_df = numeric_df[numeric_df['Booking Date'] <= pd.to_datetime(end)]
-        total_inflow = numeric_df['Credit'].sum()
-        total_outflow = numeric_df['Debit'].sum()
-        net = total_inflow - total_outflow
-        closing_bal = numeric_df['Balance'].iloc[-1] if not numeric_df.empty else 0
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
 
-        summary_ws = workbook.add_worksheet('Summary')
-        title_fmt = workbook.add_format({'bold': True, 'font_size': 14, 'font_color': '#059669'})
-        label_fmt = workbook.add_format({'bold': True, 'bg_color': '#f8fafc', 'border': 1})
-        value_fmt = workbook.add_format({'num_format': '"GH₵" #,##0.00', 'border': 1, 'align': 'right'})
-        summary_ws.write('A1', 'KAKOS AUDIT — SUMMARY', title_fmt)
-        summary_ws.write('A2', f'File: {DB["filename"]}')
-        summary_ws.write('A3', f'Filters: {start or "All"} to {end or "All"} | Search: "{search}"' if search else f'Filters: {start or "All"} to {end or "All"}')
-        rows = [
-            ('Total Inflow (Credits)', total_inflow),
-            ('Total Outflow (Debits)', total_outflow),
-            ('Net Movement', net),
-            ('Closing Balance', closing_bal),
-            ('Total Transactions', len(numeric_df)),
-        ]
-        for i, (label, val) in enumerate(rows):
-            r = i + 5
-            summary_ws.write(r, 0, label, label_fmt)
-            if isinstance(val, float):
-                summary_ws.write(r, 1, val, value_fmt)
+    def get(self, key):
+        path = self._path(key)
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)
+        except (OSError, ValueError) as e:
+            if os.path.exists(path):
+                logger.warning("Discarding unreadable cache entry %s: %s", path, e)
+                self._remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return df
+
+    def put(self, key, df):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not write cache entry %s: %s", path, e)
+            self._remove(tmp)
+            return
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.SUFFIX):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, os.path.join(self.directory, name)))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self):
+        """Hit and miss counts are this worker's (``worker`` is its pid); the entries are shared."""
+        entries = self._entries()
+        return {
+            'worker': os.getpid(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+        }
+
+    def parse(self, engine, source, pdf_workers=1, progress=None, key=None):
+        """Return the parsed frame for ``source`` (bytes or seekable stream), from cache when possible."""
+        key = key or self.key(engine, source)
+        df = self.get(key)
+        if df is not None:
+            return df
+        df = parse_statement(engine, source, pdf_workers=pdf_workers, progress=progress)
+        if not df.empty:
+            self.put(key, df)
+        return df
+
+# ==========================================
+# 2E. SHARED DATASET STORE
+# ==========================================
+MINOR_UNITS = 100         # pesewas per cedi: stored money is an exact count of pesewas
+DICTIONARY_RATIO = 0.5    # text columns with at most this many distinct values per row are dictionary-encoded
+
+def to_minor_units(values):
+    """GH₵ amounts as int64 pesewas, rounded to the nearest pesewa; missing amounts become 0."""
+    amounts = pd.Series(values).fillna(0.0).to_numpy(dtype='float64')
+    return np.rint(amounts * MINOR_UNITS).astype('int64')
+
+def from_minor_units(values):
+    """Pesewas back to GH₵ floats for display and export (each the double nearest the exact amount)."""
+    return values / MINOR_UNITS
+
+def compact_frame(df):
+    """
+    The stored form of a ledger: money as int64 pesewas, repetitive text
+    (narrations, notes, source file names) as categoricals over a sorted
+    dictionary, and everything else as Arrow-backed strings. Sorted categories
+    keep text sorts lexical. Already-compact columns are passed through.
+    """
+    out = {}
+    for col in df.columns:
+        values = df[col].reset_index(drop=True)
+        if col in MONEY_COLUMNS:
+            out[col] = values if pd.api.types.is_integer_dtype(values) else to_minor_units(values)
+        elif col == 'Booking Date' or isinstance(values.dtype, pd.CategoricalDtype):
+            out[col] = values
+        else:
+            text = values.astype('str')
+            out[col] = pd.Categorical(text) if text.nunique() <= DICTIONARY_RATIO * len(text) else text
+    return pd.DataFrame(out, columns=df.columns)
+
+def frame_bytes(df):
+    """Exact in-memory size of a frame's column buffers (Arrow buffers, categorical codes and categories)."""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+def heap_bytes(df, mapped):
+    """
+    The part of ``frame_bytes`` a worker holds privately: buffers that lie
+    outside the memory-mapped file ``mapped`` (copies made on conversion, such
+    as datetimes with NaT or categoricals' categories) rather than in the
+    shared page cache.
+    """
+    start, end = mapped.address, mapped.address + mapped.size
+    total = 0
+    for col in df.columns:
+        values = df[col].array
+        if isinstance(values, pd.Categorical):
+            total += int(values.categories.memory_usage(deep=True))
+            buffers = [np.asarray(values.codes)]
+        elif isinstance(values.dtype, np.dtype):
+            buffers = [np.asarray(values)]
+        else:
+            arrow = pa.array(values)
+            buffers = [buf for chunk in getattr(arrow, 'chunks', [arrow]) for buf in chunk.buffers() if buf]
+        for buf in buffers:
+            address, size = ((buf.__array_interface__['data'][0], buf.nbytes) if isinstance(buf, np.ndarray)
+                             else (buf.address, buf.size))
+            if not start <= address < end:
+                total += size
+    return total
+
+class DatasetStore:
+    """
+    On-disk store of loaded statements that every gunicorn worker can serve.
+
+    Each dataset is an Arrow IPC file plus a JSON sidecar (filename, version),
+    keyed by a random id kept in the user's session. Workers open the file
+    memory-mapped and build the frame without copying wherever Arrow allows
+    (integer money, dates without NaT, categorical codes, Arrow-backed
+    strings), so those buffers live in the shared page cache rather than in
+    each worker's heap. Loaded frames are therefore read-only: copy before
+    changing one. Datasets idle for longer than ``ttl`` seconds are removed by
+    a periodic sweep.
+
+    Frames are stored compacted (see ``compact_frame``): Debit, Credit and
+    Balance of a loaded dataset are int64 pesewas. Each worker keeps at most
+    OPEN_LIMIT datasets open and, when ``max_open_bytes`` is set, evicts the
+    least recently used ones once the heap they hold (see ``heap_bytes``)
+    exceeds it.
+    """
+
+    ID_RE = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+    TOUCH_INTERVAL = 60   # seconds between idle-clock refreshes for one dataset
+    OPEN_LIMIT = 8        # datasets kept mapped per worker
+    INGEST_STALE = 600    # seconds without progress before an ingest lock counts as abandoned
+
+    def __init__(self, directory, ttl, max_open_bytes=0):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_open_bytes = max_open_bytes
+        self.open_bytes = 0
+        self._open = OrderedDict()   # dataset_id -> (version, df, bytes)
+        self._touched = {}
+        self._last_sweep = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, dataset_id):
+        base = os.path.join(self.directory, dataset_id)
+        return base + '.arrow', base + '.json'
+
+    def fingerprint_path(self, dataset_id):
+        """Where a consolidated dataset's DuplicateIndex is saved; removed along with the dataset."""
+        return os.path.join(self.directory, dataset_id) + '.fingerprints.parquet'
+
+    def create(self, df, filename, **extra):
+        """Persist ``df`` as a new dataset and return its id. ``extra`` is stored in its metadata."""
+        dataset_id = secrets.token_urlsafe(16)
+        self.write(dataset_id, df, {'filename': filename, **extra})
+        self.expire()
+        return dataset_id
+
+    def write(self, dataset_id, df, meta):
+        """Write (or replace) a dataset's data and metadata, bumping its version."""
+        data_path, meta_path = self._paths(dataset_id)
+        df = compact_frame(df)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp = f"{data_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with pa.OSFile(tmp, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, data_path)
+        meta = {**meta, 'version': time.time_ns(), 'rows': len(df), 'bytes': frame_bytes(df)}
+        tmp = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, meta_path)
+        return meta
+
+    def claim_ingest(self, dataset_id):
+        """
+        Take the dataset's ingest lock, held by a bulk ingest for its whole run so
+        that one ingest at a time rewrites the ledger. Returns True if claimed; a
+        lock not refreshed (``hold_ingest``) within INGEST_STALE seconds is taken over.
+        """
+        lock = self._ingest_lock(dataset_id)
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock).st_mtime < self.INGEST_STALE:
+                    return False   # an ingest in this or another worker is still running
+                os.remove(lock)
+            except OSError:
+                return False
+            return self.claim_ingest(dataset_id)
+        os.close(fd)
+        return True
+
+    def hold_ingest(self, dataset_id):
+        try:
+            os.utime(self._ingest_lock(dataset_id))
+        except OSError:
+            pass
+
+    def release_ingest(self, dataset_id):
+        try:
+            os.remove(self._ingest_lock(dataset_id))
+        except OSError:
+            pass
+
+    def _ingest_lock(self, dataset_id):
+        return os.path.join(self.directory, dataset_id) + '.ingest'
+
+    def meta(self, dataset_id):
+        if not dataset_id or not self.ID_RE.match(dataset_id):
+            return None
+        try:
+            with open(self._paths(dataset_id)[1]) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, dataset_id):
+        """Return ``(df, meta)`` for a dataset, or ``(None, None)`` if it is unknown or expired."""
+        meta = self.meta(dataset_id)
+        if meta is None:
+            self._close(dataset_id)
+            return None, None
+        meta['id'] = dataset_id
+
+        cached = self._open.get(dataset_id)
+        if cached and cached[0] == meta['version']:
+            self._open.move_to_end(dataset_id)
+            df = cached[1]
+        else:
+            try:
+                mapped = pa.memory_map(self._paths(dataset_id)[0]).read_buffer()
+                # split_blocks keeps each column its own block, so numeric columns stay views of the mapping
+                df = pa.ipc.open_file(mapped).read_all().to_pandas(split_blocks=True)
+            except (OSError, pa.ArrowInvalid) as e:
+                logger.warning("Could not open dataset %s: %s", dataset_id, e)
+                return None, None
+            self._close(dataset_id)
+            nbytes = heap_bytes(df, mapped)
+            self._open[dataset_id] = (meta['version'], df, nbytes)
+            self.open_bytes += nbytes
+            # The dataset just opened stays even if it alone is over the budget
+            while len(self._open) > 1 and (len(self._open) > self.OPEN_LIMIT or
+                                           0 < self.max_open_bytes < self.open_bytes):
+                self._close(next(iter(self._open)))
+
+        self.touch(dataset_id)
+        return df, meta
+
+    def touch(self, dataset_id):
+        """Restart a dataset's idle clock (at most once per TOUCH_INTERVAL) and run the expiry sweep when due."""
+        now = time.time()
+        if now - self._touched.get(dataset_id, 0) > self.TOUCH_INTERVAL:
+            self._touched[dataset_id] = now
+            try:
+                os.utime(self._paths(dataset_id)[1])
+            except OSError:
+                pass
+        if now - self._last_sweep > self.TOUCH_INTERVAL:
+            self.expire()
+
+    def delete(self, dataset_id):
+        if not dataset_id or not self.ID_RE.match(dataset_id):
+            return
+        self._close(dataset_id)
+        self._touched.pop(dataset_id, None)
+        for path in (*self._paths(dataset_id), self.fingerprint_path(dataset_id), self._ingest_lock(dataset_id)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def expire(self):
+        """Remove datasets whose metadata has not been touched within ``ttl`` seconds."""
+        now = time.time()
+        self._last_sweep = now
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                idle = now - os.stat(os.path.join(self.directory, name)).st_mtime
+            except OSError:
+                continue
+            if idle > self.ttl:
+                self.delete(name[:-len('.json')])
+
+    def _close(self, dataset_id):
+        entry = self._open.pop(dataset_id, None)
+        if entry is not None:
+            self.open_bytes -= entry[2]
+
+    def stats(self):
+        """Memory held by this worker's open datasets and the size of the store on disk."""
+        stored = [name for name in os.listdir(self.directory) if name.endswith('.arrow')]
+        disk = 0
+        for name in stored:
+            try:
+                disk += os.stat(os.path.join(self.directory, name)).st_size
+            except OSError:
+                pass
+        return {
+            'open': len(self._open),
+            'open_rows': sum(len(entry[1]) for entry in self._open.values()),
+            'open_bytes': self.open_bytes,
+            'max_open_bytes': self.max_open_bytes,
+            'open_limit': self.OPEN_LIMIT,
+            'stored': len(stored),
+            'disk_bytes': disk,
+        }
+
+def load_secret_key(directory):
+    """Session signing key shared by all workers: KAKOS_SECRET_KEY, else a key file created once."""
+    if os.environ.get('KAKOS_SECRET_KEY'):
+        return os.environ['KAKOS_SECRET_KEY']
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'secret_key')
+    # The key is written in full to a private temp file and then linked into place, so a worker
+    # that loses the race never sees a half-written file; the first link wins
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.secret_key.')
+    try:
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(secrets.token_hex(32))
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+    finally:
+        os.remove(tmp)
+    for _ in range(50):
+        with open(path) as fh:
+            key = fh.read().strip()
+        if key:
+            return key
+        time.sleep(0.02)   # a key file from an older release may still be being written
+    raise RuntimeError(f"Session key file {path} is empty")
+
+# ==========================================
+# 2F. DATASET INDEX (DATE RANGE + TEXT SEARCH)
+# ==========================================
+class _TextColumnIndex:
+    """Trigram inverted index over the distinct values of one text column."""
+
+    # Gathering per-value row lists costs a few microseconds per matched value; past
+    # this many rows per value it is cheaper to mask the window's codes in one pass.
+    GATHER_RATIO = 32
+
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        self.codes = codes
+        self.lowered = [str(u).lower() for u in uniques]
+        # Rows of distinct value u are order[starts[u]:ends[u]], ascending
+        self.order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[self.order]
+        ids = np.arange(len(uniques))
+        self.starts = np.searchsorted(sorted_codes, ids, 'left')
+        self.ends = np.searchsorted(sorted_codes, ids, 'right')
+
+        postings = {}
+        for u, text in enumerate(self.lowered):
+            for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                postings.setdefault(gram, []).append(u)
+        self.postings = {g: np.array(v, dtype=np.int64) for g, v in postings.items()}
+
+    def candidates(self, query):
+        """Ids of distinct values that may contain ``query`` (already lower-cased), per the trigram postings."""
+        if len(query) < 3:
+            return np.arange(len(self.lowered))
+        lists = [self.postings.get(query[i:i + 3]) for i in range(len(query) - 2)]
+        if any(p is None for p in lists):
+            return np.empty(0, dtype=np.int64)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for p in lists[1:]:
+            candidates = np.intersect1d(candidates, p, assume_unique=True)
+            if not len(candidates):
+                break
+        return candidates
+
+    def rows(self, query, first, stop):
+        """Row positions in ``[first, stop)`` whose value contains ``query``, as a list of sorted arrays."""
+        candidates = self.candidates(query)
+        if not len(candidates):
+            return []
+        window = stop - first
+        if len(candidates) > window:
+            # Narrow window: verifying the values present in it is cheaper than the candidates
+            codes = self.codes[first:stop]
+            candidates = np.intersect1d(candidates, codes)
+        ids = [u for u in candidates if query in self.lowered[u]]
+        if not ids:
+            return []
+        if len(ids) * self.GATHER_RATIO >= window:
+            hit = np.zeros(len(self.lowered) + 1, dtype=bool)   # last slot catches the NaN code (-1)
+            hit[ids] = True
+            return [first + np.flatnonzero(hit[self.codes[first:stop]])]
+        out = []
+        for u in ids:
+            rows = self.order[self.starts[u]:self.ends[u]]
+            rows = rows[np.searchsorted(rows, first, 'left'):np.searchsorted(rows, stop, 'left')]
+            if len(rows):
+                out.append(rows)
+        return out
+
+class DatasetIndex:
+    """
+    Search structures built once per loaded dataset so filtered views cost
+    roughly the size of the result rather than a scan of the whole frame.
+
+    Booking dates are kept in sorted order and answered by binary search;
+    Description and Extracted Notes each get a trigram index over their
+    distinct values, with exact case-insensitive substring verification.
+    Money is summed in integer pesewas, so range totals are exact. Every
+    query can leave out rows flagged as duplicates of another statement's.
+    """
+
+    TEXT_COLUMNS = ('Description', 'Extracted Notes')
+
+    def __init__(self, df):
+        self.size = len(df)
+        dates = df['Booking Date'].to_numpy(dtype='datetime64[us]')
+        # numpy sorts NaT last; rows without a date never match a date filter
+        self.date_order = np.argsort(dates, kind='stable')
+        self.dated = int((~np.isnat(dates)).sum())
+        self.sorted_dates = dates[self.date_order[:self.dated]]
+        # True when dated rows form one contiguous, date-ordered run of positions (the stored layout)
+        dated_pos = self.date_order[:self.dated]
+        self.monotonic = self.dated == 0 or bool(
+            dated_pos[-1] - dated_pos[0] == self.dated - 1 and np.all(np.diff(dated_pos) > 0))
+        self.text = [_TextColumnIndex(df[col]) for col in self.TEXT_COLUMNS if col in df]
+
+        # Prefix sums in date order: a range total is two lookups once its bounds are known
+        credit = df['Credit'].to_numpy(dtype='int64')[self.date_order]
+        debit = df['Debit'].to_numpy(dtype='int64')[self.date_order]
+        self.cum_credit = np.concatenate(([0], np.cumsum(credit)))
+        self.cum_debit = np.concatenate(([0], np.cumsum(debit)))
+        self.balance = df['Balance'].to_numpy(dtype='int64')
+        # The same sums over rows that are not duplicates, for the de-duplicated view
+        self.duplicate = (df[DUPLICATE_COLUMN] != '').to_numpy() if DUPLICATE_COLUMN in df else np.zeros(self.size, bool)
+        kept = ~self.duplicate[self.date_order]
+        self.cum_kept = np.concatenate(([0], np.cumsum(kept)))
+        self.cum_kept_credit = np.concatenate(([0], np.cumsum(credit * kept)))
+        self.cum_kept_debit = np.concatenate(([0], np.cumsum(debit * kept)))
+        self.duplicates = {
+            'exact': int((df[DUPLICATE_COLUMN] == 'exact').sum()) if DUPLICATE_COLUMN in df else 0,
+            'near': int((df[DUPLICATE_COLUMN] == 'near').sum()) if DUPLICATE_COLUMN in df else 0,
+            'inflow': from_minor_units(int(self.cum_credit[-1] - self.cum_kept_credit[-1])),
+            'outflow': from_minor_units(int(self.cum_debit[-1] - self.cum_kept_debit[-1])),
+        }
+        # Calendar-month buckets: month_starts[i] is where month_keys[i] begins in sorted_dates
+        self.month_keys, self.month_starts = np.unique(
+            self.sorted_dates.astype('datetime64[M]'), return_index=True)
+
+    def date_range(self, start=None, end=None):
+        """Return (lo, hi) bounds into ``date_order`` for an inclusive date range."""
+        lo, hi = 0, self.size
+        if start or end:
+            hi = self.dated
+        if start:
+            lo = int(np.searchsorted(self.sorted_dates, np.datetime64(pd.to_datetime(start), 'us'), 'left'))
+        if end:
+            hi = int(np.searchsorted(self.sorted_dates, np.datetime64(pd.to_datetime(end), 'us'), 'right'))
+        return lo, max(lo, hi)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the index arrays and trigram postings."""
+        arrays = [self.date_order, self.sorted_dates, self.cum_credit, self.cum_debit, self.balance,
+                  self.duplicate, self.cum_kept, self.cum_kept_credit, self.cum_kept_debit,
+                  self.month_keys, self.month_starts]
+        for col in self.text:
+            arrays += [col.codes, col.order, col.starts, col.ends, *col.postings.values()]
+        return int(sum(a.nbytes for a in arrays))
+
+    def _sums(self, lo, hi, dedupe=False):
+        """GH₵ inflow, outflow, net and row count of date-ordered rows ``[lo, hi)``, from exact pesewa sums."""
+        cum_credit, cum_debit = (self.cum_kept_credit, self.cum_kept_debit) if dedupe else (self.cum_credit, self.cum_debit)
+        inflow = int(cum_credit[hi] - cum_credit[lo])
+        outflow = int(cum_debit[hi] - cum_debit[lo])
+        count = int(self.cum_kept[hi] - self.cum_kept[lo]) if dedupe else hi - lo
+        return from_minor_units(inflow), from_minor_units(outflow), from_minor_units(inflow - outflow), count
+
+    def totals(self, start=None, end=None, dedupe=False):
+        """Inflow, outflow, net, closing balance and row count for a date range in O(log n)."""
+        lo, hi = self.date_range(start, end)
+        inflow, outflow, net, count = self._sums(lo, hi, dedupe)
+        if lo == hi:
+            balance = None
+        elif not (start or end):
+            balance = from_minor_units(int(self.balance[-1]))
+        else:
+            # Closing balance is the last row of the range in stored order
+            last = self.date_order[hi - 1] if self.monotonic else self.date_order[lo:hi].max()
+            balance = from_minor_units(int(self.balance[last]))
+        return {'inflow': inflow, 'outflow': outflow, 'net': net, 'balance': balance, 'count': count}
+
+    def monthly(self, start=None, end=None, dedupe=False):
+        """Per-calendar-month inflow/outflow/net for the dated rows within a date range."""
+        lo, hi = self.date_range(start, end)
+        hi = min(hi, self.dated)
+        first = max(0, int(np.searchsorted(self.month_starts, lo, 'right')) - 1)
+        out = []
+        for i in range(first, len(self.month_keys)):
+            m_lo = max(lo, int(self.month_starts[i]))
+            m_hi = min(hi, int(self.month_starts[i + 1]) if i + 1 < len(self.month_starts) else self.dated)
+            if m_lo >= hi:
+                break
+            if m_lo >= m_hi:
+                continue
+            inflow, outflow, net, count = self._sums(m_lo, m_hi, dedupe)
+            out.append({'month': str(self.month_keys[i]), 'inflow': inflow, 'outflow': outflow,
+                        'net': net, 'count': count})
+        return out
+
+    def search(self, query, first=0, stop=None):
+        """Sorted row positions in ``[first, stop)`` whose Description or Extracted Notes contain ``query``."""
+        query = query.lower()
+        stop = self.size if stop is None else stop
+        parts = [rows for col in self.text for rows in col.rows(query, first, stop)]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def select(self, start=None, end=None, search='', dedupe=False):
+        """Sorted row positions matching the filters, or None when no filter applies."""
+        positions = self._select(start, end, search)
+        if not (dedupe and self.duplicates['exact'] + self.duplicates['near']):
+            return positions
+        if positions is None:
+            return np.flatnonzero(~self.duplicate)
+        return positions[~self.duplicate[positions]]
+
+    def _select(self, start, end, search):
+        if not (start or end or search):
+            return None
+        lo, hi = self.date_range(start, end)
+        if not search:
+            positions = self.date_order[lo:hi]
+            return positions if self.monotonic else np.sort(positions)
+
+        if not (start or end):
+            return self.search(search)
+        if lo == hi:
+            return np.empty(0, dtype=np.int64)
+        if self.monotonic:
+            # Dated rows in range form one contiguous block of positions
+            return self.search(search, self.date_order[lo], self.date_order[hi - 1] + 1)
+        return np.intersect1d(self.search(search), self.date_order[lo:hi], assume_unique=True)
+
+# ==========================================
+# 2G. EXPORT WRITERS
+# ==========================================
+EXPORT_CHUNK_ROWS = 10_000
+EXPORT_FORMATS = {
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('csv', 'text/csv'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+def _export_chunks(view):
+    """Yield display-ready slices of ``view`` (formatted dates, GH₵ amounts, blanks for missing text)."""
+    for i in range(0, len(view), EXPORT_CHUNK_ROWS):
+        chunk = view.iloc[i:i + EXPORT_CHUNK_ROWS].copy()
+        chunk['Booking Date'] = chunk['Booking Date'].dt.strftime('%d %b %Y').fillna('-')
+        for col in chunk.columns:
+            if col in MONEY_COLUMNS:
+                chunk[col] = from_minor_units(chunk[col])
+            elif col != 'Booking Date':
+                chunk[col] = chunk[col].astype('str').fillna('')
+        yield chunk
+
+RECONCILE_MONEY_COLUMNS = ('Previous Balance', 'Debit', 'Credit', 'Expected Balance', 'Balance', 'Difference')
+
+# Summary-sheet tables: (Rollups.view key, record label field, title, label header)
+ROLLUP_SECTIONS = (('monthly', 'month', 'MONTHLY CASH FLOW', 'Month'),
+                   ('weekly', 'week', 'WEEKLY CASH FLOW', 'Week From'),
+                   ('counterparties', 'counterparty', 'TOP COUNTERPARTIES', 'Counterparty'))
+
+def write_xlsx_export(path, view, filename, filters, totals, reconciliation=None, rollups=None):
+    """
+    Write the audit workbook straight to ``path`` with xlsxwriter's constant-memory
+    mode: rows are streamed out in chunks, so only one chunk is held at a time.
+    ``reconciliation`` (the ``reconcile`` result for the whole dataset) adds a
+    sheet listing every running-balance break; ``rollups`` (a ``Rollups.view``)
+    adds monthly, weekly and counterparty tables to the Summary sheet.
+    """
+    start, end, search = filters['start'], filters['end'], filters['search']
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    try:
+        # --- Sheet 1: Transaction Data ---
+        worksheet = workbook.add_worksheet('Audit Data')
+        money_fmt = workbook.add_format({'num_format': '"GH₵" #,##0.00', 'align': 'right'})
+        header_fmt = workbook.add_format({'bold': True, 'bg_color': '#1e293b', 'font_color': '#ffffff', 'border': 1})
+        columns = list(view.columns)
+        for col_num, col_name in enumerate(columns):
+            if col_name in MONEY_COLUMNS:
+                worksheet.set_column(col_num, col_num, 18, money_fmt)
+            elif col_name == 'Booking Date':
+                worksheet.set_column(col_num, col_num, 15)
             else:
-                summary_ws.write(r, 1, val, workbook.add_format({'border': 1, 'align': 'right'}))
+                worksheet.set_column(col_num, col_num, 45)
+            worksheet.write(0, col_num, col_name, header_fmt)
+        worksheet.freeze_panes(1, 0)
+        worksheet.autofilter(0, 0, len(view), len(columns) - 1)
+
+        row = 1
+        for chunk in _export_chunks(view):
+            values = [chunk[c].astype(object).where(chunk[c].notna(), None) if c in MONEY_COLUMNS else chunk[c]
+                      for c in columns]
+            for record in zip(*values):
+                worksheet.write_row(row, 0, record)
+                row += 1
+
+        # --- Sheet 2: Summary ---
+        closing_bal = totals['balance'] if totals['balance'] is not None else 0
+        summary_ws = workbook.add_worksheet('Summary')
+        title_fmt = workbook.add_format({'bold': True, 'font_size': 14, 'font_color': '#059669'})
+        label_fmt = workbook.add_format({'bold': True, 'bg_color': '#f8fafc', 'border': 1})
+        value_fmt = workbook.add_format({'num_format': '"GH₵" #,##0.00', 'border': 1, 'align': 'right'})
+        count_fmt = workbook.add_format({'border': 1, 'align': 'right'})
         summary_ws.set_column('A:A', 30)
         summary_ws.set_column('B:B', 20)
+        summary_ws.write('A1', 'KAKOS AUDIT — SUMMARY', title_fmt)
+        summary_ws.write('A2', f'File: {filename}')
+        summary_ws.write('A3', f'Filters: {start or "All"} to {end or "All"} | Search: "{search}"' if search else f'Filters: {start or "All"} to {end or "All"}')
+        if filters.get('dedupe'):
+            summary_ws.write('A4', 'Rows flagged as duplicates of another statement are excluded.')
+        rows = [
+            ('Total Inflow (Credits)', totals['inflow']),
+            ('Total Outflow (Debits)', totals['outflow']),
+            ('Net Movement', totals['net']),
+            ('Closing Balance', closing_bal),
+            ('Total Transactions', totals['count']),
+        ]
+        if DUPLICATE_COLUMN in view:
+            rows.append(('Duplicate Rows Listed', int((view[DUPLICATE_COLUMN] != '').sum())))
+        for i, (label, val) in enumerate(rows):
+            r = i + 5
+            summary_ws.write(r, 0, label, label_fmt)
+            summary_ws.write(r, 1, val, value_fmt if isinstance(val, float) else count_fmt)
+
+        if rollups is not None:
+            summary_ws.set_column('C:E', 20)
+            r += 2
+            for key, field, title, label in ROLLUP_SECTIONS:
+                summary_ws.write(r, 0, title, title_fmt)
+                summary_ws.write_row(r + 1, 0, [label, 'Inflow', 'Outflow', 'Net', 'Transactions'], header_fmt)
+                r += 2
+                for record in rollups[key]:
+                    summary_ws.write(r, 0, record[field], label_fmt)
+                    for col, money in enumerate(('inflow', 'outflow', 'net'), start=1):
+                        summary_ws.write(r, col, record[money], value_fmt)
+                    summary_ws.write(r, 4, record['count'], count_fmt)
+                    r += 1
+                r += 1
+
+        # --- Sheet 3: Reconciliation ---
+        if reconciliation is not None:
+            summary, breaks = reconciliation
+            recon_ws = workbook.add_worksheet('Reconciliation')
+            recon_ws.write('A1', 'RUNNING BALANCE RECONCILIATION', title_fmt)
+            recon_ws.write('A2', f"Whole statement, unfiltered: {summary['checked']:,} rows checked across "
+                                 f"{summary['statements']} statement(s), {summary['breaks']:,} break(s). "
+                                 f"Missing transactions net to GH₵ {summary['unexplained']:,.2f}.")
+            records = reconciliation_records(breaks)
+            columns = ['Row', 'Booking Date', 'Since', 'Description'] + (
+                [SOURCE_COLUMN] if SOURCE_COLUMN in breaks else []) + list(RECONCILE_MONEY_COLUMNS) + ['Label']
+            for col_num, col_name in enumerate(columns):
+                if col_name in RECONCILE_MONEY_COLUMNS:
+                    recon_ws.set_column(col_num, col_num, 18, money_fmt)
+                elif col_name in ('Description', 'Label', SOURCE_COLUMN):
+                    recon_ws.set_column(col_num, col_num, 36)
+                else:
+                    recon_ws.set_column(col_num, col_num, 12)
+                recon_ws.write(3, col_num, 'Issue' if col_name == 'Label' else col_name, header_fmt)
+            for r, record in enumerate(records, start=4):
+                recon_ws.write_row(r, 0, [record[c] for c in columns])
+    finally:
+        workbook.close()
+
+def iter_csv_export(view):
+    """Yield the filtered view as CSV text, one chunk at a time, for a streamed response."""
+    yield view.iloc[:0].to_csv(index=False)
+    for chunk in _export_chunks(view):
+        yield chunk.to_csv(index=False, header=False)
+
+def write_parquet_export(path, view):
+    """Write the filtered view with native types (timestamps, GH₵ floats) for downstream analytics."""
+    view.assign(**{col: from_minor_units(view[col]) for col in MONEY_COLUMNS if col in view}).to_parquet(path, index=False)
+
+# ==========================================
+# 2H. BULK INGESTION
+# ==========================================
+SOURCE_COLUMN = 'Source File'
+
+def expand_uploads(uploads, max_files, max_bytes, spool_dir, max_item_bytes=None):
+    """
+    Flatten ``(filename, stream)`` uploads into ``(filename, engine, path)`` items,
+    each spooled to its own file in ``spool_dir`` (see ``spool_file``); .zip
+    archives are unpacked member by member, never whole into memory. Returns
+    ``(items, skipped_names)``; the caller removes the item paths when done.
+    Raises ValueError, leaving nothing spooled, when the batch exceeds
+    ``max_files``, unpacks to more than ``max_bytes``, or holds a statement
+    bigger than ``max_item_bytes`` (a single upload's limit).
+    """
+    items, skipped, total = [], [], 0
+
+    def check_size(name, size):
+        nonlocal total
+        total += size
+        if max_item_bytes is not None and size > max_item_bytes:
+            raise ValueError(f"{name} is larger than the {max_item_bytes // (1024 * 1024)} MB limit per statement.")
+        if total > max_bytes:
+            raise ValueError("The uploaded statements are too large to process in one batch.")
+
+    try:
+        for name, stream in uploads:
+            if not name.lower().endswith('.zip'):
+                engine = detect_engine(name)
+                if engine is None:
+                    skipped.append(name)
+                    continue
+                check_size(name, stream.seek(0, io.SEEK_END))
+                items.append((name, engine, spool_file(stream, spool_dir)))
+                continue
+            try:
+                with zipfile.ZipFile(stream) as archive:
+                    for info in archive.infolist():
+                        member = os.path.basename(info.filename)
+                        if info.is_dir() or not member or info.filename.startswith('__MACOSX'):
+                            continue
+                        engine = detect_engine(member)
+                        if engine is None:
+                            skipped.append(member)
+                            continue
+                        check_size(member, info.file_size)
+                        if len(items) >= max_files:
+                            raise ValueError(f"Too many statements in one batch (maximum {max_files}).")
+                        with archive.open(info) as member_stream:
+                            items.append((member, engine, spool_file(member_stream, spool_dir)))
+            except zipfile.BadZipFile:
+                skipped.append(name)
+        if len(items) > max_files:
+            raise ValueError(f"Too many statements in one batch (maximum {max_files}).")
+    except Exception:
+        remove_spooled(path for _, _, path in items)
+        raise
+    return items, skipped
+
+def empty_ledger():
+    """A zero-row consolidated ledger with the column types the dashboard expects."""
+    df = EMPTY_DF().astype({'Booking Date': 'datetime64[us]', 'Description': 'str', 'Extracted Notes': 'str',
+                            'Debit': 'float64', 'Credit': 'float64', 'Balance': 'float64'})
+    df[SOURCE_COLUMN] = pd.Series(dtype='str')
+    return df
+
+def consolidate(frames, base=None):
+    """
+    Merge ``(source_name, df)`` pairs into one date-sorted ledger with a Source
+    File column, after the rows of ``base`` (a ledger that already has one).
+    Parts are compacted first, so money stays exact pesewas throughout.
+    """
+    parts = [] if base is None else [compact_frame(base)]
+    parts += [compact_frame(df).assign(**{SOURCE_COLUMN: name}) for name, df in frames]
+    if not parts:
+        return empty_ledger()
+    ledger = pd.concat(parts, ignore_index=True)
+    for col in ledger.columns:
+        if col not in MONEY_COLUMNS and col != 'Booking Date':
+            ledger[col] = ledger[col].astype('str').fillna('')
+    return ledger.sort_values('Booking Date', kind='stable', na_position='first', ignore_index=True)
+
+def _parse_bulk_item(engine, path):
+    """Process-pool entry point: parse one statement file, read in place, through the shared parse cache."""
+    with open(path, 'rb') as stream:
+        return PARSE_CACHE.parse(engine, stream)
+
+def run_bulk_ingest(store, dataset_id, items, workers, base=None):
+    """
+    Parse ``items`` on a process pool and rewrite the dataset each time a file
+    finishes, so the dashboard shows the first statements while the rest are
+    still parsing. Stops early if the dataset is reset or expires meanwhile.
+    The items' spooled files are removed once their statements are parsed.
+
+    With ``base`` (the dataset's current ledger, with a Source File column) the
+    statements are appended to it. Each statement is checked for duplicates
+    against everything before it through the dataset's saved DuplicateIndex.
+
+    The caller must hold the dataset's ingest lock (``claim_ingest``); it is
+    released when the ingest ends.
+    """
+    index = DuplicateIndex()
+    if base is not None:
+        index = DuplicateIndex.load(store.fingerprint_path(dataset_id))
+        if index is None or DUPLICATE_COLUMN not in base:
+            index, kind, of = DuplicateIndex.build(base)
+            base = base.assign(**{DUPLICATE_COLUMN: kind, DUPLICATE_OF_COLUMN: of})
+    pool = get_process_pool('bulk', workers)
+    futures = {pool.submit(_metered, 'bulk', _parse_bulk_item, engine, path): (i, name)
+               for i, (name, engine, path) in enumerate(items)}
+    parsed, failed = {}, []
+    try:
+        for future in as_completed(futures):
+            i, name = futures[future]
+            try:
+                df, metrics = future.result()
+                METRICS.merge(metrics)
+            except Exception as e:
+                logger.error("Bulk parse failed for %s: %s", name, e)
+                df = None
+            remove_spooled([items[i][2]])
+            if df is None or df.empty:
+                failed.append(name)
+            else:
+                parsed[i] = (name, df)
+
+            meta = store.meta(dataset_id)
+            if meta is None:
+                for pending in futures:
+                    pending.cancel()
+                return
+            meta['progress'] = {**meta.get('progress', {}), 'done': len(parsed) + len(failed), 'failed': failed}
+            # Keep upload order for rows sharing a date (and for which copy of a duplicate
+            # is kept), whatever order the files finish in
+            ledger_index = index.copy()
+            frames = flag_duplicates([parsed[k] for k in sorted(parsed)], ledger_index)
+            store.write(dataset_id, consolidate(frames, base), meta)
+            ledger_index.save(store.fingerprint_path(dataset_id))
+            store.hold_ingest(dataset_id)
+    finally:
+        # Cancelled or unfinished items: a running parse still holds its file open, so unlinking is safe
+        remove_spooled(path for _, _, path in items)
+        store.release_ingest(dataset_id)
+
+# ==========================================
+# 2I. BACKGROUND PARSE JOBS
+# ==========================================
+class JobBoard:
+    """
+    File-backed state for background parse jobs, visible to every worker.
+
+    A job's id is its parse-cache key, so uploads of the same content while a
+    job is queued or running are merged into it instead of parsing twice. The
+    job itself runs on a process pool and writes its own progress here; the
+    parsed frame lands in the parse cache, from which each waiting session
+    gets its own dataset.
+    """
+
+    ACTIVE = ('queued', 'running')
+    ID_RE = re.compile(r'^[0-9a-f]{64}-[a-z]+-v\w+$')
+
+    def __init__(self, directory, stale_after=600):
+        self.directory = directory
+        self.stale_after = stale_after   # seconds without an update before a job counts as dead
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, job_id + '.json')
+
+    def get(self, job_id):
+        if not self.ID_RE.match(job_id or ''):
+            return None
+        try:
+            with open(self._path(job_id)) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def update(self, job_id, **fields):
+        state = {**(self.get(job_id) or {}), **fields, 'updated': time.time()}
+        tmp = f"{self._path(job_id)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump(state, fh)
+        os.replace(tmp, self._path(job_id))
+        return state
+
+    def status(self, job_id):
+        """
+        ``get``, or a queued placeholder while another worker holds the claim but
+        has not written the state file yet. None for unknown jobs.
+        """
+        state = self.get(job_id)
+        if state is None and self.ID_RE.match(job_id or '') and os.path.exists(self._path(job_id) + '.lock'):
+            state = {'state': 'queued', 'progress': None, 'error': None, 'updated': time.time()}
+        return state
+
+    def is_active(self, state):
+        return bool(state) and state.get('state') in self.ACTIVE and time.time() - state['updated'] < self.stale_after
+
+    def claim(self, job_id, filename):
+        """Register a new job unless one for the same content is already in flight. Returns True if claimed."""
+        if self.is_active(self.get(job_id)):
+            return False
+        lock = self._path(job_id) + '.lock'
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock).st_mtime < self.stale_after:
+                    return False   # another worker is claiming or running it
+                os.remove(lock)
+            except OSError:
+                return False
+            return self.claim(job_id, filename)
+        os.close(fd)
+        self.update(job_id, state='queued', filename=filename, progress=None, error=None, created=time.time())
+        return True
+
+    def release(self, job_id):
+        try:
+            os.remove(self._path(job_id) + '.lock')
+        except OSError:
+            pass
+
+    def expire(self, max_age):
+        """Remove state, lock and temp files untouched for ``max_age`` seconds (never less than ``stale_after``)."""
+        cutoff = time.time() - max(max_age, self.stale_after)
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+def _run_parse_job(job_dir, job_id, engine, path, pdf_workers):
+    """
+    Process-pool entry point: parse one spooled upload, read in place, into the
+    parse cache, reporting progress to the job board. Removes the spooled file.
+    """
+    board = JobBoard(job_dir)
+    last = [0.0]
+
+    def report(done, total, unit):
+        now = time.time()
+        if now - last[0] >= 0.5 or done == total:
+            last[0] = now
+            board.update(job_id, progress={'done': done, 'total': total, 'unit': unit})
+
+    board.update(job_id, state='running')
+    try:
+        with open(path, 'rb') as stream:
+            df = PARSE_CACHE.parse(engine, stream, pdf_workers=pdf_workers, progress=report, key=job_id)
+        if df.empty:
+            board.update(job_id, state='failed', error="No transactions could be extracted from this file. "
+                                                       "Check that it is a valid bank statement.")
+        else:
+            board.update(job_id, state='done', rows=len(df))
+    except Exception as e:
+        logger.error("Background parse failed for %s: %s", job_id, e)
+        board.update(job_id, state='failed', error=f"Failed to parse file: {e}")
+    finally:
+        remove_spooled([path])
+        board.release(job_id)
+
+# ==========================================
+# 2J. BALANCE RECONCILIATION
+# ==========================================
+RECONCILE_PREVIEW = 20   # breaks listed on the dashboard; the export sheet lists them all
+RECONCILE_ISSUES = {
+    'missing': 'Missing transactions or page',
+    'misread': 'Balance mis-read on this row',
+    'swapped': 'Debit and Credit swapped',
+}
+
+def reconcile(df):
+    """
+    Check every row's running balance against the row before it, exactly in
+    pesewas: ``Balance[i] == Balance[i-1] + Credit[i] - Debit[i]``.
+
+    Works on a stored (compact) frame in stored order; a consolidated ledger is
+    checked per Source File, since each statement carries its own chain. Rows
+    sharing a date keep the order the bank printed them in, which for some
+    banks is newest first: a statement whose same-day rows chain better
+    backwards than forwards has each day's rows checked in reverse.
+    Returns ``(summary, breaks)`` where ``breaks`` has one row per
+    discontinuity, classified as:
+
+    * ``missing``: the offset persists, so rows between this one and the
+      previous (a dropped row or a whole page) net to ``Difference``;
+    * ``misread``: the next row restores the chain, so this row's Balance was
+      read wrongly (the restoring row is not reported separately);
+    * ``swapped``: the difference is twice the row's movement, reversed.
+    """
+    balance = df['Balance'].to_numpy(dtype='int64')
+    movement = df['Credit'].to_numpy(dtype='int64') - df['Debit'].to_numpy(dtype='int64')
+    if SOURCE_COLUMN in df:
+        source = df[SOURCE_COLUMN]
+        codes = source.cat.codes.to_numpy() if isinstance(source.dtype, pd.CategoricalDtype) else pd.factorize(source)[0]
+        codes = codes.astype('int64') + 1   # the missing-value code -1 becomes a statement of its own
+        # Rows of each statement together, each in stored order
+        order = np.argsort(codes, kind='stable')
+        statements = len(np.unique(codes))
+    else:
+        codes = np.zeros(len(df), dtype='int64')
+        order = np.arange(len(df))
+        statements = 1 if len(df) else 0
+    balance, movement, codes = balance[order], movement[order], codes[order]
+    same = codes[1:] == codes[:-1]
+
+    # Same-day pairs that chain forwards (this row follows the one above) or
+    # backwards (the row above follows this one), counted per statement
+    dates = df['Booking Date'].to_numpy()[order]
+    same_day = same & (dates[1:] == dates[:-1])
+    forwards = same_day & (balance[1:] == balance[:-1] + movement[1:])
+    backwards = same_day & (balance[:-1] == balance[1:] + movement[:-1])
+    newest_first = (np.bincount(codes[1:][backwards], minlength=codes.max(initial=0) + 1) >
+                    np.bincount(codes[1:][forwards], minlength=codes.max(initial=0) + 1))
+    if newest_first.any():
+        run = np.concatenate([[0], np.cumsum(~same_day)])   # one id per day of one statement
+        position = np.arange(len(order))
+        flip = np.lexsort((np.where(newest_first[codes], -position, position), run))
+        order, balance, movement = order[flip], balance[flip], movement[flip]
+
+    # Balance less cumulative movement is constant along an intact chain, so
+    # each change between consecutive rows of one statement is a break.
+    drift = balance - np.cumsum(movement)
+    step = np.diff(drift)
+    broken = np.flatnonzero((step != 0) & same) + 1
+    diff = step[broken - 1]
+
+    swapped = (movement[broken] != 0) & (diff == -2 * movement[broken])
+    has_next = broken + 1 < len(balance)
+    nxt = np.minimum(broken, len(step) - 1)
+    misread = ~swapped & has_next & same[nxt] & (step[nxt] == -diff)
+    # A row that restores the chain after a misread is not a break of its own
+    restoring = np.zeros(len(balance) + 1, dtype=bool)
+    restoring[broken[misread] + 1] = True
+    keep = ~restoring[broken]
+    broken, diff, swapped, misread = broken[keep], diff[keep], swapped[keep], misread[keep]
+
+    rows = order[broken]
+    prev_rows = order[broken - 1]
+    issue = np.where(swapped, 'swapped', np.where(misread, 'misread', 'missing'))
+    picked = df.iloc[rows]
+    breaks = pd.DataFrame({
+        'Row': rows + 1,
+        'Booking Date': picked['Booking Date'].to_numpy(),
+        'Since': df['Booking Date'].to_numpy()[prev_rows],
+        'Description': picked['Description'].to_numpy() if 'Description' in df else '',
+        'Previous Balance': from_minor_units(balance[broken - 1]),
+        'Debit': from_minor_units(picked['Debit'].to_numpy(dtype='int64')),
+        'Credit': from_minor_units(picked['Credit'].to_numpy(dtype='int64')),
+        'Expected Balance': from_minor_units(balance[broken - 1] + movement[broken]),
+        'Balance': from_minor_units(balance[broken]),
+        'Difference': from_minor_units(diff),
+        'Issue': issue,
+    })
+    if SOURCE_COLUMN in df:
+        breaks[SOURCE_COLUMN] = picked[SOURCE_COLUMN].to_numpy()
+    summary = {
+        'rows': len(df),
+        'statements': statements,
+        'checked': int(same.sum()),
+        'breaks': len(breaks),
+        'missing': int((issue == 'missing').sum()),
+        'misread': int(misread.sum()),
+        'swapped': int(swapped.sum()),
+        'unexplained': from_minor_units(int(diff[issue == 'missing'].sum())),
+    }
+    return summary, breaks
+
+def reconciliation_records(breaks):
+    """Display records for (a slice of) the breaks frame, with formatted dates and issue labels."""
+    out = breaks.copy()
+    for col in ('Booking Date', 'Since'):
+        out[col] = pd.to_datetime(out[col]).dt.strftime('%d %b %Y').fillna('-')
+    out['Description'] = out['Description'].astype('str').fillna('')
+    if SOURCE_COLUMN in out:
+        out[SOURCE_COLUMN] = out[SOURCE_COLUMN].astype('str').fillna('')
+    out['Label'] = out['Issue'].map(RECONCILE_ISSUES)
+    return out.to_dict('records')
+
+# ==========================================
+# 2K. DUPLICATE DETECTION
+# ==========================================
+DUPLICATE_COLUMN = 'Duplicate'          # '', 'exact' or 'near'
+DUPLICATE_OF_COLUMN = 'Duplicate Of'    # Source File of the copy that is kept
+NEAR_DUPLICATE_OVERLAP = 0.5   # share of the shorter token set two near duplicates must have in common
+NEAR_BUCKET_PAIRS = 64         # past this many candidate pairs per day and amount, pair by occurrence only
+_TOKEN_RE = re.compile(r'[A-Z0-9]+')
+
+def _token_key(text):
+    """Sorted distinct upper-case alphanumeric tokens of ``text``, space-joined."""
+    return ' '.join(sorted(set(_TOKEN_RE.findall(str(text).upper()))))
+
+def _token_column(df, col):
+    """``_token_key`` of every row of a text column, computed once per distinct value."""
+    if col not in df:
+        return np.full(len(df), '', dtype=object)
+    codes, uniques = pd.factorize(df[col])
+    keys = np.array([_token_key(u) for u in uniques] + [''], dtype=object)
+    return keys[codes]   # the missing-value code -1 picks the trailing ''
+
+def fingerprint_rows(df):
+    """
+    Duplicate-detection keys for the rows of a compact frame that move money
+    on a known date (opening-balance and undated rows are never duplicates).
+
+    ``exact`` hashes the booking day, signed amount in pesewas, reference and
+    description tokens; ``near`` hashes the day and amount only, and groups the
+    candidates that ``_near_match`` then verifies.
+    """
+    dates = df['Booking Date'].to_numpy(dtype='datetime64[D]')
+    amount = df['Credit'].to_numpy(dtype='int64') - df['Debit'].to_numpy(dtype='int64')
+    pos = np.flatnonzero(~np.isnat(dates) & (amount != 0))
+    keys = pd.DataFrame({'day': dates[pos].astype('int64'), 'amount': amount[pos]})
+    tokens = _token_column(df, 'Description')[pos]
+    reference = _token_column(df, 'Reference')[pos]
+    return pd.DataFrame({
+        'pos': pos,
+        'exact': pd.util.hash_pandas_object(keys.assign(reference=reference, tokens=tokens), index=False).to_numpy(),
+        'near': pd.util.hash_pandas_object(keys, index=False).to_numpy(),
+        'tokens': tokens,
+        'reference': reference,
+        'balance': df['Balance'].to_numpy(dtype='int64')[pos],
+    })
+
+def _token_overlap(tokens, reference, kept_tokens, kept_reference):
+    a = set(tokens.split()) | set(reference.split())
+    b = set(kept_tokens.split()) | set(kept_reference.split())
+    return bool(a and b) and len(a & b) >= NEAR_DUPLICATE_OVERLAP * min(len(a), len(b))
+
+def _near_matches(pairs):
+    """
+    For candidate pairs with the same day and amount, whether each is the same
+    transaction written differently: references agree when both rows have one,
+    otherwise the running balances agree or the description tokens overlap.
+    """
+    reference = pairs['reference'].to_numpy(dtype=object)
+    kept_reference = pairs['reference_kept'].to_numpy(dtype=object)
+    both = (reference != '') & (kept_reference != '')
+    same = np.where(both, reference == kept_reference,
+                    pairs['balance'].to_numpy() == pairs['balance_kept'].to_numpy())
+    for i in np.flatnonzero(~both & ~same):
+        same[i] = _token_overlap(pairs['tokens'].iat[i], reference[i], pairs['tokens_kept'].iat[i], kept_reference[i])
+    return same
+
+class DuplicateIndex:
+    """
+    Hash index of the fingerprints of every row kept in a consolidated ledger.
+
+    Statements are added one at a time and checked only against the ones added
+    before them, by hash joins on the fingerprints, so the cost is linear in
+    rows rather than pairwise. Identical transactions are matched one to one:
+    the k-th copy of a fingerprint in a statement pairs with the k-th kept copy.
+    The index is saved next to its dataset, so later uploads appended to the
+    ledger are checked without fingerprinting it again.
+    """
+
+    COLUMNS = {'exact': 'uint64', 'near': 'uint64', 'tokens': 'str', 'reference': 'str',
+               'balance': 'int64', 'source': 'str'}
+
+    def __init__(self, kept=None):
+        self.kept = kept if kept is not None else pd.DataFrame(
+            {col: pd.Series(dtype=dtype) for col, dtype in self.COLUMNS.items()})
+
+    @classmethod
+    def load(cls, path):
+        """The index saved at ``path``, or None if there is none."""
+        try:
+            return cls(pd.read_parquet(path))
+        except (OSError, ValueError):
+            return None
+
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.kept.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def build(cls, ledger):
+        """Index an existing ledger source by source; returns ``(index, kind, of)`` flags for its rows."""
+        index = cls()
+        kind = np.full(len(ledger), '', dtype=object)
+        of = kind.copy()
+        if len(ledger):
+            codes, sources = pd.factorize(ledger[SOURCE_COLUMN])
+            for i, source in enumerate(sources):
+                rows = np.flatnonzero(codes == i)
+                kind[rows], of[rows] = index.add(source, ledger.iloc[rows])
+        return index, kind, of
+
+    def copy(self):
+        return DuplicateIndex(self.kept.copy())
+
+    def add(self, source, df):
+        """
+        Flag the rows of one statement (a compact frame) that repeat rows already
+        in the index, then add the rest under ``source``. Returns ``(kind, of)``
+        arrays aligned with ``df``: '', 'exact' or 'near', and the kept copy's source.
+        """
+        kind = np.full(len(df), '', dtype=object)
+        of = kind.copy()
+        rows = fingerprint_rows(df)
+        matched = np.zeros(len(df), dtype=bool)
+        if len(self.kept) and len(rows):
+            rows['occ'] = rows.groupby('exact').cumcount()
+            kept = self.kept.assign(occ=self.kept.groupby('exact').cumcount(), kept_row=np.arange(len(self.kept)))
+            hits = rows.merge(kept[['exact', 'occ', 'source', 'kept_row']], on=['exact', 'occ'])
+            kind[hits['pos']], of[hits['pos']] = 'exact', hits['source'].to_numpy()
+            matched[hits['pos']] = True
+            used = np.zeros(len(kept), dtype=bool)
+            used[hits['kept_row']] = True
+
+            # Same day and amount but written differently: pair the k-th candidates of
+            # each bucket first, then try every pair within the buckets still small enough
+            for by in (['near', 'near_occ'], ['near']):
+                rest, avail = rows[~matched[rows['pos']]], kept[~used]
+                if not len(rest) or not len(avail):
+                    break
+                rest = rest.assign(near_occ=rest.groupby('near').cumcount())
+                avail = avail.assign(near_occ=avail.groupby('near').cumcount())
+                if by == ['near']:
+                    sizes = rest['near'].value_counts().mul(avail['near'].value_counts(), fill_value=0)
+                    rest = rest[rest['near'].isin(sizes.index[sizes <= NEAR_BUCKET_PAIRS])]
+                pairs = rest.merge(avail, on=by, suffixes=('', '_kept'))
+                pairs = pairs[_near_matches(pairs)] if len(pairs) else pairs
+                for pos, kept_row, source in zip(pairs['pos'], pairs['kept_row'], pairs['source']):
+                    if not (matched[pos] or used[kept_row]):
+                        kind[pos], of[pos] = 'near', source
+                        matched[pos] = used[kept_row] = True
+        new = rows[~matched[rows['pos']]][['exact', 'near', 'tokens', 'reference', 'balance']].assign(source=source)
+        self.kept = pd.concat([self.kept, new.astype(self.COLUMNS)], ignore_index=True)
+        return kind, of
+
+def flag_duplicates(frames, index):
+    """
+    Run ``(source, df)`` statements through ``index`` in order and return them
+    compacted, with the Duplicate and Duplicate Of columns set.
+    """
+    flagged = []
+    for name, df in frames:
+        df = compact_frame(df)
+        kind, of = index.add(name, df)
+        flagged.append((name, df.assign(**{SOURCE_COLUMN: name, DUPLICATE_COLUMN: kind, DUPLICATE_OF_COLUMN: of})))
+    return flagged
+
+# ==========================================
+# 2L. RESPONSE CACHE
+# ==========================================
+GZIP_MIN_BYTES = 1024   # smaller bodies are sent as they are
+GZIP_MIMETYPES = ('text/html', 'application/json', 'text/plain')
+
+class ResponseCache:
+    """
+    Per-worker LRU of rendered GET responses, bounded by ``max_bytes`` of
+    stored bodies. Keys carry the dataset version, so an entry can never be
+    served for data that has since changed; superseded versions simply age out.
+    Each entry keeps the body and, for large text bodies, its gzip encoding,
+    so a cached page is compressed once rather than per request.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # key -> entry dict
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def entry(body, mimetype, etag, last_modified):
+        compressed = None
+        if len(body) >= GZIP_MIN_BYTES and mimetype in GZIP_MIMETYPES:
+            compressed = gzip.compress(body, compresslevel=6)
+        return {'body': body, 'gzip': compressed, 'mimetype': mimetype,
+                'etag': etag, 'last_modified': last_modified,
+                'size': len(body) + len(compressed or b'')}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        if entry['size'] > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old['size']
+            self._entries[key] = entry
+            self.bytes += entry['size']
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted['size']
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries),
+                'bytes': self.bytes, 'max_bytes': self.max_bytes}
+
+# ==========================================
+# 2M. LEDGER STORE (COMMITTED HISTORY)
+# ==========================================
+ACCOUNT_COLUMN = 'Account'
+LEDGER_CONTENT = ('Booking Date', 'Description', 'Extracted Notes', 'Debit', 'Credit', 'Balance')
+LEDGER_COLUMNS = list(LEDGER_CONTENT) + [ACCOUNT_COLUMN, SOURCE_COLUMN, DUPLICATE_COLUMN, DUPLICATE_OF_COLUMN]
+LEDGER_SORT = {'date': 't.booking_date', 'description': 't.description',
+               'debit': 't.debit', 'credit': 't.credit', 'balance': 't.balance'}
+LEDGER_ORDER = 't.booking_date, t.statement_id, t.seq'   # stored order: by date, then statement, then row
+LEDGER_NO_FILTERS = {'start': '', 'end': '', 'search': '', 'dedupe': '', 'account': '', 'min_amount': '', 'max_amount': ''}
+
+class LedgerStore:
+    """
+    Optional embedded SQLite ledger that parsed statements are committed to,
+    so years of history can be filtered, totalled and exported without
+    parsing any file again.
+
+    Each committed statement is a ``statements`` row (account, source file,
+    content digest) and its transactions are ``transactions`` rows with money
+    in integer pesewas, indexed on account and booking date, on date alone
+    and on the absolute amount. Committing the same statement to the same
+    account twice is a no-op. A transaction that exactly repeats one already
+    kept for the account from an earlier statement is flagged as a duplicate,
+    matched one to one as in DuplicateIndex. Text search matches a lower-cased
+    copy of Description and Extracted Notes, as DatasetIndex does.
+
+    Each thread (and forked worker) opens its own connection; the database
+    runs in WAL mode, so readers are not blocked while another worker commits.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS statements (
+            id INTEGER PRIMARY KEY,
+            account TEXT NOT NULL,
+            source TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            first_date TEXT,
+            last_date TEXT,
+            committed_at INTEGER NOT NULL,
+            UNIQUE (account, digest)
+        );
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY,
+            statement_id INTEGER NOT NULL REFERENCES statements (id),
+            seq INTEGER NOT NULL,
+            account TEXT NOT NULL,
+            booking_date TEXT,
+            description TEXT NOT NULL,
+            notes TEXT NOT NULL,
+            debit INTEGER NOT NULL,
+            credit INTEGER NOT NULL,
+            balance INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            duplicate TEXT NOT NULL,
+            duplicate_of TEXT NOT NULL,
+            fingerprint INTEGER,
+            search_text TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS transactions_account_date ON transactions (account, booking_date, statement_id, seq);
+        CREATE INDEX IF NOT EXISTS transactions_date ON transactions (booking_date, statement_id, seq);
+        CREATE INDEX IF NOT EXISTS transactions_amount ON transactions (abs(amount));
+        CREATE INDEX IF NOT EXISTS transactions_fingerprint ON transactions (account, fingerprint);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # A connection inherited across fork must not be used by the child
+            local.conn = sqlite3.connect(self.path, timeout=30)
+            local.conn.execute('PRAGMA journal_mode=WAL')
+            local.conn.execute('CREATE TEMP TABLE IF NOT EXISTS incoming (fingerprint INTEGER PRIMARY KEY)')
+            local.pid = os.getpid()
+        return local.conn
+
+    def version(self):
+        """Changes whenever a statement is committed: the latest commit time in ns, 0 while empty."""
+        return self._connect().execute('SELECT COALESCE(MAX(committed_at), 0) FROM statements').fetchone()[0]
+
+    def commit(self, df, account, source):
+        """
+        Commit a loaded dataset under ``account``: one statement, or a
+        consolidated ledger split into statements by its Source File column.
+        Returns how many statements were added and skipped (already committed)
+        and how many rows were added, all in one database transaction.
+        """
+        df = compact_frame(df)
+        if SOURCE_COLUMN in df:
+            codes, sources = pd.factorize(df[SOURCE_COLUMN])
+            parts = [(str(name), df.iloc[np.flatnonzero(codes == i)]) for i, name in enumerate(sources)]
+        else:
+            parts = [(source, df)]
+        result = {'statements': 0, 'skipped': 0, 'rows': 0}
+        conn = self._connect()
+        with conn:
+            for name, part in parts:
+                if self._commit_statement(conn, part.reset_index(drop=True), account, name):
+                    result['statements'] += 1
+                    result['rows'] += len(part)
+                else:
+                    result['skipped'] += 1
+        return result
+
+    def _commit_statement(self, conn, df, account, source):
+        content = df[[col for col in LEDGER_CONTENT if col in df]]
+        digest = hashlib.sha1(account.encode() + pd.util.hash_pandas_object(content, index=False)
+                              .to_numpy().tobytes()).hexdigest()
+        if conn.execute('SELECT 1 FROM statements WHERE account = ? AND digest = ?', (account, digest)).fetchone():
+            return False
+
+        dates = df['Booking Date'].dt.strftime('%Y-%m-%d')
+        dated = dates.dropna()
+        statement_id = conn.execute(
+            'INSERT INTO statements (account, source, digest, rows, first_date, last_date, committed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (account, source, digest, len(df), dated.min() if len(dated) else None,
+             dated.max() if len(dated) else None, time.time_ns())).lastrowid
+
+        blank = np.full(len(df), '', dtype=object)
+        kind = df[DUPLICATE_COLUMN].astype('str').to_numpy(dtype=object) if DUPLICATE_COLUMN in df else blank
+        of = df[DUPLICATE_OF_COLUMN].astype('str').to_numpy(dtype=object) if DUPLICATE_OF_COLUMN in df else blank.copy()
+        rows = fingerprint_rows(df)
+        fingerprint = np.full(len(df), None, dtype=object)
+        fingerprint[rows['pos']] = rows['exact'].to_numpy().view('int64').tolist()
+
+        # Exact repeats of rows the account already keeps: the k-th copy pairs with the k-th kept one
+        rows = rows[kind[rows['pos']] == '']
+        if len(rows):
+            conn.execute('DELETE FROM incoming')
+            conn.executemany('INSERT OR IGNORE INTO incoming VALUES (?)', ((f,) for f in fingerprint[rows['pos']]))
+            kept = pd.DataFrame(conn.execute(
+                "SELECT t.fingerprint, COUNT(*), MIN(s.source) FROM transactions t "
+                "JOIN statements s ON s.id = t.statement_id "
+                "WHERE t.account = ? AND t.duplicate = '' AND t.fingerprint IN (SELECT fingerprint FROM incoming) "
+                "GROUP BY t.fingerprint", (account,)).fetchall(), columns=['fingerprint', 'kept', 'kept_source'])
+            if len(kept):
+                rows = rows.assign(fingerprint=fingerprint[rows['pos']].astype('int64'),
+                                   occ=rows.groupby('exact').cumcount())
+                hits = rows.merge(kept, on='fingerprint')
+                hits = hits[hits['occ'] < hits['kept']]
+                kind[hits['pos']], of[hits['pos']] = 'exact', hits['kept_source'].to_numpy()
+
+        description = df['Description'].astype('str').fillna('')
+        notes = df['Extracted Notes'].astype('str').fillna('') if 'Extracted Notes' in df else pd.Series(blank)
+        debit, credit, balance = (df[col].to_numpy(dtype='int64') for col in MONEY_COLUMNS)
+        conn.executemany(
+            'INSERT INTO transactions (statement_id, seq, account, booking_date, description, notes, debit, credit, '
+            'balance, amount, duplicate, duplicate_of, fingerprint, search_text) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            zip([statement_id] * len(df), range(len(df)), [account] * len(df),
+                dates.astype(object).where(dates.notna(), None).tolist(), description.tolist(), notes.tolist(),
+                debit.tolist(), credit.tolist(), balance.tolist(), (credit - debit).tolist(),
+                kind.tolist(), of.tolist(), fingerprint.tolist(),
+                (description.str.lower() + '\n' + notes.str.lower()).tolist()))
+        return True
+
+    @staticmethod
+    def _where(filters, *extra):
+        """SQL WHERE clause and parameters for the dashboard filters (dates, search, account, amount, dedupe)."""
+        clauses, params = list(extra), []
+        if filters['start']:
+            clauses.append('t.booking_date >= ?')
+            params.append(pd.to_datetime(filters['start']).strftime('%Y-%m-%d'))
+        if filters['end']:
+            clauses.append('t.booking_date <= ?')
+            params.append(pd.to_datetime(filters['end']).strftime('%Y-%m-%d'))
+        if filters['account']:
+            clauses.append('t.account = ?')
+            params.append(filters['account'])
+        if filters['search']:
+            clauses.append('instr(t.search_text, ?) > 0')
+            params.append(filters['search'].lower())
+        if filters['min_amount']:
+            clauses.append('abs(t.amount) >= ?')
+            params.append(int(to_minor_units([float(filters['min_amount'])])[0]))
+        if filters['max_amount']:
+            clauses.append('abs(t.amount) <= ?')
+            params.append(int(to_minor_units([float(filters['max_amount'])])[0]))
+        if filters['dedupe']:
+            clauses.append("t.duplicate = ''")
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def count(self, filters):
+        where, params = self._where(filters)
+        return self._connect().execute(f'SELECT COUNT(*) FROM transactions t{where}', params).fetchone()[0]
+
+    def totals(self, filters):
+        """
+        Inflow, outflow, net, closing balance and row count for the filters, in
+        the shape of ``DatasetIndex.totals``. The closing balance is the sum of
+        each matching account's last row, so it spans several accounts.
+        """
+        conn = self._connect()
+        where, params = self._where(filters)
+        inflow, outflow, count = conn.execute(
+            f'SELECT COALESCE(SUM(t.credit), 0), COALESCE(SUM(t.debit), 0), COUNT(*) FROM transactions t{where}',
+            params).fetchone()
+        balance = None
+        if count:
+            closing = 0
+            for account in [filters['account']] if filters['account'] else self._account_names(conn):
+                where, params = self._where({**filters, 'account': account})
+                row = conn.execute(f'SELECT t.balance FROM transactions t{where} '
+                                   f'ORDER BY t.booking_date DESC, t.statement_id DESC, t.seq DESC LIMIT 1',
+                                   params).fetchone()
+                closing += row[0] if row else 0
+            balance = from_minor_units(closing)
+        return {'inflow': from_minor_units(inflow), 'outflow': from_minor_units(outflow),
+                'net': from_minor_units(inflow - outflow), 'balance': balance, 'count': count}
+
+    def monthly(self, filters):
+        """Per-calendar-month inflow/outflow/net for the dated matching rows, as ``DatasetIndex.monthly``."""
+        where, params = self._where(filters, 't.booking_date IS NOT NULL')
+        rows = self._connect().execute(
+            f'SELECT substr(t.booking_date, 1, 7) AS month, SUM(t.credit), SUM(t.debit), COUNT(*) '
+            f'FROM transactions t{where} GROUP BY month ORDER BY month', params).fetchall()
+        return [{'month': month, 'inflow': from_minor_units(inflow), 'outflow': from_minor_units(outflow),
+                 'net': from_minor_units(inflow - outflow), 'count': count}
+                for month, inflow, outflow, count in rows]
+
+    def duplicates(self, account=''):
+        """Flagged duplicate counts and the GH₵ they would add, as ``DatasetIndex.duplicates``."""
+        where, params = self._where({**LEDGER_NO_FILTERS, 'account': account}, "t.duplicate != ''")
+        out = {'exact': 0, 'near': 0, 'inflow': 0.0, 'outflow': 0.0}
+        for kind, count, inflow, outflow in self._connect().execute(
+                f'SELECT t.duplicate, COUNT(*), SUM(t.credit), SUM(t.debit) FROM transactions t{where} '
+                f'GROUP BY t.duplicate', params):
+            out[kind] = count
+            out['inflow'] += from_minor_units(inflow)
+            out['outflow'] += from_minor_units(outflow)
+        return out
+
+    def rows(self, filters, window):
+        """The visible window of matching rows, ordered and cut in SQL, as a compact frame."""
+        where, params = self._where(filters)
+        direction = 'DESC' if window['order'] == 'desc' else 'ASC'
+        column = LEDGER_SORT[window['sort']]
+        order = (f't.booking_date {direction}, t.statement_id, t.seq' if window['sort'] == 'date'
+                 else f'{column} {direction}, {LEDGER_ORDER}')
+        return self._frame(f'{where} ORDER BY {order} LIMIT ? OFFSET ?',
+                           params + [window['limit'], window['offset']])
+
+    def frame(self, filters):
+        """Every matching row in stored order, for export."""
+        where, params = self._where(filters)
+        return self._frame(f'{where} ORDER BY {LEDGER_ORDER}', params)
+
+    def _frame(self, tail, params):
+        rows = self._connect().execute(
+            'SELECT t.booking_date, t.description, t.notes, t.debit, t.credit, t.balance, t.account, s.source, '
+            't.duplicate, t.duplicate_of FROM transactions t JOIN statements s ON s.id = t.statement_id' + tail,
+            params).fetchall()
+        df = pd.DataFrame.from_records(rows, columns=LEDGER_COLUMNS)
+        df['Booking Date'] = pd.to_datetime(df['Booking Date'], format='%Y-%m-%d').astype('datetime64[us]')
+        for col in LEDGER_COLUMNS[1:]:
+            df[col] = df[col].astype('int64' if col in MONEY_COLUMNS else 'str')
+        return df
+
+    @staticmethod
+    def _account_names(conn):
+        return [name for (name,) in conn.execute('SELECT DISTINCT account FROM statements ORDER BY account')]
+
+    def accounts(self):
+        """Committed accounts with their statement and row counts and the dates they cover."""
+        return [{'account': account, 'statements': statements, 'rows': rows, 'first_date': first, 'last_date': last}
+                for account, statements, rows, first, last in self._connect().execute(
+                    'SELECT account, COUNT(*), SUM(rows), MIN(first_date), MAX(last_date) FROM statements '
+                    'GROUP BY account ORDER BY account')]
+
+    def stats(self):
+        accounts = self.accounts()
+        try:
+            disk = sum(os.stat(self.path + suffix).st_size for suffix in ('', '-wal') if os.path.exists(self.path + suffix))
+        except OSError:
+            disk = 0
+        return {'path': self.path, 'statements': sum(a['statements'] for a in accounts),
+                'rows': sum(a['rows'] for a in accounts), 'accounts': accounts, 'disk_bytes': disk}
+
+# ==========================================
+# 2N. CASH-FLOW ROLLUPS
+# ==========================================
+ROLLUP_TOP = 10        # counterparties listed by default
+ROLLUP_MAX_TOP = 100
+_WORD_RE = re.compile(r"[A-Z0-9&'./-]+")
+# Transaction-type words around a counterparty's name, e.g. "TRANSFER IN FROM <name>" or "PAYMENT FOR <name>"
+CHANNEL_WORDS = frozenset((
+    'TRANSFER', 'TRF', 'TRANS', 'IN', 'OUT', 'FROM', 'TO', 'FOR', 'BY', 'VIA', 'PAYMENT', 'PMT', 'PAY',
+    'POS', 'PURCHASE', 'ATM', 'CASH', 'DEPOSIT', 'WITHDRAWAL', 'CHEQUE', 'CHQ', 'INV', 'INVOICE', 'REF',
+    'SWIFT', 'INWARD', 'OUTWARD', 'REMITTANCE', 'MOMO', 'MOBILE', 'MONEY', 'NIP', 'ACH', 'DEBIT', 'CREDIT',
+    'CHARGE', 'CHARGES', 'FEE', 'FEES', 'REVERSAL', 'TOTAL',
+))
+
+def _word_runs(text):
+    """Runs of consecutive words in ``text``, upper-cased; words with digits (references, amounts) break a run."""
+    runs, run = [], []
+    for word in _WORD_RE.findall(str(text).upper()):
+        word = word.strip("&'./-")
+        if word and not any(ch.isdigit() for ch in word):
+            run.append(word)
+        elif run:
+            runs.append(run)
+            run = []
+    return runs + [run] if run else runs
+
+def _counterparty(description, notes):
+    """
+    The counterparty named by a transaction: the first run of words in the
+    Description, else in the Extracted Notes, that are not transaction-type
+    words; failing both, the Description's leading words ("CASH DEPOSIT").
+    """
+    for text in (description, notes):
+        for run in _word_runs(text):
+            name = []
+            for word in run + ['']:
+                if word and word not in CHANNEL_WORDS:
+                    name.append(word)
+                elif name:
+                    return ' '.join(name)
+    runs = _word_runs(description)
+    return ' '.join(runs[0]) if runs else ''
+
+def counterparty_column(df):
+    """``_counterparty`` of every row, computed once per distinct Description and Extracted Notes pair."""
+    description = df['Description'].astype('str').fillna('')
+    notes = df['Extracted Notes'].astype('str').fillna('') if 'Extracted Notes' in df else ''
+    codes, uniques = pd.factorize(description + '\x00' + notes)
+    names = np.array([_counterparty(*pair.split('\x00', 1)) for pair in uniques] + [''], dtype=object)
+    return names[codes]
+
+class Rollups:
+    """
+    Monthly and weekly cash flow and top counterparties of one dataset, from a
+    single groupby pass: rows are summed (exact pesewas) per booking day,
+    counterparty and duplicate flag, and every view, with any date range and
+    with or without duplicates, is re-aggregated from that small table.
+    Weeks start on Monday. Text search does not apply to rollups.
+    """
+
+    def __init__(self, df):
+        duplicate = (df[DUPLICATE_COLUMN] != '').to_numpy() if DUPLICATE_COLUMN in df else np.zeros(len(df), bool)
+        rows = pd.DataFrame({
+            'day': df['Booking Date'].to_numpy(dtype='datetime64[D]'),
+            'party': counterparty_column(df),
+            'kept': ~duplicate,
+            'inflow': df['Credit'].to_numpy(dtype='int64'),
+            'outflow': df['Debit'].to_numpy(dtype='int64'),
+        })
+        self.groups = rows.groupby(['day', 'party', 'kept'], dropna=False, sort=True).agg(
+            inflow=('inflow', 'sum'), outflow=('outflow', 'sum'), count=('inflow', 'size')).reset_index()
+        days = self.groups['day'].to_numpy(dtype='datetime64[D]')
+        self.dated = ~np.isnat(days)
+        number = days.astype('int64')
+        self.month = days.astype('datetime64[M]').astype('str')
+        self.week = (days - (number + 3) % 7).astype('str')   # 1970-01-01 was a Thursday
+        self.days = days
+
+    @property
+    def nbytes(self):
+        return int(self.groups.memory_usage(deep=True, index=False).sum()
+                   + self.month.nbytes + self.week.nbytes + self.days.nbytes + self.dated.nbytes)
+
+    def view(self, start=None, end=None, dedupe=False, top=ROLLUP_TOP):
+        """GH₵ monthly, weekly and per-counterparty totals for an inclusive date range."""
+        mask = np.ones(len(self.groups), dtype=bool)
+        if start:
+            mask &= self.dated & (self.days >= np.datetime64(pd.to_datetime(start), 'D'))
+        if end:
+            mask &= self.dated & (self.days <= np.datetime64(pd.to_datetime(end), 'D'))
+        if dedupe:
+            mask &= self.groups['kept'].to_numpy()
+        dated = mask & self.dated
+        parties = self._totals(self.groups['party'].to_numpy(dtype=object)[mask], mask)
+        parties = parties[(parties.index != '') & (parties['inflow'] + parties['outflow'] > 0)]
+        parties = parties.assign(volume=parties['inflow'] + parties['outflow']).sort_values(
+            ['volume', 'count'], ascending=False, kind='stable').head(top)
+        return {
+            'monthly': self._records('month', self._totals(self.month[dated], dated)),
+            'weekly': self._records('week', self._totals(self.week[dated], dated)),
+            'counterparties': self._records('counterparty', parties),
+        }
+
+    def _totals(self, keys, mask):
+        part = self.groups.loc[mask, ['inflow', 'outflow', 'count']]
+        return part.groupby(keys, sort=True).sum()
+
+    @staticmethod
+    def _records(label, totals):
+        return [{label: key, 'inflow': from_minor_units(int(inflow)), 'outflow': from_minor_units(int(outflow)),
+                 'net': from_minor_units(int(inflow - outflow)), 'count': int(count)}
+                for key, inflow, outflow, count in zip(totals.index, totals['inflow'], totals['outflow'],
+                                                        totals['count'])]
+
+# ==========================================
+# 2O. UPLOAD SPOOLING
+# ==========================================
+class SpooledRequest(Request):
+    """
+    Request whose uploaded files are written straight to named temporary files
+    in ``spool_dir`` instead of memory. Engines read them in place, and work
+    that outlives the request takes a hard link to the file, not a copy of its
+    bytes. Werkzeug removes the files when the request closes.
+    """
+
+    spool_dir = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.NamedTemporaryFile('w+b', dir=self.spool_dir, prefix='upload-')
+
+def spool_file(source, directory):
+    """
+    Give the binary stream ``source`` a path of its own in ``directory`` and
+    return it: a hard link when ``source`` is already a file there (an upload
+    spooled by SpooledRequest), otherwise a streamed copy. The caller removes
+    the path (``remove_spooled``) when done.
+    """
+    fd, path = tempfile.mkstemp(dir=directory, prefix='spool-')
+    name = getattr(source, 'name', None)
+    if isinstance(name, str) and os.path.dirname(os.path.abspath(name)) == os.path.abspath(directory):
+        try:
+            source.flush()
+            os.link(name, path + '.link')
+            os.replace(path + '.link', path)
+            os.close(fd)
+            return path
+        except OSError:
+            pass
+    with os.fdopen(fd, 'wb') as out:
+        if source.seekable():
+            source.seek(0)
+        shutil.copyfileobj(source, out, 1 << 20)
+    return path
+
+def remove_spooled(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def sweep_spool(directory, max_age):
+    """Remove spooled files older than ``max_age`` seconds, left behind by workers that died mid-parse."""
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+# ==========================================
+# 3. FLASK SERVER
+# ==========================================
+app = Flask(__name__)
+app.request_class = SpooledRequest
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('KAKOS_MAX_UPLOAD_MB', 20)) * 1024 * 1024  # upload limit, also per bulk statement
+app.config['SPOOL_DIR'] = os.environ.get('KAKOS_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'kakos_spool'))
+app.config['PDF_WORKERS'] = int(os.environ.get('KAKOS_PDF_WORKERS', 1))  # >1 enables parallel page extraction
+app.config['PDF_FAST_PATH'] = os.environ.get('KAKOS_PDF_FAST_PATH', '1') != '0'  # 0 forces extract_tables
+app.config['DOCX_STREAMING'] = os.environ.get('KAKOS_DOCX_STREAMING', '1') != '0'  # 0 uses the python-docx model
+app.config['CSV_VECTORISED'] = os.environ.get('KAKOS_CSV_VECTORISED', '1') != '0'  # 0 parses CSVs line by line
+app.config['CACHE_DIR'] = os.environ.get('KAKOS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'kakos_cache'))
+app.config['CACHE_MAX_BYTES'] = int(os.environ.get('KAKOS_CACHE_MAX_MB', 512)) * 1024 * 1024
+app.config['DATASET_DIR'] = os.environ.get('KAKOS_DATASET_DIR', os.path.join(tempfile.gettempdir(), 'kakos_datasets'))
+app.config['DATASET_TTL'] = int(os.environ.get('KAKOS_DATASET_TTL_MIN', 120)) * 60  # idle expiry
+app.config['DATASET_MEMORY_BYTES'] = int(os.environ.get('KAKOS_DATASET_MEMORY_MB', 0)) * 1024 * 1024  # per worker, 0 = no cap
+app.config['BULK_WORKERS'] = int(os.environ.get('KAKOS_BULK_WORKERS', os.cpu_count() or 1))
+app.config['BULK_MAX_FILES'] = int(os.environ.get('KAKOS_BULK_MAX_FILES', 100))
+app.config['BULK_MAX_BYTES'] = int(os.environ.get('KAKOS_BULK_MAX_MB', 200)) * 1024 * 1024  # whole batch, unpacked
+app.config['JOB_WORKERS'] = int(os.environ.get('KAKOS_JOB_WORKERS', 2))
+app.config['SLOW_REQUEST_MS'] = int(os.environ.get('KAKOS_SLOW_REQUEST_MS', 0))  # >0 profiles requests, keeps outliers
+app.config['SLOW_LOG_DIR'] = os.environ.get('KAKOS_SLOW_LOG_DIR', os.path.join(tempfile.gettempdir(), 'kakos_slow'))
+app.config['RESPONSE_CACHE_BYTES'] = int(os.environ.get('KAKOS_RESPONSE_CACHE_MB', 32)) * 1024 * 1024  # 0 disables
+app.config['LEDGER_PATH'] = os.environ.get('KAKOS_LEDGER_PATH', '')  # SQLite history store; '' disables it
+app.config['PRELOAD'] = [e.strip() for e in os.environ.get('KAKOS_PRELOAD', '').split(',') if e.strip()]
+app.secret_key = load_secret_key(app.config['DATASET_DIR'])
+PdfBankParser.FAST_PATH = app.config['PDF_FAST_PATH']
+PdfBankParser.SPOOL_DIR = app.config['SPOOL_DIR']
+DocxBankParser.STREAMING = app.config['DOCX_STREAMING']
+BankParser.VECTORISED = app.config['CSV_VECTORISED']
+SpooledRequest.spool_dir = app.config['SPOOL_DIR']
+os.makedirs(app.config['SPOOL_DIR'], exist_ok=True)
+PARSE_CACHE = ParseCache(app.config['CACHE_DIR'], app.config['CACHE_MAX_BYTES'])
+DATASETS = DatasetStore(app.config['DATASET_DIR'], app.config['DATASET_TTL'], app.config['DATASET_MEMORY_BYTES'])
+JOBS = JobBoard(os.path.join(app.config['DATASET_DIR'], 'jobs'))
+RESPONSE_CACHE = ResponseCache(app.config['RESPONSE_CACHE_BYTES'])
+DASHBOARD_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)   # compiled once, not per request
+INDEXES = OrderedDict()   # (dataset_id, version) -> DatasetIndex, per worker
+RECONCILIATIONS = OrderedDict()   # (dataset_id, version) -> (summary, breaks), per worker
+ROLLUPS = OrderedDict()   # (dataset_id, version) -> Rollups, per worker
+LEDGER = LedgerStore(app.config['LEDGER_PATH']) if app.config['LEDGER_PATH'] else None
+if app.config['PRELOAD']:
+    preload(*app.config['PRELOAD'])
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.profiler = None
+    if app.config['SLOW_REQUEST_MS'] > 0:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            g.profiler = profiler
+        except ValueError:
+            pass   # another profiler is active in this process (Python 3.12+ allows only one)
+
+@app.teardown_request
+def record_request_time(exc):
+    """Runs after the response (streamed ones included) has been sent."""
+    start = g.pop('request_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    route = request.endpoint or 'unmatched'
+    METRICS.observe('kakos_request_seconds', elapsed, route=route, method=request.method)
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return
+    profiler.disable()
+    if elapsed * 1000 >= app.config['SLOW_REQUEST_MS']:
+        log_slow_request(profiler, route, elapsed)
+
+def log_slow_request(profiler, route, elapsed):
+    """Save the profile of a slow request as a .prof file and log its top cumulative entries."""
+    os.makedirs(app.config['SLOW_LOG_DIR'], exist_ok=True)
+    path = os.path.join(app.config['SLOW_LOG_DIR'], f"{time.strftime('%Y%m%d-%H%M%S')}-{route}-{elapsed * 1000:.0f}ms.prof")
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.dump_stats(path)
+    stats.sort_stats('cumulative').print_stats(15)
+    logger.warning("Slow request %s %s took %.0f ms (profile: %s)\n%s",
+                   request.method, request.full_path, elapsed * 1000, path, out.getvalue())
+
+def current_dataset():
+    """Return ``(df, meta)`` for the dataset in this user's session, or ``(None, None)``."""
+    df, meta = DATASETS.load(session.get('dataset_id'))
+    if df is None:
+        session.pop('dataset_id', None)
+    return df, meta
+
+@app.after_request
+def compress_response(response):
+    """Gzip large text responses for clients that accept it (cached views arrive already encoded)."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers or response.mimetype not in GZIP_MIMETYPES
+            or not request.accept_encodings['gzip']):
+        return response
+    body = response.get_data()
+    if len(body) >= GZIP_MIN_BYTES:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+# Query parameters a cached view may depend on; requests with any other parameter bypass the cache.
+CACHED_VIEW_PARAMS = ('start_date', 'end_date', 'search', 'dedupe', 'sort', 'order', 'page', 'per_page', 'offset', 'limit',
+                      'ledger', 'account', 'min_amount', 'max_amount', 'top')
+# Part of every ETag, so a deploy that changes the page or the parsers invalidates browser copies.
+VIEW_SIGNATURE = hashlib.sha1((HTML_TEMPLATE + PARSER_VERSION).encode()).hexdigest()[:12]
+
+def cached_view(view):
+    """
+    Serve a GET view of the session's dataset from RESPONSE_CACHE, keyed by the
+    dataset id and version and the query parameters. Ledger views are keyed by
+    the ledger store's version instead. The ETag and Last-Modified are known
+    before any work is done, so a browser revalidating a page it already has
+    (reloads, back navigation) gets a 304 straight away.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or not set(request.args) <= set(CACHED_VIEW_PARAMS):
+            return view(*args, **kwargs)
+        if ledger_requested():
+            owner, version = 'ledger', LEDGER.version()
+        else:
+            meta = DATASETS.meta(session.get('dataset_id'))
+            if meta is None:
+                return view(*args, **kwargs)
+            DATASETS.touch(session['dataset_id'])
+            owner, version = session['dataset_id'], meta['version']
+        key = (request.endpoint, owner, version, tuple(request.args.get(p, '') for p in CACHED_VIEW_PARAMS))
+        etag = hashlib.sha1(repr((VIEW_SIGNATURE, key)).encode()).hexdigest()
+        last_modified = datetime.fromtimestamp(version // 1_000_000_000, tz=timezone.utc)
+        headers = {'Cache-Control': 'private, no-cache', 'Vary': 'Cookie, Accept-Encoding'}
+
+        if request.if_none_match.contains(etag) or (
+                not request.if_none_match and request.if_modified_since
+                and request.if_modified_since >= last_modified):
+            response = Response(status=304, headers=headers)
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            return response
+
+        entry = RESPONSE_CACHE.get(key) if RESPONSE_CACHE.max_bytes else None
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed or response.direct_passthrough:
+                return response
+            entry = ResponseCache.entry(response.get_data(), response.mimetype, etag, last_modified)
+            RESPONSE_CACHE.put(key, entry)
+
+        use_gzip = entry['gzip'] is not None and request.accept_encodings['gzip']
+        response = Response(entry['gzip'] if use_gzip else entry['body'], mimetype=entry['mimetype'], headers=headers)
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(entry['etag'])
+        response.last_modified = entry['last_modified']
+        return response
+    return wrapper
+
+SORT_COLUMNS = {
+    'date': 'Booking Date', 'description': 'Description',
+    'debit': 'Debit', 'credit': 'Credit', 'balance': 'Balance',
+}
+DISPLAY_COLUMNS = ['Booking Date', 'Description', 'Extracted Notes', 'Debit', 'Credit', 'Balance']
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+class FilterError(ValueError):
+    """A malformed filter parameter; answered with HTTP 400 (see ``bad_filter``)."""
+
+def read_filters(args):
+    """Pull the dashboard filter parameters out of a request's query string (FilterError on a bad date)."""
+    return {
+        'start': _date_param(args.get('start_date'), 'start_date'),
+        'end': _date_param(args.get('end_date'), 'end_date'),
+        'search': args.get('search', '').strip(),
+        'dedupe': '1' if args.get('dedupe') == '1' else '',   # leave out flagged duplicate rows
+        # Ledger queries only: one account, and a range of absolute amounts in GH₵
+        'account': args.get('account', '').strip(),
+        'min_amount': _amount_param(args.get('min_amount')),
+        'max_amount': _amount_param(args.get('max_amount')),
+    }
+
+def _date_param(value, name):
+    """A date query parameter as given, or '' if it is missing. Raises FilterError if it is not a date."""
+    if not value:
+        return ''
+    try:
+        if not pd.isna(pd.to_datetime(value)):
+            return value
+    except (ValueError, OverflowError):
+        pass
+    raise FilterError(f"Invalid {name} {value!r}: expected a date such as 2024-03-01.")
+
+@app.errorhandler(FilterError)
+def bad_filter(error):
+    """JSON endpoints answer a bad filter with a JSON error, pages with the dashboard's error banner."""
+    if request.path.startswith('/api/'):
+        return jsonify({'error': str(error)}), 400
+    return render_template(DASHBOARD_TEMPLATE, filename=None, error=str(error)), 400
+
+def _amount_param(value):
+    """A GH₵ amount query parameter as given, or '' if it is missing or not a number."""
+    try:
+        return value.strip() if value and 0 <= float(value) < 1e12 else ''
+    except ValueError:
+        return ''
+
+def ledger_requested():
+    """True when a request asks for the committed history (``ledger=1``) and the ledger store is enabled."""
+    return LEDGER is not None and request.args.get('ledger') == '1'
+
+def ledger_args(filters):
+    """Query parameters that keep a dashboard link on the ledger, with its ledger-only filters."""
+    return {'ledger': '1', 'account': filters['account'],
+            'min_amount': filters['min_amount'], 'max_amount': filters['max_amount']}
+
+def _per_version(cache, meta, stage, build):
+    """Return ``cache``'s entry for a dataset version, running ``build()`` (timed as ``stage``) on first use."""
+    key = (meta['id'], meta['version'])
+    value = cache.get(key)
+    if value is None:
+        with METRICS.stage(stage):
+            value = cache[key] = build()
+        while len(cache) > DatasetStore.OPEN_LIMIT:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return value
+
+def dataset_index(df, meta):
+    """Return this worker's DatasetIndex for a dataset version, building it on first use."""
+    return _per_version(INDEXES, meta, 'index_build', lambda: DatasetIndex(df))
+
+def dataset_reconciliation(df, meta):
+    """Return this worker's ``reconcile`` result for a dataset version, computing it on first use."""
+    return _per_version(RECONCILIATIONS, meta, 'reconcile', lambda: reconcile(df))
+
+def dataset_rollups(df, meta):
+    """Return this worker's cash-flow Rollups for a dataset version, grouping it on first use."""
+    return _per_version(ROLLUPS, meta, 'rollup', lambda: Rollups(df))
+
+def filter_frame(df, meta, start, end, search, dedupe=''):
+    """Apply the date-range, text and duplicate filters through the dataset index; only matching rows are taken."""
+    index = dataset_index(df, meta)
+    with METRICS.stage('filter'):
+        positions = index.select(start, end, search, bool(dedupe))
+        return df if positions is None else df.take(positions)
+
+def compute_kpis(dataset, meta, filters, view=None):
+    """
+    Raw KPI numbers for a filtered view. Date-only filters are answered from the
+    index's prefix sums; an active text search falls back to summing ``view``
+    (the already-filtered frame, computed here if not supplied).
+    """
+    if not filters['search']:
+        return dataset_index(dataset, meta).totals(filters['start'], filters['end'], bool(filters['dedupe']))
+    if view is None:
+        view = filter_frame(dataset, meta, filters['start'], filters['end'], filters['search'], filters['dedupe'])
+    inflow, outflow = int(view['Credit'].sum()), int(view['Debit'].sum())   # exact pesewas
+    return {'inflow': from_minor_units(inflow), 'outflow': from_minor_units(outflow),
+            'net': from_minor_units(inflow - outflow),
+            'balance': from_minor_units(int(view['Balance'].iloc[-1])) if not view.empty else None,
+            'count': len(view)}
+
+def format_kpis(totals):
+    """Display strings for the KPI cards."""
+    return {
+        'inflow': f"GH₵ {totals['inflow']:,.2f}",
+        'outflow': f"GH₵ {totals['outflow']:,.2f}",
+        'net': f"GH₵ {totals['net']:,.2f}",
+        'net_raw': totals['net'],
+        'balance': f"GH₵ {totals['balance']:,.2f}" if totals['balance'] is not None else "0.00"
+    }
+
+def read_window(args, total):
+    """Resolve sort/order/page/per_page (or offset/limit) query parameters against ``total`` rows."""
+    sort = args.get('sort', 'date')
+    if sort not in SORT_COLUMNS:
+        sort = 'date'
+    order = 'desc' if args.get('order') == 'desc' else 'asc'
+    limit = args.get('limit', type=int) or args.get('per_page', type=int) or DEFAULT_PAGE_SIZE
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    pages = max(1, -(-total // limit))
+    if 'offset' in args:
+        offset = max(0, args.get('offset', 0, type=int) or 0)
+        page = offset // limit + 1
+    else:
+        page = min(max(args.get('page', 1, type=int) or 1, 1), pages)
+        offset = (page - 1) * limit
+    return {
+        'sort': sort, 'order': order, 'offset': offset, 'limit': limit,
+        'page': page, 'pages': pages, 'total': total,
+        'first_row': offset + 1 if total else 0, 'last_row': min(offset + limit, total),
+    }
+
+def window_frame(df, window):
+    """Order the filtered frame and cut out only the visible slice."""
+    ascending = window['order'] == 'asc'
+    if window['sort'] != 'date' or not ascending:
+        # Datasets are stored date-ascending, so only non-default orderings need a sort
+        df = df.sort_values(SORT_COLUMNS[window['sort']], ascending=ascending, kind='stable',
+                            na_position='first' if ascending else 'last')
+    return df.iloc[window['offset']:window['offset'] + window['limit']]
+
+def to_records(df):
+    """Turn a (small) slice into display records with formatted dates."""
+    columns = DISPLAY_COLUMNS + [c for c in (ACCOUNT_COLUMN, SOURCE_COLUMN, DUPLICATE_COLUMN, DUPLICATE_OF_COLUMN) if c in df]
+    out = df.reindex(columns=columns)
+    out['Booking Date'] = out['Booking Date'].dt.strftime('%d %b %Y').fillna('-')
+    for col in MONEY_COLUMNS:
+        out[col] = from_minor_units(out[col])
+    for col in ('Description', 'Extracted Notes', ACCOUNT_COLUMN, SOURCE_COLUMN, DUPLICATE_COLUMN, DUPLICATE_OF_COLUMN):
+        if col in out:
+            out[col] = out[col].astype('str').fillna('')
+    return out.to_dict('records')
+
+def attach_dataset(df, filename):
+    """Make ``df`` this session's active dataset, replacing (and deleting) the previous one."""
+    DATASETS.delete(session.get('dataset_id'))
+    session['dataset_id'] = DATASETS.create(df, filename)
+
+def _merge_job_metrics(future):
+    if not future.cancelled() and future.exception() is None:
+        METRICS.merge(future.result()[1])
+
+def submit_parse_job(file, engine):
+    """Queue a background parse for an upload (merging with an in-flight job for the same content)."""
+    job_id = ParseCache.key(engine, file.stream)
+    cached = PARSE_CACHE.get(job_id)
+    if cached is not None:
+        attach_dataset(cached, file.filename)
+        return jsonify({'job_id': job_id, 'state': 'done', 'redirect': url_for('index')})
+
+    if JOBS.claim(job_id, file.filename):
+        sweep_spool(app.config['SPOOL_DIR'], app.config['DATASET_TTL'])
+        JOBS.expire(app.config['DATASET_TTL'])
+        future = get_process_pool('jobs', app.config['JOB_WORKERS']).submit(
+            _metered, 'job', _run_parse_job, JOBS.directory, job_id, engine,
+            spool_file(file.stream, app.config['SPOOL_DIR']), app.config['PDF_WORKERS'])
+        future.add_done_callback(_merge_job_metrics)
+    session['pending_job'] = {'id': job_id, 'filename': file.filename}
+    return jsonify({
+        'job_id': job_id, 'state': JOBS.status(job_id)['state'],
+        'status_url': url_for('job_status', job_id=job_id),
+    }), 202
+
+@app.route('/', methods=['GET', 'POST'])
+@cached_view
+def index():
+    # Handle the Reset functionality
+    if request.args.get('reset') == '1':
+        DATASETS.delete(session.pop('dataset_id', None))
+        return redirect(url_for('index'))
+
+    if request.method == 'POST':
+        if 'file' not in request.files: return redirect(request.url)
+        file = request.files['file']
+        if file.filename == '': return redirect(request.url)
+        
+        if file:
+            engine = detect_engine(file.filename)
+            if engine is None and request.form.get('background') == '1':
+                return jsonify({'error': "Unsupported file type. Please upload a .csv, .docx, or .pdf file."}), 400
+            if engine is None:
+                return render_template(
+                    DASHBOARD_TEMPLATE, filename=None,
+                    error="Unsupported file type. Please upload a .csv, .docx, or .pdf file."
+                )
+            if request.form.get('background') == '1':
+                return submit_parse_job(file, engine)
+            try:
+                # Engines read the upload's spool file in place
+                df = PARSE_CACHE.parse(engine, file.stream, pdf_workers=app.config['PDF_WORKERS'])
+
+                if df.empty:
+                    return render_template(
+                        DASHBOARD_TEMPLATE, filename=None,
+                        error="No transactions could be extracted from this file. "
+                              "Check that it is a valid bank statement."
+                    )
+
+                attach_dataset(df, file.filename)
+                return redirect(url_for('index'))
+
+            except Exception as e:
+                logger.error("Upload processing error: %s", e)
+                return render_template(
+                    DASHBOARD_TEMPLATE, filename=None,
+                    error=f"Failed to parse file: {e}"
+                )
+
+    if ledger_requested():
+        return render_ledger()
+
+    dataset, meta = current_dataset()
+    if dataset is not None:
+        filters = read_filters(request.args)
+        df = filter_frame(dataset, meta, filters['start'], filters['end'], filters['search'], filters['dedupe'])
+
+        # KPIs cover the full filtered set
+        kpis = format_kpis(compute_kpis(dataset, meta, filters, view=df))
+
+        # Only the visible window is turned into records
+        window = read_window(request.args, len(df))
+        transactions = to_records(window_frame(df, window))
+        summary, breaks = dataset_reconciliation(dataset, meta)
+        reconciliation = {**summary, 'rows_shown': reconciliation_records(breaks.iloc[:RECONCILE_PREVIEW])}
+        with METRICS.stage('render'):
+            return render_template(
+                DASHBOARD_TEMPLATE, filename=meta['filename'],
+                transactions=transactions, kpis=kpis, reconciliation=reconciliation,
+                duplicates=dataset_index(dataset, meta).duplicates,
+                filters=filters, window=window, progress=meta.get('progress'),
+                ledger_enabled=LEDGER is not None, ledger_args={}, error=None
+            )
+    
+    return render_template(DASHBOARD_TEMPLATE, filename=None, ledger_enabled=LEDGER is not None, error=None)
+
+def render_ledger():
+    """The dashboard over the committed history: filtered, totalled and paged in SQL."""
+    filters = read_filters(request.args)
+    with METRICS.stage('ledger_query'):
+        totals = LEDGER.totals(filters)
+        window = read_window(request.args, totals['count'])
+        transactions = to_records(LEDGER.rows(filters, window))
+        duplicates = LEDGER.duplicates(filters['account'])
+        accounts = LEDGER.accounts()
+    with METRICS.stage('render'):
+        return render_template(
+            DASHBOARD_TEMPLATE, filename=f"Ledger history ({sum(a['statements'] for a in accounts)} statements)",
+            transactions=transactions, kpis=format_kpis(totals), reconciliation=None, duplicates=duplicates,
+            filters=filters, window=window, progress=None, accounts=accounts,
+            ledger_enabled=True, ledger_args=ledger_args(filters), error=None
+        )
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Progress of a background parse; once done, the result becomes this session's dataset."""
+    state = JOBS.status(job_id)
+    if state is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    body = {'job_id': job_id, 'state': state['state'], 'progress': state.get('progress'), 'error': state.get('error')}
+
+    if state['state'] in JobBoard.ACTIVE and not JOBS.is_active(state):
+        body.update(state='failed', error="The parse job stopped responding. Please upload the file again.")
+    elif state['state'] == 'done':
+        pending = session.get('pending_job')
+        if pending and pending['id'] == job_id:
+            df = PARSE_CACHE.get(job_id)
+            if df is None:
+                body.update(state='failed', error="The parsed result has expired. Please upload the file again.")
+                return jsonify(body)
+            attach_dataset(df, pending['filename'])
+            session.pop('pending_job')
+        body['dataset'] = {'rows': state.get('rows'), 'filename': (pending or {}).get('filename', state.get('filename'))}
+        body['redirect'] = url_for('index')
+    return jsonify(body)
+
+@app.route('/bulk', methods=['POST'])
+def bulk_upload():
+    """
+    Accept many statements (or .zip archives) and build one consolidated ledger
+    in the background; with ``append=1`` they are added to the loaded ledger.
+    The request body may reach BULK_MAX_BYTES rather than the single-upload
+    limit, which still applies to each statement.
+    """
+    request.max_content_length = app.config['BULK_MAX_BYTES']   # before the body is parsed
+    uploads = [(f.filename, f.stream) for f in request.files.getlist('files') if f.filename]
+    sweep_spool(app.config['SPOOL_DIR'], app.config['DATASET_TTL'])
+    try:
+        items, skipped = expand_uploads(uploads, app.config['BULK_MAX_FILES'], app.config['BULK_MAX_BYTES'],
+                                        app.config['SPOOL_DIR'], app.config['MAX_CONTENT_LENGTH'])
+    except ValueError as e:
+        return render_template(DASHBOARD_TEMPLATE, filename=None, error=str(e))
+    if not items:
+        return render_template(
+            DASHBOARD_TEMPLATE, filename=None,
+            error="No .csv, .docx or .pdf statements were found in the upload."
+        )
+
+    progress = {'total': len(items), 'done': 0, 'failed': [], 'skipped': skipped}
+    base, meta = current_dataset() if request.form.get('append') == '1' else (None, None)
+    if base is not None and not DATASETS.claim_ingest(meta['id']):
+        # Appending now would start from the partial ledger and race the running ingest's writes
+        remove_spooled(path for _, _, path in items)
+        return render_template(
+            DASHBOARD_TEMPLATE, filename=None,
+            error="Statements are still being added to this ledger. Add more once they have finished."
+        )
+    if base is not None:
+        # Add to the loaded ledger: a single statement becomes its first source
+        if SOURCE_COLUMN not in base:
+            base = base.assign(**{SOURCE_COLUMN: meta['filename']})
+        dataset_id = meta['id']
+        statements = base[SOURCE_COLUMN].nunique() + len(items)
+        DATASETS.write(dataset_id, base, {'filename': f"Consolidated ledger ({statements} statements)",
+                                          'progress': progress})
+    else:
+        DATASETS.delete(session.get('dataset_id'))
+        dataset_id = DATASETS.create(empty_ledger(), f"Consolidated ledger ({len(items)} statements)",
+                                     progress=progress)
+        DATASETS.claim_ingest(dataset_id)
+        session['dataset_id'] = dataset_id
+    threading.Thread(
+        target=run_bulk_ingest, args=(DATASETS, dataset_id, items, app.config['BULK_WORKERS'], base),
+        name=f'bulk-{dataset_id}', daemon=True,
+    ).start()
+    return redirect(url_for('index'))
+
+@app.route('/api/transactions')
+@cached_view
+def api_transactions():
+    """JSON window of the filtered transactions, used by the table's infinite scroll."""
+    if ledger_requested():
+        filters = read_filters(request.args)
+        with METRICS.stage('ledger_query'):
+            window = read_window(request.args, LEDGER.count(filters))
+            return jsonify({**window, 'rows': to_records(LEDGER.rows(filters, window))})
+    dataset, meta = current_dataset()
+    if dataset is None:
+        return jsonify({'error': 'No statement loaded'}), 404
+    filters = read_filters(request.args)
+    df = filter_frame(dataset, meta, filters['start'], filters['end'], filters['search'], filters['dedupe'])
+    window = read_window(request.args, len(df))
+    return jsonify({**window, 'rows': to_records(window_frame(df, window))})
+
+@app.route('/api/kpis')
+@cached_view
+def api_kpis():
+    """
+    KPI totals for the current filters, plus per-month buckets when no text
+    search is active (always, for the ledger, where months are grouped in SQL).
+    """
+    if ledger_requested():
+        filters = read_filters(request.args)
+        with METRICS.stage('ledger_query'):
+            return jsonify({**LEDGER.totals(filters), 'monthly': LEDGER.monthly(filters)})
+    dataset, meta = current_dataset()
+    if dataset is None:
+        return jsonify({'error': 'No statement loaded'}), 404
+    filters = read_filters(request.args)
+    result = compute_kpis(dataset, meta, filters)
+    if not filters['search']:
+        result['monthly'] = dataset_index(dataset, meta).monthly(filters['start'], filters['end'], bool(filters['dedupe']))
+    return jsonify(result)
+
+@app.route('/api/reconciliation')
+@cached_view
+def api_reconciliation():
+    """Running-balance check for the whole dataset: summary counts plus a window of the breaks."""
+    dataset, meta = current_dataset()
+    if dataset is None:
+        return jsonify({'error': 'No statement loaded'}), 404
+    summary, breaks = dataset_reconciliation(dataset, meta)
+    offset = max(0, request.args.get('offset', 0, type=int) or 0)
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int) or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    return jsonify({**summary, 'offset': offset, 'limit': limit,
+                    'rows': reconciliation_records(breaks.iloc[offset:offset + limit])})
+
+@app.route('/api/analytics')
+@cached_view
+def api_analytics():
+    """
+    Monthly and weekly inflow/outflow/net and the ``top`` counterparties for the
+    date range, re-aggregated from the dataset's cached rollups.
+    """
+    dataset, meta = current_dataset()
+    if dataset is None:
+        return jsonify({'error': 'No statement loaded'}), 404
+    filters = read_filters(request.args)
+    top = min(max(request.args.get('top', ROLLUP_TOP, type=int) or ROLLUP_TOP, 1), ROLLUP_MAX_TOP)
+    rollups = dataset_rollups(dataset, meta)
+    with METRICS.stage('rollup_view'):
+        return jsonify(rollups.view(filters['start'], filters['end'], bool(filters['dedupe']), top))
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify({**PARSE_CACHE.stats(), 'responses': RESPONSE_CACHE.stats()})
+
+@app.route('/datasets/stats')
+def dataset_stats():
+    """This worker's dataset memory: open frames (exact buffer sizes) plus their search indexes."""
+    return jsonify({**DATASETS.stats(), 'indexes': len(INDEXES),
+                    'index_bytes': sum(index.nbytes for index in INDEXES.values()),
+                    'rollups': len(ROLLUPS), 'rollup_bytes': sum(rollup.nbytes for rollup in ROLLUPS.values())})
+
+@app.route('/ledger/commit', methods=['POST'])
+def ledger_commit():
+    """Commit the session's dataset to the ledger store under an account (by default its file name)."""
+    if LEDGER is None:
+        return jsonify({'error': 'The ledger store is not enabled (set KAKOS_LEDGER_PATH).'}), 404
+    dataset, meta = current_dataset()
+    if dataset is None:
+        return redirect(url_for('index'))
+    account = request.form.get('account', '').strip() or meta['filename'].rsplit('.', 1)[0]
+    with METRICS.stage('ledger_commit'):
+        result = LEDGER.commit(dataset, account, meta['filename'])
+    logger.info("Committed %s to ledger account %s: %s", meta['filename'], account, result)
+    return redirect(url_for('index', ledger='1', account=account))
+
+@app.route('/ledger/stats')
+def ledger_stats():
+    """Committed statements and rows per account, and the ledger's size on disk."""
+    if LEDGER is None:
+        return jsonify({'error': 'The ledger store is not enabled (set KAKOS_LEDGER_PATH).'}), 404
+    return jsonify(LEDGER.stats())
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint: stage and request histograms for this worker process (see ``Metrics``)."""
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/export')
+def export():
+    filters = read_filters(request.args)
+    if ledger_requested():
+        dataset, meta = None, {'filename': 'Ledger history'}
+        with METRICS.stage('ledger_query'):
+            view = LEDGER.frame(filters)
+    else:
+        dataset, meta = current_dataset()
+        if dataset is None: return redirect(url_for('index'))
+        view = filter_frame(dataset, meta, filters['start'], filters['end'], filters['search'], filters['dedupe'])
+
+    fmt = request.args.get('format', 'xlsx')
+    if fmt not in EXPORT_FORMATS: fmt = 'xlsx'
+    extension, mimetype = EXPORT_FORMATS[fmt]
+    safe_name = meta['filename'].rsplit('.', 1)[0]
+    download_name = f"Cleaned_{safe_name}.{extension}"
+
+    if fmt == 'csv':
+        return Response(
+            stream_with_context(iter_csv_export(view)), mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename="{download_name}"'}
+        )
+
+    # Build in a temp file that is unlinked once opened: it is freed when the response closes
+    fd, path = tempfile.mkstemp(suffix=f'.{extension}')
+    os.close(fd)
+    try:
+        if fmt == 'parquet':
+            with METRICS.stage('write_parquet'):
+                write_parquet_export(path, view)
+        else:
+            # Summary KPIs cover the date range only, as before
+            if dataset is None:
+                totals, reconciliation, rollups = LEDGER.totals({**filters, 'search': ''}), None, None
+            else:
+                totals = compute_kpis(dataset, meta, {**filters, 'search': ''})
+                reconciliation = dataset_reconciliation(dataset, meta)
+                rollups = dataset_rollups(dataset, meta).view(filters['start'], filters['end'], bool(filters['dedupe']))
+            with METRICS.stage('write_xlsx'):
+                write_xlsx_export(path, view, meta['filename'], filters, totals, reconciliation, rollups)
+        output = open(path, 'rb')
+    finally:
+        os.remove(path)
+    return send_file(output, mimetype=mimetype, download_name=download_name, as_attachment=True)
+
+# ==========================================
+# 4. COMMAND-LINE BATCH MODE
+# ==========================================
+BATCH_FORMATS = ('xlsx', 'parquet')
+
+def export_dataset(df, filename, path_stem, formats):
+    """Write cleaned exports of a whole compact ledger to ``path_stem`` + extension; returns the paths written."""
+    paths = []
+    for fmt in formats:
+        path = f"{path_stem}.{EXPORT_FORMATS[fmt][0]}"
+        if fmt == 'parquet':
+            write_parquet_export(path, df)
+        elif fmt == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as fh:
+                fh.writelines(iter_csv_export(df))
+        else:
+            write_xlsx_export(path, df, filename, read_filters({}), DatasetIndex(df).totals(),
+                              reconcile(df), Rollups(df).view())
+        paths.append(path)
+    return paths
+
+def _batch_item(name, engine, path, out_dir, formats):
+    """Process-pool entry point for batch mode: parse one statement and write its cleaned exports."""
+    df = _parse_bulk_item(engine, path)
+    if df.empty:
+        return df, []
+    df = compact_frame(df)
+    stem = os.path.join(out_dir, f"Cleaned_{os.path.splitext(name)[0]}")
+    return df, export_dataset(df, name, stem, formats)
+
+def run_batch(directory, out_dir, formats=BATCH_FORMATS, workers=None, consolidated=True):
+    """
+    Parse every .csv, .docx and .pdf statement in ``directory`` across
+    ``workers`` processes (default: all cores), writing cleaned exports for
+    each file and, with ``consolidated``, one duplicate-flagged ledger of them
+    all, into ``out_dir``. Returns the process exit status: 1 if any
+    statement yielded no transactions.
+    """
+    names = sorted(name for name in os.listdir(directory)
+                   if detect_engine(name) and os.path.isfile(os.path.join(directory, name)))
+    if not names:
+        print(f"No .csv, .docx or .pdf statements found in {directory}")
+        return 1
+    os.makedirs(out_dir, exist_ok=True)
+    pool = get_process_pool('batch', workers or os.cpu_count() or 1)
+    futures = {pool.submit(_batch_item, name, detect_engine(name), os.path.join(directory, name), out_dir, formats): name
+               for name in names}
+    parsed, failed = {}, []
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            df, paths = future.result()
+        except Exception as e:
+            logger.error("Batch parse failed for %s: %s", name, e)
+            df, paths = None, []
+        if df is None or df.empty:
+            failed.append(name)
+            print(f"{name}: no transactions extracted")
+        else:
+            parsed[name] = df
+            print(f"{name}: {len(df):,} rows -> {', '.join(os.path.basename(p) for p in paths)}")
+
+    if consolidated and parsed:
+        # Statements in name order decide which copy of a duplicate is kept
+        frames = flag_duplicates([(name, parsed[name]) for name in names if name in parsed], DuplicateIndex())
+        ledger = consolidate(frames)
+        paths = export_dataset(ledger, f"Consolidated ledger ({len(frames)} statements)",
+                               os.path.join(out_dir, 'Consolidated_ledger'), formats)
+        print(f"consolidated: {len(ledger):,} rows from {len(frames)} statements -> "
+              f"{', '.join(os.path.basename(p) for p in paths)}")
+    return 1 if failed else 0
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='KAKOS audit tool: serve the dashboard, or clean a directory of statements.')
+    commands = ap.add_subparsers(dest='command')
+    commands.add_parser('serve', help='run the web dashboard (the default)')
+    batch = commands.add_parser('batch', help='parse every statement in a directory and write cleaned exports')
+    batch.add_argument('directory')
+    batch.add_argument('--out', help='output directory (default: <directory>/cleaned)')
+    batch.add_argument('--formats', default=','.join(BATCH_FORMATS), help='comma-separated subset of xlsx,parquet,csv')
+    batch.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='parser processes (default: all cores)')
+    batch.add_argument('--no-consolidated', action='store_true', help='skip the consolidated ledger of all files')
+    args = ap.parse_args(argv)
 
-    output.seek(0)
-    safe_name = DB['filename'].rsplit('.', 1)[0]
-    return send_file(output, download_name=f"Cleaned_{safe_name}.xlsx", as_attachment=True)
+    if args.command == 'batch':
+        formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+        unknown = set(formats) - set(EXPORT_FORMATS)
+        if unknown:
+            ap.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+        raise SystemExit(run_batch(args.directory, args.out or os.path.join(args.directory, 'cleaned'),
+                                   formats, args.workers, not args.no_consolidated))
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=False)
 
 if __name__ == '__main__':
-    import os
-    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=False)
\ No newline at end of file
+    main()
@@ -0,0 +1,30 @@
+"""
+Shared fixtures. The app reads its storage locations at import time, so they
+are pointed at a throwaway directory before ``kakos_audit`` is first imported.
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_WORKDIR = tempfile.mkdtemp(prefix='kakos_tests_')
+for _name in ('CACHE', 'DATASET', 'SPOOL'):
+    os.environ[f'KAKOS_{_name}_DIR'] = os.path.join(_WORKDIR, _name.lower())
+os.environ['KAKOS_LEDGER_PATH'] = ''
+
+import kakos_audit  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_WORKDIR, ignore_errors=True)
+
+
+@pytest.fixture
+def client():
+    """A test client with its own session; the parse cache is cleared so every upload parses."""
+    shutil.rmtree(kakos_audit.app.config['CACHE_DIR'], ignore_errors=True)
+    os.makedirs(kakos_audit.app.config['CACHE_DIR'], exist_ok=True)
+    client = kakos_audit.app.test_client()
+    yield client
+    client.get('/', query_string={'reset': '1'})
@@ -0,0 +1,156 @@
+"""
+Reconciliation, duplicate flagging, rollups and the ledger store, checked on
+small hand-built ledgers and against the dataset index they must agree with.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generators import make_csv_statement
+from kakos_audit import (DUPLICATE_COLUMN, DUPLICATE_OF_COLUMN, DatasetIndex, DatasetStore, DuplicateIndex,
+                         LedgerStore, Rollups, compact_frame, consolidate, flag_duplicates, frame_bytes,
+                         parse_statement, reconcile)
+
+LEDGER_FILTERS = {'start': '', 'end': '', 'search': '', 'dedupe': '', 'account': '', 'min_amount': '',
+                  'max_amount': ''}
+
+
+def statement(rows, opening=1000.0):
+    """A compact statement from ``(day, description, debit, credit)`` rows with a correct running balance."""
+    balance, records = opening, []
+    for day, desc, debit, credit in rows:
+        balance = round(balance - debit + credit, 2)
+        records.append({'Booking Date': pd.Timestamp(2024, 3, day), 'Description': desc, 'Extracted Notes': '',
+                        'Debit': debit, 'Credit': credit, 'Balance': balance})
+    return compact_frame(pd.DataFrame(records))
+
+
+ROWS = [(1, 'CASH DEPOSIT', 0.0, 500.0), (2, 'POS PURCHASE', 120.5, 0.0), (3, 'ATM WITHDRAWAL', 200.0, 0.0),
+        (4, 'SALARY PAYMENT', 300.0, 0.0), (5, 'TRANSFER IN', 0.0, 75.25), (6, 'MOMO TRANSFER OUT', 40.0, 0.0)]
+
+
+def test_reconcile_intact_chain():
+    summary, breaks = reconcile(statement(ROWS))
+    assert summary['breaks'] == 0 and summary['checked'] == len(ROWS) - 1 and breaks.empty
+
+
+def test_reconcile_missing_row():
+    summary, breaks = reconcile(statement(ROWS).drop(index=2).reset_index(drop=True))
+    assert summary['missing'] == 1 and summary['breaks'] == 1
+    assert breaks['Issue'].tolist() == ['missing'] and breaks['Difference'].tolist() == [-200.0]
+    assert summary['unexplained'] == -200.0
+
+
+def test_reconcile_misread_balance():
+    df = statement(ROWS)
+    df.loc[2, 'Balance'] += 900   # 9.00 GH₵ mis-read on one row; the next row is right again
+    summary, breaks = reconcile(df)
+    assert summary['misread'] == 1 and summary['breaks'] == 1
+    assert breaks['Row'].tolist() == [3] and breaks['Issue'].tolist() == ['misread']
+
+
+def test_reconcile_swapped_debit_credit():
+    df = statement(ROWS)
+    df.loc[3, ['Debit', 'Credit']] = [0, 30_000]
+    summary, breaks = reconcile(df)
+    assert summary['swapped'] == 1 and breaks['Issue'].tolist() == ['swapped']
+
+
+def test_reconcile_checks_each_statement_of_a_ledger_on_its_own():
+    ledger = consolidate([('a.csv', statement(ROWS[:3])), ('b.csv', statement(ROWS[3:], opening=50.0))])
+    summary, breaks = reconcile(ledger)
+    assert summary['statements'] == 2 and summary['breaks'] == 0
+
+
+def newest_first_within_days(df):
+    """The statement as printed by a bank that lists each day's entries newest first."""
+    position = np.arange(len(df))
+    return df.iloc[np.lexsort((-position, df['Booking Date'].to_numpy()))].reset_index(drop=True)
+
+
+SAME_DAY_ROWS = [(1, 'CASH DEPOSIT', 0.0, 500.0), (1, 'POS PURCHASE', 120.5, 0.0), (1, 'ATM WITHDRAWAL', 200.0, 0.0),
+                 (2, 'SALARY PAYMENT', 0.0, 3000.0), (2, 'TRANSFER IN', 0.0, 75.25), (3, 'MOMO TRANSFER OUT', 40.0, 0.0)]
+
+
+def test_reconcile_same_day_rows_listed_newest_first():
+    df = newest_first_within_days(statement(SAME_DAY_ROWS))
+    assert df['Description'].astype('str').tolist()[:3] == ['ATM WITHDRAWAL', 'POS PURCHASE', 'CASH DEPOSIT']
+    summary, breaks = reconcile(df)
+    assert summary['breaks'] == 0 and breaks.empty
+
+    df.loc[1, 'Balance'] += 900   # POS PURCHASE mis-read, reported at its own row
+    summary, breaks = reconcile(df)
+    assert summary['misread'] == 1 and breaks['Row'].tolist() == [2]
+    assert breaks['Description'].astype('str').tolist() == ['POS PURCHASE']
+
+
+def test_reconcile_orders_same_day_rows_per_statement():
+    oldest_first = statement(SAME_DAY_ROWS)
+    newest_first = newest_first_within_days(statement(SAME_DAY_ROWS, opening=50.0))
+    ledger = consolidate([('a.csv', oldest_first), ('b.csv', newest_first)])
+    summary, breaks = reconcile(ledger)
+    assert summary['statements'] == 2 and summary['breaks'] == 0
+
+
+def test_duplicates_exact_overlap_is_flagged_once():
+    first, second = statement(ROWS[:4]), statement(ROWS[2:], opening=1000.0 + 500.0 - 120.5)
+    flagged = flag_duplicates([('jan.csv', first), ('feb.csv', second)], DuplicateIndex())
+    assert (flagged[0][1][DUPLICATE_COLUMN] == '').all()
+    feb = flagged[1][1]
+    assert feb[DUPLICATE_COLUMN].tolist() == ['exact', 'exact', '', '']
+    assert feb[DUPLICATE_OF_COLUMN].tolist()[:2] == ['jan.csv', 'jan.csv']
+
+
+def test_duplicates_repeated_identical_rows_pair_one_to_one():
+    twice = [ROWS[1], ROWS[1]]
+    flagged = flag_duplicates([('a.csv', statement(twice)), ('b.csv', statement(twice + [ROWS[1]]))],
+                              DuplicateIndex())
+    assert flagged[1][1][DUPLICATE_COLUMN].tolist() == ['exact', 'exact', '']
+
+
+def test_duplicates_near_match_on_reference():
+    a = statement(ROWS[:2]).assign(Reference=['FT1', 'FT2'])
+    b = statement(ROWS[:2]).assign(Reference=['FT1', 'FT2'], Description=['DEPOSIT CASH BRANCH', 'CARD POS'])
+    flagged = flag_duplicates([('a.csv', a), ('b.csv', b)], DuplicateIndex())
+    assert flagged[1][1][DUPLICATE_COLUMN].tolist() == ['near', 'near']
+
+
+@pytest.fixture(scope='module')
+def parsed():
+    return compact_frame(parse_statement('csv', make_csv_statement(1500, 9)).reset_index(drop=True))
+
+
+def test_rollups_agree_with_index(parsed):
+    index, view = DatasetIndex(parsed), Rollups(parsed).view('2024-02-10', '2024-05-20')
+    months = index.monthly('2024-02-10', '2024-05-20')
+    assert [{k: m[k] for k in ('month', 'inflow', 'outflow', 'net', 'count')} for m in view['monthly']] == months
+    weekly = view['weekly']
+    assert sum(w['count'] for w in weekly) == index.totals('2024-02-10', '2024-05-20')['count']
+    assert all(pd.Timestamp(w['week']).dayofweek == 0 for w in weekly)
+
+
+def test_ledger_store_matches_dataset(tmp_path, parsed):
+    store = LedgerStore(str(tmp_path / 'ledger.db'))
+    assert store.commit(parsed, 'KAKOS', 'statement.csv') == {'statements': 1, 'skipped': 0, 'rows': len(parsed)}
+    assert store.commit(parsed, 'KAKOS', 'statement.csv')['skipped'] == 1   # idempotent per statement
+
+    index = DatasetIndex(parsed)
+    assert store.totals(LEDGER_FILTERS) == index.totals()
+    ranged = {**LEDGER_FILTERS, 'start': '2024-03-01', 'end': '2024-06-30'}
+    assert store.totals(ranged) == index.totals('2024-03-01', '2024-06-30')
+    assert store.monthly(ranged) == index.monthly('2024-03-01', '2024-06-30')
+
+    window = {'offset': 10, 'limit': 25, 'sort': 'date', 'order': 'asc'}
+    rows = store.rows(LEDGER_FILTERS, window)
+    expected = parsed.iloc[10:35].reset_index(drop=True)
+    assert rows['Description'].astype('str').tolist() == expected['Description'].astype('str').tolist()
+    assert np.array_equal(rows['Balance'].to_numpy(dtype='int64'), expected['Balance'].to_numpy(dtype='int64'))
+
+
+def test_dataset_store_maps_columns_instead_of_copying(tmp_path, parsed):
+    store = DatasetStore(str(tmp_path), ttl=3600)
+    df, _ = store.load(store.create(parsed, 'statement.csv'))
+    assert df.equals(parsed) and df.dtypes.equals(parsed.dtypes)
+    # Money, dates, codes and strings are views of the file; only the categories are this worker's own
+    assert 0 < store.stats()['open_bytes'] < frame_bytes(parsed) // 10
@@ -0,0 +1,82 @@
+"""
+Every parser fast path must produce exactly the frame of the path it replaced:
+parallel vs serial PDF extraction, the learnt-grid PDF fast path vs table
+detection, streamed DOCX vs the python-docx model, and vectorised CSV batches
+vs the line-by-line engine.
+"""
+import io
+import os
+
+import pytest
+
+from benchmarks.csv_vectorised import golden_corpus
+from benchmarks.generators import make_csv_statement, make_docx_statement, make_pdf_statement
+from kakos_audit import BankParser, DocxBankParser, PdfBankParser, parse_statement
+
+
+def _assert_same(fast, slow):
+    assert len(fast) > 0 or len(slow) == 0
+    assert fast.dtypes.equals(slow.dtypes)
+    assert fast.equals(slow)
+
+
+@pytest.fixture(scope='module')
+def pdf_statement():
+    return make_pdf_statement(300, seed=3)
+
+
+def test_pdf_parallel_matches_serial(pdf_statement):
+    serial = PdfBankParser().parse(io.BytesIO(pdf_statement))
+    parallel = PdfBankParser(workers=2).parse(io.BytesIO(pdf_statement))
+    assert len(serial) == 301   # the transactions plus the opening balance row
+    _assert_same(parallel, serial)
+    assert os.listdir(PdfBankParser.SPOOL_DIR) == []   # the copy spooled for the pool is gone
+
+
+def test_pdf_fast_path_matches_table_detection(pdf_statement):
+    fast = PdfBankParser().parse(io.BytesIO(pdf_statement))
+    slow = PdfBankParser()
+    slow.FAST_PATH = False
+    _assert_same(fast, slow.parse(io.BytesIO(pdf_statement)))
+
+
+@pytest.mark.parametrize('columns', [9, 7, 6])
+def test_docx_streaming_matches_python_docx(columns):
+    data = make_docx_statement(400, seed=columns, columns=columns)
+    model = DocxBankParser()
+    model.STREAMING = False
+    streamed = DocxBankParser().parse(io.BytesIO(data))
+    assert len(streamed) == 401
+    _assert_same(streamed, model.parse(io.BytesIO(data)))
+
+
+def _csv_parser(vectorised, batch_lines=None):
+    parser = BankParser()
+    parser.VECTORISED = vectorised
+    if batch_lines:
+        parser.BATCH_LINES = batch_lines
+    return parser
+
+
+@pytest.mark.parametrize('batch_lines', [None, 7, 500])
+@pytest.mark.parametrize('name,data', list(golden_corpus()), ids=lambda v: v if isinstance(v, str) else '')
+def test_csv_vectorised_matches_line_by_line(name, data, batch_lines):
+    lines = _csv_parser(False).parse(io.BytesIO(data))
+    _assert_same(_csv_parser(True, batch_lines).parse(io.BytesIO(data)), lines)
+
+
+def test_csv_chunks_stay_within_chunk_rows():
+    data = make_csv_statement(2500, seed=4)
+    parser = _csv_parser(True, batch_lines=1000)
+    sizes = [len(chunk) for chunk in parser.iter_chunks(io.BytesIO(data), chunk_rows=300)]
+    assert sum(sizes) == 2500 and max(sizes) <= 300
+
+
+# The CSV engine drops the undated opening balance line; the others keep it as an undated row
+@pytest.mark.parametrize('engine,make,undated', [('csv', make_csv_statement, 0), ('docx', make_docx_statement, 1),
+                                                 ('pdf', make_pdf_statement, 1)])
+def test_parse_statement_dates_and_order(engine, make, undated):
+    df = parse_statement(engine, make(200, 6))
+    dated = df['Booking Date'].dropna()
+    assert len(df) == 200 + undated and df['Booking Date'].isna().sum() == undated
+    assert dated.is_monotonic_increasing and dated.dt.year.min() == 2024
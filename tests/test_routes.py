@@ -0,0 +1,134 @@
+"""
+The Flask routes end to end: uploads, cached views with ETag revalidation,
+filter validation, background jobs and bulk appends.
+"""
+import gzip
+import io
+import os
+import time
+
+import pytest
+
+import kakos_audit
+from benchmarks.generators import make_csv_statement
+
+
+@pytest.fixture
+def loaded(client):
+    resp = client.post('/', data={'file': (io.BytesIO(make_csv_statement(400, 2)), 'statement.csv')})
+    assert resp.status_code == 302
+    return client
+
+
+def test_upload_and_kpis(loaded):
+    kpis = loaded.get('/api/kpis').get_json()
+    assert kpis['count'] == 400 and sum(m['count'] for m in kpis['monthly']) == 400
+    page = loaded.get('/api/transactions', query_string={'limit': 50}).get_json()
+    assert len(page['rows']) == 50 and page['total'] == 400
+
+
+def test_cached_view_revalidates_with_etag(loaded):
+    first = loaded.get('/api/kpis', query_string={'start_date': '2024-02-01'})
+    assert first.status_code == 200 and first.headers['ETag']
+    again = loaded.get('/api/kpis', query_string={'start_date': '2024-02-01'},
+                       headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.get_data() == b''
+    other = loaded.get('/api/kpis', query_string={'start_date': '2024-03-01'},
+                       headers={'If-None-Match': first.headers['ETag']})
+    assert other.status_code == 200 and other.headers['ETag'] != first.headers['ETag']
+
+
+def test_cached_view_gzip(loaded):
+    plain = loaded.get('/api/transactions', query_string={'limit': 200})
+    packed = loaded.get('/api/transactions', query_string={'limit': 200}, headers={'Accept-Encoding': 'gzip'})
+    assert packed.headers.get('Content-Encoding') == 'gzip'
+    assert gzip.decompress(packed.get_data()) == plain.get_data()
+
+
+def test_new_upload_changes_etag(loaded):
+    etag = loaded.get('/api/kpis').headers['ETag']
+    loaded.post('/', data={'file': (io.BytesIO(make_csv_statement(100, 3)), 'other.csv')})
+    resp = loaded.get('/api/kpis', headers={'If-None-Match': etag})
+    assert resp.status_code == 200 and resp.get_json()['count'] == 100
+
+
+@pytest.mark.parametrize('path', ['/api/transactions', '/api/kpis', '/api/analytics'])
+def test_malformed_date_is_a_json_400(loaded, path):
+    resp = loaded.get(path, query_string={'start_date': '2024-13-45'})
+    assert resp.status_code == 400 and 'start_date' in resp.get_json()['error']
+
+
+def test_malformed_date_on_dashboard_is_a_400(loaded):
+    resp = loaded.get('/', query_string={'end_date': 'not a date'})
+    assert resp.status_code == 400 and b'Invalid end_date' in resp.get_data()
+
+
+def test_background_job(client):
+    data = make_csv_statement(300, 5)
+    body = client.post('/', data={'file': (io.BytesIO(data), 'statement.csv'), 'background': '1'}).get_json()
+    status_url = body['status_url']
+    for _ in range(200):
+        if body['state'] not in kakos_audit.JobBoard.ACTIVE:
+            break
+        time.sleep(0.05)
+        body = client.get(status_url).get_json()
+    assert body['state'] == 'done' and body['dataset']['rows'] == 300
+    assert client.get('/api/kpis').get_json()['count'] == 300
+    assert os.listdir(kakos_audit.app.config['SPOOL_DIR']) == []
+
+
+def test_job_claimed_by_another_worker_is_queued(client):
+    data = make_csv_statement(50, 6)
+    job_id = kakos_audit.ParseCache.key('csv', io.BytesIO(data))
+    lock = kakos_audit.JOBS._path(job_id) + '.lock'
+    open(lock, 'w').close()   # claimed, state file not written yet
+    try:
+        resp = client.post('/', data={'file': (io.BytesIO(data), 'statement.csv'), 'background': '1'})
+        assert resp.status_code == 202 and resp.get_json()['state'] == 'queued'
+        assert client.get(f'/jobs/{job_id}').get_json()['state'] == 'queued'
+    finally:
+        os.remove(lock)
+
+
+def test_bulk_append_waits_for_running_ingest(loaded):
+    with loaded.session_transaction() as sess:
+        dataset_id = sess['dataset_id']
+    more = {'files': (io.BytesIO(make_csv_statement(100, 7)), 'more.csv'), 'append': '1'}
+    assert kakos_audit.DATASETS.claim_ingest(dataset_id)   # an ingest still running in some worker
+    try:
+        resp = loaded.post('/bulk', data=dict(more))
+        assert b'still being added' in resp.get_data()
+        assert loaded.get('/api/kpis').get_json()['count'] == 400
+        assert os.listdir(kakos_audit.app.config['SPOOL_DIR']) == []
+    finally:
+        kakos_audit.DATASETS.release_ingest(dataset_id)
+
+    more['files'] = (io.BytesIO(make_csv_statement(100, 7)), 'more.csv')
+    assert loaded.post('/bulk', data=more).status_code == 302
+    for _ in range(200):
+        if kakos_audit.DATASETS.claim_ingest(dataset_id):
+            kakos_audit.DATASETS.release_ingest(dataset_id)
+            break
+        time.sleep(0.05)
+    assert loaded.get('/api/kpis').get_json()['count'] == 500
+
+
+def test_bulk_upload_has_its_own_size_limit(client):
+    statements = [make_csv_statement(300, seed) for seed in (8, 9, 10)]
+    config = kakos_audit.app.config
+    saved = config['MAX_CONTENT_LENGTH'], config['BULK_MAX_BYTES']
+    config['MAX_CONTENT_LENGTH'] = max(map(len, statements)) + 1   # each statement fits, the batch does not
+    try:
+        config['BULK_MAX_BYTES'] = 2 * config['MAX_CONTENT_LENGTH']
+        files = [(io.BytesIO(data), f's{i}.csv') for i, data in enumerate(statements)]
+        assert client.post('/bulk', data={'files': files}).status_code == 413
+        config['BULK_MAX_BYTES'] = 4 * config['MAX_CONTENT_LENGTH']
+        files = [(io.BytesIO(data), f's{i}.csv') for i, data in enumerate(statements)]
+        assert client.post('/bulk', data={'files': files}).status_code == 302
+    finally:
+        config['MAX_CONTENT_LENGTH'], config['BULK_MAX_BYTES'] = saved
+    for _ in range(200):
+        if client.get('/api/kpis').get_json()['count'] == 900:
+            break
+        time.sleep(0.05)
+    assert client.get('/api/kpis').get_json()['count'] == 900